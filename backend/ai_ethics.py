@@ -158,7 +158,7 @@ class BiasDetector:
             'context': context or {}
         }
         
-        ethics_logger.info(f"Bias check: {log_entry}")
+        ethics_logger.info("Bias check: %s", log_entry)
         self.detection_history.append(log_entry)
 
 class TransparencyManager:
@@ -352,7 +352,7 @@ class PrivacyManager:
         deletion_report['data_retained'].append('Anonymized analytics data')
         deletion_report['retention_reason'].append('Legal compliance and system security')
         
-        ethics_logger.info(f"Data deletion processed for user: {user_id}")
+        ethics_logger.info("Data deletion processed for user: %s", user_id)
         
         return deletion_report
 
@@ -494,7 +494,7 @@ class OutputValidator:
             'context': context or {}
         }
         
-        ethics_logger.info(f"Output validation: {log_entry}")
+        ethics_logger.info("Output validation: %s", log_entry)
 
 # Integrated Ethics Framework
 class AIEthicsFramework:
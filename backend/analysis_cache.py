@@ -0,0 +1,175 @@
+"""
+Content-Addressed File Analysis Cache for AI Study Planner
+Students upload the same lecture files again and again. Two SQLite tables
+keyed by the SHA-256 of the file bytes let repeat uploads skip the work:
+
+- document_texts: extracted text per file hash, so a new question about a
+  known file skips extraction;
+- analysis_results: the LLM answer per (file hash, file type, normalized
+  query, model, prompt version), so a repeated question skips the LLM too.
+
+Both tables are LRU-evicted (last_access): texts beyond
+ANALYSIS_CACHE_MAX_DOCUMENTS rows or ANALYSIS_CACHE_MAX_TEXT_BYTES of text,
+results beyond ANALYSIS_CACHE_MAX_RESULTS rows. ANALYSIS_CACHE_HITS_COUNT
+decides whether an analysis served from the cache counts toward the daily
+upload limit.
+"""
+
+import hashlib
+import os
+import time
+from typing import BinaryIO, Dict, Optional
+
+try:
+    from backend.llm_cache import content_key
+    from backend.log_config import get_logger
+except ImportError:
+    from llm_cache import content_key
+    from log_config import get_logger
+
+logger = get_logger("analysis_cache")
+
+ANALYSIS_CACHE_MAX_DOCUMENTS = int(os.getenv("ANALYSIS_CACHE_MAX_DOCUMENTS", "1000"))
+ANALYSIS_CACHE_MAX_TEXT_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_TEXT_BYTES", str(256 * 1024 * 1024)))
+ANALYSIS_CACHE_MAX_RESULTS = int(os.getenv("ANALYSIS_CACHE_MAX_RESULTS", "5000"))
+ANALYSIS_CACHE_HITS_COUNT = os.getenv("ANALYSIS_CACHE_HITS_COUNT", "true").lower() in ("1", "true", "yes")
+_HASH_CHUNK_SIZE = 256 * 1024
+
+
+def file_sha256(stream: BinaryIO) -> str:
+    """SHA-256 of a seekable stream, read in chunks; the stream is rewound"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(_HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite cache of extracted document text and analysis results. ``pool`` is
+    a database_pool.ConnectionPool whose database has been migrated to v4+.
+    """
+
+    def __init__(self, pool, max_documents: int = ANALYSIS_CACHE_MAX_DOCUMENTS,
+                 max_text_bytes: int = ANALYSIS_CACHE_MAX_TEXT_BYTES,
+                 max_results: int = ANALYSIS_CACHE_MAX_RESULTS,
+                 hits_count_toward_limit: bool = ANALYSIS_CACHE_HITS_COUNT):
+        self.pool = pool
+        self.max_documents = max(1, max_documents)
+        self.max_text_bytes = max(1, max_text_bytes)
+        self.max_results = max(1, max_results)
+        self.hits_count_toward_limit = hits_count_toward_limit
+        self.result_hits = 0
+        self.text_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def result_key(sha256: str, file_type: str, query: Optional[str], model: str, version: str) -> str:
+        """Result key; the query is normalized (case/whitespace-insensitive)"""
+        return content_key("file_analysis", version, sha256, file_type, query or "", model)
+
+    # Disk layer (runs on the pool's executor threads)
+
+    def _load_result(self, key: str) -> Optional[str]:
+        with self.pool.connection() as conn:
+            row = conn.execute('SELECT result FROM analysis_results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE analysis_results SET last_access = ? WHERE key = ?', (time.time(), key))
+            return row[0]
+
+    def _load_text(self, sha256: str) -> Optional[str]:
+        with self.pool.connection() as conn:
+            row = conn.execute('SELECT text FROM document_texts WHERE sha256 = ?', (sha256,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE document_texts SET last_access = ? WHERE sha256 = ?', (time.time(), sha256))
+            return row[0]
+
+    def _contains_result(self, key: str) -> bool:
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT 1 FROM analysis_results WHERE key = ?', (key,)).fetchone() is not None
+
+    def _store_text(self, sha256: str, file_type: str, text: str):
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO document_texts (sha256, file_type, text, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (sha256, file_type, text, len(text.encode('utf-8')), now, now))
+            # Least recently used first out, by row count and by total text size
+            evicted = conn.execute('''
+                DELETE FROM document_texts WHERE sha256 IN (
+                    SELECT sha256 FROM (
+                        SELECT sha256,
+                               ROW_NUMBER() OVER (ORDER BY last_access DESC) AS position,
+                               SUM(size) OVER (ORDER BY last_access DESC
+                                               ROWS UNBOUNDED PRECEDING) AS running_size
+                        FROM document_texts
+                    ) WHERE position > ? OR (position > 1 AND running_size > ?)
+                )
+            ''', (self.max_documents, self.max_text_bytes)).rowcount
+        if evicted > 0:
+            self.evictions += evicted
+
+    def _store_result(self, key: str, sha256: str, result: str):
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO analysis_results (key, sha256, result, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, sha256, result, now, now))
+            evicted = conn.execute('''
+                DELETE FROM analysis_results WHERE key IN (
+                    SELECT key FROM analysis_results ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_results,)).rowcount
+        if evicted > 0:
+            self.evictions += evicted
+
+    # Public API
+
+    async def get_result(self, key: str) -> Optional[str]:
+        result = await self.pool.run(self._load_result, key)
+        if result is not None:
+            self.result_hits += 1
+        return result
+
+    async def get_text(self, sha256: str) -> Optional[str]:
+        text = await self.pool.run(self._load_text, sha256)
+        if text is not None:
+            self.text_hits += 1
+        else:
+            self.misses += 1
+        return text
+
+    async def has_result(self, key: str) -> bool:
+        return await self.pool.run(self._contains_result, key)
+
+    async def put_text(self, sha256: str, file_type: str, text: str):
+        try:
+            await self.pool.run(self._store_text, sha256, file_type, text)
+        except Exception as e:
+            logger.warning("[ANALYSIS CACHE] Failed to store text for %s: %s", sha256, e)
+
+    async def put_result(self, key: str, sha256: str, result: str):
+        try:
+            await self.pool.run(self._store_result, key, sha256, result)
+        except Exception as e:
+            logger.warning("[ANALYSIS CACHE] Failed to store result %s: %s", key, e)
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters for monitoring endpoints"""
+        return {
+            "result_hits": self.result_hits,
+            "text_hits": self.text_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "max_documents": self.max_documents,
+            "max_text_bytes": self.max_text_bytes,
+            "max_results": self.max_results,
+            "hits_count_toward_limit": self.hits_count_toward_limit,
+        }
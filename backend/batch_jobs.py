@@ -0,0 +1,189 @@
+"""
+Batch File Analysis Jobs for AI Study Planner
+/api/file-analysis/upload-multiple hands its files to a background job and
+answers at once with a job id; clients poll the job for per-file progress.
+
+Files of a job are analyzed concurrently, at most BATCH_FILE_CONCURRENCY at
+a time (the extraction pool and the LLM client add their own process-wide
+limits), so a batch takes about as long as its slowest file. The
+file_uploads rows of the whole batch are written in one transaction once
+the last file is done; until then pending_uploads() reports the job's files
+so the daily upload limit sees them. Running jobs are always pollable;
+finished ones stay pollable for BATCH_JOB_TTL seconds (at most
+BATCH_MAX_JOBS of them).
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    from backend.cache_utils import TTLCache
+    from backend.log_config import get_logger
+except ImportError:
+    from cache_utils import TTLCache
+    from log_config import get_logger
+
+logger = get_logger("batch_jobs")
+
+BATCH_FILE_CONCURRENCY = int(os.getenv("BATCH_FILE_CONCURRENCY", "8"))
+BATCH_JOB_TTL = float(os.getenv("BATCH_JOB_TTL", "3600"))
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "1000"))
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+@dataclass
+class BatchFile:
+    filename: str
+    status: str = "queued"  # queued | processing | done | error
+    message: Optional[str] = None
+    result: Optional[Dict] = None
+    finished_at: Optional[float] = None
+
+    def finish(self, result: Dict):
+        self.status = "done" if result.get("status") == "success" else "error"
+        self.result = result if self.status == "done" else None
+        self.message = result.get("message")
+        self.finished_at = time.time()
+
+
+@dataclass
+class BatchJob:
+    job_id: str
+    user_id: str
+    files: List[BatchFile]
+    status: str = "running"  # running | completed | failed
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def snapshot(self) -> Dict:
+        """Job state for the polling endpoint"""
+        succeeded = sum(1 for entry in self.files if entry.status == "done")
+        failed = sum(1 for entry in self.files if entry.status == "error")
+        return {
+            "job_id": self.job_id,
+            "job_status": self.status,
+            "error": self.error,
+            "total_files": len(self.files),
+            "finished_files": succeeded + failed,
+            "succeeded": succeeded,
+            "failed": failed,
+            "created_at": _iso(self.created_at),
+            "finished_at": _iso(self.finished_at),
+            "files": [{
+                "filename": entry.filename,
+                "status": entry.status,
+                "message": entry.message,
+                "result": entry.result,
+            } for entry in self.files],
+        }
+
+
+class BatchJobRunner:
+    """Starts batch jobs as background tasks and keeps them for polling"""
+
+    def __init__(self, concurrency: int = BATCH_FILE_CONCURRENCY, ttl: float = BATCH_JOB_TTL,
+                 max_jobs: int = BATCH_MAX_JOBS):
+        self.concurrency = max(1, concurrency)
+        # Running jobs are pinned here; only finished ones go to the evictable cache
+        self.running: Dict[str, BatchJob] = {}
+        self.jobs = TTLCache(maxsize=max_jobs, ttl=ttl, name="batch_jobs")
+        self._tasks: Set[asyncio.Task] = set()
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self, user_id: str, files: List[BatchFile],
+              analyze: Callable[[int, List[Tuple]], Awaitable[Dict]],
+              save_rows: Callable[[List[Tuple]], Awaitable[None]],
+              cleanup: Optional[Callable[[], None]] = None) -> BatchJob:
+        """
+        Run ``analyze(index, rows)`` for every queued file (files already
+        marked "error" are reported as they are). analyze returns the
+        file's result dict and appends its database rows to ``rows``, which
+        are handed to ``save_rows`` once at the end. ``cleanup`` runs last.
+        """
+        job = BatchJob(uuid.uuid4().hex, user_id, files)
+        self.running[job.job_id] = job
+        self.started += 1
+        task = asyncio.create_task(self._run(job, analyze, save_rows, cleanup))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: BatchJob, analyze: Callable[[int, List[Tuple]], Awaitable[Dict]],
+                   save_rows: Callable[[List[Tuple]], Awaitable[None]],
+                   cleanup: Optional[Callable[[], None]]):
+        slots = asyncio.Semaphore(self.concurrency)
+        rows: List[Tuple] = []
+
+        async def process(index: int, entry: BatchFile):
+            async with slots:
+                entry.status = "processing"
+                try:
+                    result = await analyze(index, rows)
+                except Exception as e:
+                    logger.exception("[BATCH] %s failed in job %s: %s", entry.filename, job.job_id, e)
+                    result = {"status": "error", "message": f"Failed to analyze file: {e}"}
+            entry.finish(result)
+
+        try:
+            await asyncio.gather(*(
+                process(index, entry) for index, entry in enumerate(job.files) if entry.status == "queued"
+            ))
+            if rows:
+                await save_rows(rows)
+            job.status = "completed"
+            self.completed += 1
+        except Exception as e:
+            logger.exception("[BATCH] Job %s failed: %s", job.job_id, e)
+            job.status = "failed"
+            job.error = "Batch results could not be saved"
+            self.failed += 1
+        finally:
+            job.finished_at = time.time()
+            self.jobs.set(job.job_id, job)
+            del self.running[job.job_id]
+            if cleanup is not None:
+                cleanup()
+
+    def get(self, user_id: str, job_id: str) -> Optional[BatchJob]:
+        """The job, if it exists and belongs to user_id"""
+        job = self.running.get(job_id) or self.jobs.get(job_id)
+        return job if job is not None and job.user_id == user_id else None
+
+    def pending_uploads(self, user_id: str, count_cache_hits: bool = True) -> int:
+        """
+        Files of user_id's running jobs whose file_uploads rows are not
+        written yet (failed files get none). Safe to call from other threads.
+        """
+        pending = 0
+        for job in list(self.running.values()):
+            if job.user_id != user_id:
+                continue
+            for entry in job.files:
+                if entry.status == "error":
+                    continue
+                if not count_cache_hits and entry.status == "done" and entry.result.get("cached"):
+                    continue
+                pending += 1
+        return pending
+
+    def stats(self) -> Dict:
+        """Job counters for monitoring endpoints"""
+        return {
+            "running": len(self.running),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "file_concurrency": self.concurrency,
+            "jobs": self.jobs.stats(),
+        }
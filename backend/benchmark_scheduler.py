@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Scheduler Engine Benchmark
+Times scheduler_engine.build_schedule on year-long multi-subject plans and
+compares the hours it schedules with the single-subject layout
+(plan_model.CompactPlan).
+
+Usage: python benchmark_scheduler.py [--runs N]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from plan_model import CompactPlan
+from scheduler_engine import ScheduleConstraints, SubjectSpec, TopicSpec, build_schedule
+
+SCENARIOS = [
+    # (name, subjects, topics per subject, hours per day, days, rest weekdays, cap per topic)
+    ("1 subject, 30 days", 1, 10, 2, 30, (), None),
+    ("3 subjects, 90 days", 3, 12, 4, 90, (6,), 2),
+    ("5 subjects, 365 days", 5, 20, 6, 365, (5, 6), 3),
+    ("10 subjects, 365 days", 10, 25, 8, 365, (6,), 2),
+]
+
+
+def make_subjects(count: int, topics_per_subject: int, seed: int = 42):
+    rng = random.Random(seed)
+    subjects = []
+    for s in range(count):
+        topics = [TopicSpec(f"Subject {s + 1} Topic {t + 1}", weight=rng.choice([1, 1, 2, 3]))
+                  for t in range(topics_per_subject)]
+        # A few cross-links on top of the sequential order
+        for topic in topics[2::5]:
+            topic.prerequisites = (topics[0].name,)
+        subjects.append(SubjectSpec(f"Subject {s + 1}", topics, weight=rng.choice([1, 2])))
+    return subjects
+
+
+def layout_scheduled_hours(topics: int, hours_per_day: int, days: int) -> int:
+    """Hours placed by the single-subject layout for the same capacity"""
+    plan = CompactPlan("layout", [f"Topic {t + 1}" for t in range(topics)],
+                       hours_per_day * days, hours_per_day, days, "intermediate",
+                       datetime.now().strftime("%Y-%m-%d"))
+    window = plan.window()
+    return sum(window.hours)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per scenario")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<24}{'topics':>8}{'capacity':>10}{'placed':>8}{'finish':>8}{'ms/run':>10}")
+    for name, subject_count, topic_count, hours_per_day, days, rest, cap in SCENARIOS:
+        subjects = make_subjects(subject_count, topic_count)
+        constraints = ScheduleConstraints(
+            daily_hours=hours_per_day, total_days=days,
+            start_date=datetime.now().strftime("%Y-%m-%d"),
+            rest_weekdays=rest, max_topic_hours_per_day=cap
+        )
+        build_schedule(subjects, constraints)  # warm-up
+        started = time.perf_counter()
+        for _ in range(args.runs):
+            schedule = build_schedule(subjects, constraints)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / args.runs
+
+        summary = schedule.summary()
+        print(f"{name:<24}{subject_count * topic_count:>8}{summary['capacity_hours']:>10}"
+              f"{summary['scheduled_hours']:>8}{summary['finish_day']:>8}{elapsed_ms:>10.2f}")
+
+    # 60h over 7 topics does not split evenly; both must still place every hour
+    layout = layout_scheduled_hours(7, 2, 30)
+    engine = build_schedule(
+        [SubjectSpec("layout", [TopicSpec(f"Topic {t + 1}") for t in range(7)])],
+        ScheduleConstraints(2, 30, datetime.now().strftime("%Y-%m-%d"))
+    ).summary()["scheduled_hours"]
+    print(f"\n7 topics, 2h/day, 30 days: single-subject layout schedules {layout}h, engine {engine}h of 60h")
+
+
+if __name__ == "__main__":
+    main()
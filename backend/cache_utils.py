@@ -0,0 +1,88 @@
+"""
+In-Process Caching Utilities for AI Study Planner
+Thread-safe TTL + LRU cache with hit/miss/eviction counters for monitoring.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire after a time-to-live.
+
+    Entries may carry their own TTL (e.g. a token that expires sooner than the
+    cache default). Safe to share between the event loop and executor threads.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300.0, name: str = "cache"):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default when missing or expired"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value; ttl overrides the cache default for this entry"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry; returns True if it was cached"""
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters for monitoring endpoints"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,225 @@
+"""
+Chunked Map-Reduce Summarization for AI Study Planner
+Documents too large for one prompt are condensed before the final question
+is asked:
+
+1. Split - the text is cut at page (form feed) or slide ("--- Slide N ---")
+   boundaries, falling back to paragraphs, and the pieces are packed into
+   chunks of at most SUMMARY_CHUNK_TOKENS (estimated at
+   SUMMARY_CHARS_PER_TOKEN characters per token; oversized pages are split
+   by lines).
+2. Map - every chunk is summarized, at most SUMMARY_CONCURRENCY at a time
+   per document. Chunk summaries do not depend on the user's question and
+   are cached by chunk content, so asking something else about the same
+   document reuses them.
+3. Reduce - while the summaries together exceed SUMMARY_DIRECT_TOKENS,
+   neighbouring summaries are merged group by group (also cached), level by
+   level.
+
+Documents within SUMMARY_DIRECT_TOKENS are not touched.
+"""
+
+import asyncio
+import math
+import os
+import re
+from typing import Awaitable, Callable, List, Tuple
+
+try:
+    from backend.extraction_pool import PAGE_BREAK
+    from backend.llm_cache import ResponseCache, content_key
+except ImportError:
+    from extraction_pool import PAGE_BREAK
+    from llm_cache import ResponseCache, content_key
+
+SUMMARY_CHARS_PER_TOKEN = float(os.getenv("SUMMARY_CHARS_PER_TOKEN", "4"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_DIRECT_TOKENS = int(os.getenv("SUMMARY_DIRECT_TOKENS", "12000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_MAX_LEVELS = int(os.getenv("SUMMARY_MAX_LEVELS", "4"))
+
+_SLIDE_MARKER = re.compile(r"^--- Slide (\d+) ---$", re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (no tokenizer dependency)"""
+    return math.ceil(len(text) / SUMMARY_CHARS_PER_TOKEN)
+
+
+def split_sections(text: str) -> Tuple[str, List[Tuple[int, str]]]:
+    """
+    (unit, [(number, text)]) for the natural sections of a document: PDF
+    pages, PowerPoint slides, or paragraphs for anything else.
+    """
+    if PAGE_BREAK in text:
+        pages = text.split(PAGE_BREAK)
+        return "Page", [(number, page.strip()) for number, page in enumerate(pages, 1) if page.strip()]
+
+    markers = list(_SLIDE_MARKER.finditer(text))
+    if markers:
+        sections = []
+        for marker, following in zip(markers, markers[1:] + [None]):
+            body = text[marker.end():following.start() if following else len(text)].strip()
+            if body:
+                sections.append((int(marker.group(1)), body))
+        return "Slide", sections
+
+    paragraphs = [part.strip() for part in re.split(r"\n\s*\n", text)]
+    return "Part", [(number, part) for number, part in enumerate((p for p in paragraphs if p), 1)]
+
+
+def _split_oversized(body: str, max_chars: int) -> List[str]:
+    """Cut one section into pieces of at most max_chars, at line breaks where possible"""
+    pieces, current = [], ""
+    for line in body.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def span_label(unit: str, first: int, last: int) -> str:
+    return f"{unit} {first}" if first == last else f"{unit}s {first}-{last}"
+
+
+def chunk_document(text: str, chunk_tokens: int = SUMMARY_CHUNK_TOKENS) -> Tuple[str, List[Tuple[int, int, str]]]:
+    """(unit, [(first, last, text)]): whole sections packed into chunks within chunk_tokens"""
+    unit, sections = split_sections(text)
+    max_chars = max(1, int(chunk_tokens * SUMMARY_CHARS_PER_TOKEN))
+    chunks: List[Tuple[int, int, str]] = []
+    first = last = 0
+    parts: List[str] = []
+    size = 0
+
+    def flush():
+        if parts:
+            chunks.append((first, last, "\n\n".join(parts)))
+
+    for number, body in sections:
+        for piece in ([body] if len(body) <= max_chars else _split_oversized(body, max_chars)):
+            if parts and size + len(piece) + 2 > max_chars:
+                flush()
+                parts, size = [], 0
+            if not parts:
+                first = number
+            last = number
+            parts.append(piece)
+            size += len(piece) + 2
+    flush()
+    return unit, chunks
+
+
+class ChunkedSummarizer:
+    """
+    Condenses large documents with the map-reduce steps above. ``generate``
+    is an async prompt -> text callable (an LLMClient's ``generate``) and
+    ``cache`` the ResponseCache holding chunk and merge summaries.
+    """
+
+    # Bump whenever the chunk/merge prompts change so cached summaries are not reused
+    PROMPT_VERSION = "1"
+
+    def __init__(self, generate: Callable[[str], Awaitable[str]], cache: ResponseCache, model: str = "",
+                 chunk_tokens: int = SUMMARY_CHUNK_TOKENS, direct_tokens: int = SUMMARY_DIRECT_TOKENS,
+                 concurrency: int = SUMMARY_CONCURRENCY, max_levels: int = SUMMARY_MAX_LEVELS):
+        self.generate = generate
+        self.cache = cache
+        self.model = model
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.direct_tokens = max(self.chunk_tokens, direct_tokens)
+        self.concurrency = max(1, concurrency)
+        self.max_levels = max(1, max_levels)
+        self.documents = 0
+        self.chunks = 0
+        self.merges = 0
+
+    def needs_chunking(self, text: str) -> bool:
+        return estimate_tokens(text) > self.direct_tokens
+
+    async def _summarize(self, kind: str, label: str, text: str, content_type: str,
+                         limit: asyncio.Semaphore) -> str:
+        """Cached summary of one chunk ("chunk") or of neighbouring summaries ("merge")"""
+        if kind == "chunk":
+            prompt = (f"Summarize {label} of a {content_type}. Keep every key concept, definition, "
+                      f"formula and example a student would need, in at most 250 words.\n\n{text}")
+        else:
+            prompt = (f"Merge these consecutive section summaries of a {content_type} into one summary "
+                      f"of at most 400 words, keeping the key concepts in order.\n\n{text}")
+        key = content_key(f"{kind}_summary", self.PROMPT_VERSION, self.model, content_type, text)
+
+        async def compute() -> str:
+            async with limit:
+                return (await self.generate(prompt)).strip()
+
+        return await self.cache.get_or_compute(key, compute)
+
+    async def condense(self, text: str, content_type: str = "document") -> str:
+        """Labelled section summaries of text that together fit SUMMARY_DIRECT_TOKENS"""
+        limit = asyncio.Semaphore(self.concurrency)
+        unit, chunks = chunk_document(text, self.chunk_tokens)
+        self.documents += 1
+        self.chunks += len(chunks)
+        texts = await asyncio.gather(*(
+            self._summarize("chunk", span_label(unit, first, last), body, content_type, limit)
+            for first, last, body in chunks
+        ))
+        summaries = [(first, last, summary) for (first, last, _), summary in zip(chunks, texts)]
+
+        def render(entries) -> List[str]:
+            return [f"[{span_label(unit, first, last)}] {summary}" for first, last, summary in entries]
+
+        max_chars = int(self.chunk_tokens * SUMMARY_CHARS_PER_TOKEN)
+        for _ in range(self.max_levels):
+            if estimate_tokens("\n\n".join(render(summaries))) <= self.direct_tokens:
+                break
+            groups = _group(summaries, render, max_chars)
+            if len(groups) == len(summaries):
+                break  # no two neighbours fit one merge prompt
+            self.merges += sum(1 for group in groups if len(group) > 1)
+            texts = await asyncio.gather(*(
+                self._summarize("merge", span_label(unit, group[0][0], group[-1][1]),
+                                "\n\n".join(render(group)), content_type, limit)
+                if len(group) > 1 else _done(group[0][2])
+                for group in groups
+            ))
+            summaries = [(group[0][0], group[-1][1], summary) for group, summary in zip(groups, texts)]
+        return "\n\n".join(render(summaries))
+
+    def stats(self):
+        """Chunking counters for monitoring endpoints"""
+        return {
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "merges": self.merges,
+            "chunk_tokens": self.chunk_tokens,
+            "direct_tokens": self.direct_tokens,
+            "concurrency": self.concurrency,
+            "summary_cache": self.cache.stats(),
+        }
+
+
+def _group(summaries: List[Tuple[int, int, str]], render: Callable, max_chars: int) -> List[List]:
+    """Consecutive summaries packed into groups whose rendered text fits max_chars"""
+    groups: List[List] = []
+    size = 0
+    for entry, rendered in zip(summaries, render(summaries)):
+        if groups and size + len(rendered) + 2 <= max_chars:
+            groups[-1].append(entry)
+            size += len(rendered) + 2
+        else:
+            groups.append([entry])
+            size = len(rendered)
+    return groups
+
+
+async def _done(value: str) -> str:
+    return value
@@ -0,0 +1,176 @@
+"""
+SQLite Connection Pool for AI Study Planner
+Keeps a bounded set of tuned, long-lived connections so agents stop paying
+connect/close costs on every query.
+"""
+
+import asyncio
+import functools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Pragmas applied to every pooled connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -8000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 67108864",
+)
+
+DEFAULT_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DEFAULT_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free in time"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections in WAL mode.
+
+    Connections are checked out per thread: nested ``connection()`` blocks on
+    the same thread reuse the connection that is already checked out, and only
+    the outermost block commits (or rolls back on error) and returns it.
+    """
+
+    def __init__(self, db_path: str, max_size: int = DEFAULT_POOL_SIZE,
+                 checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT):
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wal_enabled = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               timeout=self.checkout_timeout)
+        if not self._wal_enabled:
+            # journal_mode is persistent in the database file, one connection is enough
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._wal_enabled = True
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"No database connection available after {self.checkout_timeout}s"
+            )
+
+    def _release(self, conn: sqlite3.Connection):
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the current thread"""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run blocking database code on the pool's executor threads so async
+        handlers never block the event loop. One executor thread per pooled
+        connection keeps checkout from ever waiting on another executor job.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_size, thread_name_prefix="db"
+                    )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    def stats(self) -> Dict:
+        """Pool usage numbers for monitoring"""
+        return {
+            "db_path": self.db_path,
+            "max_size": self.max_size,
+            "created": self._created,
+            "idle": self._idle.qsize(),
+        }
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, max_size: Optional[int] = None) -> ConnectionPool:
+    """Return the process-wide pool for a database file, creating it once"""
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, max_size or DEFAULT_POOL_SIZE)
+            _pools[key] = pool
+        return pool
@@ -0,0 +1,225 @@
+"""
+Versioned Schema Migrations for study_planner.db
+Each migration runs once, in order, inside its own transaction; the applied
+version is tracked with SQLite's PRAGMA user_version.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, List
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+logger = get_logger("db_migrations")
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _baseline_schema(conn: sqlite3.Connection):
+    """Tables as they existed before versioning (safe on pre-existing databases)"""
+    # Older databases were created without first_name/last_name
+    existing_columns = _column_names(conn, "users")
+    if existing_columns and 'first_name' not in existing_columns:
+        conn.execute('ALTER TABLE users ADD COLUMN first_name TEXT')
+        conn.execute('ALTER TABLE users ADD COLUMN last_name TEXT')
+        conn.execute('''
+            UPDATE users
+            SET first_name = 'User',
+                last_name = username
+            WHERE first_name IS NULL OR last_name IS NULL
+        ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            hashed_password TEXT NOT NULL,
+            created_at TEXT
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS study_plans (
+            id TEXT PRIMARY KEY,
+            user_id TEXT,
+            subject TEXT,
+            total_hours INTEGER,
+            daily_hours INTEGER,
+            difficulty TEXT,
+            start_date TEXT,
+            schedule TEXT,
+            resources TEXT,
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_progress (
+            id TEXT PRIMARY KEY,
+            user_id TEXT,
+            plan_id TEXT,
+            completed_hours INTEGER,
+            current_topic TEXT,
+            progress_percentage REAL,
+            last_activity TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS file_uploads (
+            id TEXT PRIMARY KEY,
+            user_id TEXT,
+            filename TEXT,
+            file_type TEXT,
+            upload_date TEXT,
+            query TEXT,
+            result TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+
+def _upload_day_and_indexes(conn: sqlite3.Connection):
+    """Sargable upload day column plus composite indexes for per-user queries"""
+    if 'upload_day' not in _column_names(conn, "file_uploads"):
+        conn.execute('ALTER TABLE file_uploads ADD COLUMN upload_day TEXT')
+    # upload_date is an ISO timestamp, so its first 10 chars are the YYYY-MM-DD day
+    conn.execute('''
+        UPDATE file_uploads SET upload_day = substr(upload_date, 1, 10)
+        WHERE upload_day IS NULL AND upload_date IS NOT NULL
+    ''')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_uploads_user_day ON file_uploads (user_id, upload_day)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_uploads_user_date ON file_uploads (user_id, upload_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_study_plans_user_created ON study_plans (user_id, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_progress_user_plan ON user_progress (user_id, plan_id)')
+
+
+def _llm_response_cache(conn: sqlite3.Connection):
+    """Persistent store behind llm_cache.ResponseCache"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            key TEXT PRIMARY KEY,
+            namespace TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    # Eviction ranks rows by last access within one namespace
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_llm_response_cache_namespace_access
+        ON llm_response_cache (namespace, last_access)
+    ''')
+
+
+def _file_analysis_cache(conn: sqlite3.Connection):
+    """Content-addressed store behind analysis_cache.AnalysisCache"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS document_texts (
+            sha256 TEXT PRIMARY KEY,
+            file_type TEXT NOT NULL,
+            text TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_results (
+            key TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_document_texts_access ON document_texts (last_access)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_results_access ON analysis_results (last_access)')
+    # Lets the daily upload limit leave out analyses served from the cache
+    if 'cache_hit' not in _column_names(conn, "file_uploads"):
+        conn.execute('ALTER TABLE file_uploads ADD COLUMN cache_hit INTEGER NOT NULL DEFAULT 0')
+
+
+def _passage_index(conn: sqlite3.Connection):
+    """FTS5 passage index behind passage_index.PassageIndex, plus file_uploads.sha256"""
+    if 'sha256' not in _column_names(conn, "file_uploads"):
+        conn.execute('ALTER TABLE file_uploads ADD COLUMN sha256 TEXT')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS indexed_documents (
+            sha256 TEXT PRIMARY KEY,
+            passages INTEGER NOT NULL,
+            indexed_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_indexed_documents_access ON indexed_documents (last_access)')
+    try:
+        # sha256 is an indexed column so per-document searches stay inside the full-text index
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS document_passages USING fts5(
+                body, sha256, label UNINDEXED, tokenize = 'porter unicode61'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5: questions fall back to sending the document
+        logger.warning("[DB MIGRATION] FTS5 unavailable, passage index disabled: %s", e)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema", _baseline_schema),
+    Migration(2, "file_uploads upload_day + composite indexes", _upload_day_and_indexes),
+    Migration(3, "llm_response_cache table", _llm_response_cache),
+    Migration(4, "file analysis cache + file_uploads.cache_hit", _file_analysis_cache),
+    Migration(5, "document_passages FTS5 index + file_uploads.sha256", _passage_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> List[int]:
+    """Bring the database up to SCHEMA_VERSION; returns the versions applied"""
+    applied = []
+    if conn.in_transaction:
+        conn.commit()
+
+    for migration in MIGRATIONS:
+        if get_schema_version(conn) >= migration.version:
+            continue
+        # IMMEDIATE takes the write lock so concurrent workers can't both migrate
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= migration.version:
+                conn.rollback()
+                continue
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {migration.version:d}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration.version)
+        logger.info("[DB MIGRATION] Applied v%s: %s", migration.version, migration.name)
+
+    return applied
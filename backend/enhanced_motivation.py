@@ -17,8 +17,14 @@ import asyncio
 # Import NLP processor for coursework demonstration
 try:
     from backend.nlp_processor import nlp_processor
+    from backend.log_config import get_logger
+    from backend.llm_client import get_llm_client
 except ImportError:
     from nlp_processor import nlp_processor
+    from log_config import get_logger
+    from llm_client import get_llm_client
+
+logger = get_logger("enhanced_motivation")
 
 # Try to import advanced libraries
 try:
@@ -103,19 +109,16 @@ class AdvancedSentimentAnalyzer:
         """Perform advanced multi-dimensional mood analysis with NLP preprocessing"""
         
         # COURSEWORK DEMONSTRATION: Apply NLP techniques to user input
-        print(f"\n[COURSEWORK] Applying NLP techniques to analyze mood...")
-        
-        # Process text through NLP pipeline 
-        nlp_result = nlp_processor.process_text_full_pipeline(text)
+        logger.debug("[COURSEWORK] Applying NLP techniques to analyze mood...")
         
-        # Extract sentiment keywords using NLP preprocessing
-        sentiment_keywords = nlp_processor.extract_key_sentiment_words(text)
+        # Lean pipeline: mood scoring only needs the lowercased text and lemmas
+        nlp_result = nlp_processor.process_text_lean(text, stages=("lowercase", "lemmatize"))
         
         # Use both original text and processed text for analysis
         text_lower = nlp_result.lowercased
-        processed_tokens = nlp_result.final_processed
+        processed_tokens = nlp_result.lemmatized
         
-        print(f"[COURSEWORK] NLP processing complete. Using {len(processed_tokens)} processed tokens for analysis.")
+        logger.debug("[COURSEWORK] NLP processing complete. Using %s processed tokens for analysis.", len(processed_tokens))
         
         scores = {}
         
@@ -144,15 +147,15 @@ class AdvancedSentimentAnalyzer:
                 # Add weight for each keyword match
                 for match in keyword_matches:
                     dimension_scores.append(weight)
-                    print(f"[NLP MATCH] Found '{match}' for {dimension} ({level}) -> weight: {weight}")
+                    logger.debug("[NLP MATCH] Found '%s' for %s (%s) -> weight: %s", match, dimension, level, weight)
             
             # Calculate final score for dimension
             if dimension_scores:
                 scores[dimension] = sum(dimension_scores) / len(dimension_scores)
-                print(f"[NLP ANALYSIS] {dimension} final score: {scores[dimension]:.2f} (from {len(dimension_scores)} matches)")
+                logger.debug("[NLP ANALYSIS] %s final score: %.2f (from %s matches)", dimension, scores[dimension], len(dimension_scores))
             else:
                 scores[dimension] = 0.5  # Default neutral
-                print(f"[NLP ANALYSIS] {dimension} default neutral: 0.5")
+                logger.debug("[NLP ANALYSIS] %s default neutral: 0.5", dimension)
         
         # Determine primary mood
         primary_mood = self._determine_primary_mood(scores, text_lower)
@@ -292,17 +295,14 @@ class DynamicContentGenerator:
     """Generates fresh motivational content using AI and external APIs"""
     
     def __init__(self):
-        self.gemini_model = None
         self.quote_cache = {}
         self.generation_history = []
-        
-        if GENAI_AVAILABLE and os.getenv("GEMINI_API_KEY"):
-            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-            self.gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+        # Shared async Gemini client (None when no API key / library)
+        self.llm = get_llm_client('gemini-2.5-flash')
     
-    def generate_personalized_quote_sync(self, mood_profile: MoodProfile, subject: str = None, user_input: str = None) -> MotivationContent:
-        """Generate personalized motivational quote using AI (synchronous version)"""
-        if not self.gemini_model:
+    async def generate_contextual_quote(self, mood_profile: MoodProfile, subject: str = None, user_input: str = None) -> MotivationContent:
+        """Generate personalized motivational quote using AI, reacting to what the user wrote"""
+        if not self.llm:
             return self._generate_contextual_fallback(user_input, mood_profile)
         
         if user_input:
@@ -311,8 +311,7 @@ class DynamicContentGenerator:
             prompt = self._build_quote_prompt(mood_profile, subject)
         
         try:
-            response = self.gemini_model.generate_content(prompt)
-            quote_text = response.text.strip()
+            quote_text = (await self.llm.generate(prompt)).strip()
             
             # Parse the generated content
             quote, author = self._parse_generated_quote(quote_text)
@@ -328,13 +327,13 @@ class DynamicContentGenerator:
             )
             
         except Exception as e:
-            print(f"Sync AI generation failed: {e}")
+            logger.warning("Contextual AI generation failed: %s", e)
             return self._generate_contextual_fallback(user_input, mood_profile)
     
     async def generate_personalized_quote(self, mood_profile: MoodProfile, 
                                         subject: str = None, user_input: str = None) -> MotivationContent:
         """Generate AI-powered personalized motivational quote"""
-        if not self.gemini_model:
+        if not self.llm:
             return self._fallback_quote(mood_profile)
         
         if user_input:
@@ -343,8 +342,7 @@ class DynamicContentGenerator:
             prompt = self._build_quote_prompt(mood_profile, subject)
         
         try:
-            response = self.gemini_model.generate_content(prompt)
-            quote_text = response.text.strip()
+            quote_text = (await self.llm.generate(prompt)).strip()
             
             # Parse the generated content
             quote, author = self._parse_generated_quote(quote_text)
@@ -360,7 +358,7 @@ class DynamicContentGenerator:
             )
             
         except Exception as e:
-            print(f"AI generation failed: {e}")
+            logger.warning("AI generation failed: %s", e)
             return self._fallback_quote(mood_profile)
     
     def _build_quote_prompt(self, mood_profile: MoodProfile, subject: str = None) -> str:
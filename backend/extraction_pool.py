@@ -0,0 +1,251 @@
+"""
+Process-Pool Document Extraction for AI Study Planner
+PDF and PPTX parsing is CPU-bound pure Python, so it runs in worker
+processes instead of on the event loop. Large PDFs are split into page
+ranges that are extracted in parallel and joined back in page order.
+
+Back-pressure: at most EXTRACTION_MAX_PENDING chunks are queued or running
+at once, slots are handed out first come, first served, and one job never
+holds more than EXTRACTION_WORKERS of them. A huge document therefore waits
+its turn chunk by chunk instead of filling the queue ahead of other uploads.
+Each job has a timeout; when it expires the job's chunks that have not
+started are cancelled (a started chunk is at most EXTRACTION_PAGES_PER_TASK
+pages).
+
+Worker processes are started with forkserver (spawn where that is not
+available), never by forking the server process, whose threads and open
+database connections a fork would copy mid-flight; workers import this
+module afresh, so everything they run lives at module level here.
+EXTRACTION_WORKERS=0 keeps extraction in a background thread instead.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional, Union
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+try:
+    import PyPDF2
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+try:
+    from pptx import Presentation
+    PPTX_AVAILABLE = True
+except ImportError:
+    PPTX_AVAILABLE = False
+
+logger = get_logger("extraction_pool")
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACTION_PAGES_PER_TASK = int(os.getenv("EXTRACTION_PAGES_PER_TASK", "20"))
+EXTRACTION_MAX_PENDING = int(os.getenv("EXTRACTION_MAX_PENDING", str(max(1, EXTRACTION_WORKERS) * 4)))
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "120"))
+_COPY_CHUNK_SIZE = 256 * 1024
+# Ends every PDF page so later stages (chunked summarization) can split by page
+PAGE_BREAK = "\f"
+
+
+class ExtractionError(Exception):
+    """Raised when a document cannot be extracted"""
+
+
+class ExtractionTimeoutError(ExtractionError, TimeoutError):
+    """Raised when a document takes longer than the job timeout"""
+
+
+# Worker functions (module level so they can be pickled into worker processes);
+# source is a file path in workers, or a seekable stream when run in-process
+
+def pdf_page_count(source: Union[str, BinaryIO]) -> int:
+    return len(PyPDF2.PdfReader(source).pages)
+
+
+def extract_pdf_pages(source: Union[str, BinaryIO], start: int = 0, stop: Optional[int] = None) -> str:
+    """Text of pages [start, stop), each followed by a line break and PAGE_BREAK"""
+    pages = PyPDF2.PdfReader(source).pages
+    stop = len(pages) if stop is None else min(stop, len(pages))
+    return "".join((pages[i].extract_text() or "") + "\n" + PAGE_BREAK for i in range(start, stop))
+
+
+def extract_pptx_text(source: Union[str, BinaryIO]) -> str:
+    parts = []
+    for slide_num, slide in enumerate(Presentation(source).slides, 1):
+        parts.append(f"\n--- Slide {slide_num} ---\n")
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                parts.append(shape.text + "\n")
+    return "".join(parts)
+
+
+class ExtractionPool:
+    """Runs extraction jobs on a shared process pool with bounded queueing"""
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS, max_pending: int = EXTRACTION_MAX_PENDING,
+                 pages_per_task: int = EXTRACTION_PAGES_PER_TASK, timeout: float = EXTRACTION_TIMEOUT):
+        self.workers = max(0, workers)
+        self.max_pending = max(1, max_pending)
+        self.pages_per_task = max(1, pages_per_task)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # asyncio.Semaphore is bound to the loop it is first used on
+        self._slots: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.jobs = 0
+        self.chunks = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.pending = 0
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_worker_context())
+            return self._executor
+
+    def _slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._slots.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_pending)
+                self._slots[loop] = semaphore
+            return semaphore
+
+    async def _submit(self, fn: Callable, *args):
+        """Run one chunk once a queue slot is free"""
+        async with self._slot():
+            self.pending += 1
+            self.chunks += 1
+            try:
+                executor = self._get_executor()
+                if executor is None:
+                    return await asyncio.to_thread(fn, *args)
+                return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            finally:
+                self.pending -= 1
+
+    async def _extract_pdf(self, path: str) -> str:
+        page_count = await self._submit(pdf_page_count, path)
+        ranges = [(start, min(start + self.pages_per_task, page_count))
+                  for start in range(0, page_count, self.pages_per_task)]
+        job_slots = asyncio.Semaphore(max(1, self.workers))
+
+        async def extract_range(start: int, stop: int) -> str:
+            async with job_slots:
+                return await self._submit(extract_pdf_pages, path, start, stop)
+
+        tasks = [asyncio.ensure_future(extract_range(start, stop)) for start, stop in ranges]
+        try:
+            parts: List[str] = await asyncio.gather(*tasks)
+        except BaseException:
+            # Timeout, failure or cancellation: drop the chunks still waiting
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return "".join(parts)
+
+    @staticmethod
+    def available(file_type: str) -> bool:
+        """Whether the parser library for file_type is installed"""
+        return PDF_AVAILABLE if file_type == 'pdf' else PPTX_AVAILABLE if file_type in ('pptx', 'ppt') else False
+
+    async def extract(self, file_type: str, source: BinaryIO) -> str:
+        """
+        Text of a PDF ('pdf') or PowerPoint ('pptx'/'ppt') file given as a
+        seekable binary stream. Raises ExtractionTimeoutError or ExtractionError.
+        """
+        if file_type == 'pdf':
+            if not PDF_AVAILABLE:
+                return "PDF processing not available"
+            job = self._extract_pdf
+        elif file_type in ('pptx', 'ppt'):
+            if not PPTX_AVAILABLE:
+                return "PowerPoint processing not available"
+            job = lambda path: self._submit(extract_pptx_text, path)
+        else:
+            raise ExtractionError(f"Unsupported file type: {file_type}")
+
+        self.jobs += 1
+        # Workers open the document by path, so spooled uploads are written out once
+        path = await asyncio.to_thread(_write_temp_file, source, f".{file_type}")
+        try:
+            text = await asyncio.wait_for(job(path), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ExtractionTimeoutError(f"Document extraction took longer than {self.timeout:g}s")
+        except ExtractionError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            raise ExtractionError(f"Error extracting {file_type.upper()} text: {e}") from e
+        finally:
+            await asyncio.to_thread(_remove_quietly, path)
+        return text.strip()
+
+    def stats(self) -> Dict:
+        """Job counters for monitoring endpoints"""
+        return {
+            "workers": self.workers,
+            "mode": "process" if self.workers else "thread",
+            "max_pending": self.max_pending,
+            "pages_per_task": self.pages_per_task,
+            "timeout_seconds": self.timeout,
+            "jobs": self.jobs,
+            "chunks": self.chunks,
+            "pending": self.pending,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _worker_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _write_temp_file(source: BinaryIO, suffix: str) -> str:
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as target:
+        shutil.copyfileobj(source, target, _COPY_CHUNK_SIZE)
+        return target.name
+
+
+def _remove_quietly(path: str):
+    try:
+        os.unlink(path)
+    except OSError as e:
+        logger.warning("[EXTRACTION] Could not remove %s: %s", path, e)
+
+
+_pool: Optional[ExtractionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Process-wide extraction pool (worker processes start on first use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool()
+        return _pool
@@ -0,0 +1,205 @@
+"""
+Persistent LLM Response Cache for AI Study Planner
+Content-addressed cache for expensive, repeatable LLM generations: an
+in-memory LRU in front of the llm_response_cache SQLite table.
+
+Entries are fresh for ``ttl`` seconds. For a further ``stale_ttl`` seconds
+they are still served immediately while one background task regenerates
+them (stale-while-revalidate); the cache holds a reference to every such
+task until it finishes. Each namespace is capped at ``max_entries`` rows of
+the table, evicting its least recently used; hits served from memory refresh
+a row's last access at most once per ``touch_interval`` seconds.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+try:
+    from backend.cache_utils import TTLCache
+    from backend.log_config import get_logger
+except ImportError:
+    from cache_utils import TTLCache
+    from log_config import get_logger
+
+logger = get_logger("llm_cache")
+
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_STALE_TTL = float(os.getenv("LLM_CACHE_STALE_TTL", str(24 * 3600)))
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_TOUCH_INTERVAL = float(os.getenv("LLM_CACHE_TOUCH_INTERVAL", "600"))
+
+
+def content_key(namespace: str, version: str, *parts: Any) -> str:
+    """
+    Stable key for a generation: the namespace, the prompt version and the
+    normalized (case/whitespace-insensitive) inputs that shape the prompt.
+    """
+    normalized = [' '.join(str(part).lower().split()) for part in parts]
+    payload = json.dumps([namespace, version, *normalized], ensure_ascii=False)
+    return f"{namespace}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def day_bucket(total_days: int) -> str:
+    """
+    Coarse study-duration bucket. Up to 10 days every length asks for its own
+    number of topics; beyond that the prompt asks for 10 topics, so nearby
+    durations can share a response.
+    """
+    if total_days <= 10:
+        return str(total_days)
+    for upper in (14, 21, 30, 60):
+        if total_days <= upper:
+            return f"<={upper}"
+    return ">60"
+
+
+class ResponseCache:
+    """
+    Memory + SQLite cache of JSON-serializable LLM results. ``pool`` is a
+    database_pool.ConnectionPool whose database has been migrated to v3+.
+    """
+
+    def __init__(self, pool, namespace: str = "llm",
+                 ttl: float = LLM_CACHE_TTL, stale_ttl: float = LLM_CACHE_STALE_TTL,
+                 memory_size: int = LLM_CACHE_MEMORY_SIZE, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 touch_interval: float = LLM_CACHE_TOUCH_INTERVAL):
+        self.pool = pool
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max(1, max_entries)
+        # Values are kept as JSON text so every hit hands out an independent copy
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl + stale_ttl, name=f"{namespace}_memory")
+        # Keys whose row last_access was written within touch_interval
+        self.touched = TTLCache(maxsize=memory_size, ttl=touch_interval, name=f"{namespace}_touched")
+        self._refreshing: Set[str] = set()
+        # Revalidation tasks; the event loop only keeps weak references to them
+        self._tasks: Set[asyncio.Task] = set()
+        self.disk_hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    # Disk layer (runs on the pool's executor threads)
+
+    def _load(self, key: str) -> Optional[Tuple[str, float]]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                'SELECT value, created_at FROM llm_response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE llm_response_cache SET last_access = ? WHERE key = ?', (time.time(), key))
+            return row[0], row[1]
+
+    def _touch(self, key: str):
+        with self.pool.connection() as conn:
+            conn.execute('UPDATE llm_response_cache SET last_access = ? WHERE key = ?', (time.time(), key))
+
+    def _store(self, key: str, value_json: str, created_at: float):
+        with self.pool.connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO llm_response_cache (key, namespace, value, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, self.namespace, value_json, created_at, created_at))
+            # Only this namespace's rows compete for its max_entries
+            evicted = conn.execute('''
+                DELETE FROM llm_response_cache WHERE key IN (
+                    SELECT key FROM llm_response_cache WHERE namespace = ?
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.namespace, self.max_entries)).rowcount
+        if evicted > 0:
+            self.evictions += evicted
+
+    # Public API
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """
+        Cached value for key, or the result of ``await compute()`` (stored when
+        not None). ``compute`` may be called again later to revalidate.
+        """
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = await self.pool.run(self._load, key)
+            if entry is not None:
+                remaining = entry[1] + self.ttl + self.stale_ttl - time.time()
+                if remaining > 0:
+                    self.disk_hits += 1
+                    self.memory.set(key, entry, ttl=remaining)
+                    self.touched.set(key, True)
+                else:
+                    entry = None
+        elif self.touched.get(key) is None:
+            # Keep hot keys from looking idle to the disk eviction
+            self.touched.set(key, True)
+            try:
+                await self.pool.run(self._touch, key)
+            except Exception as e:
+                logger.warning("[LLM CACHE] Failed to touch %s: %s", key, e)
+
+        if entry is not None:
+            value_json, created_at = entry
+            if time.time() - created_at > self.ttl:
+                self.stale_served += 1
+                self._revalidate(key, compute)
+            return json.loads(value_json)
+
+        self.misses += 1
+        value = await compute()
+        if value is not None:
+            await self._put(key, value)
+        return value
+
+    async def _put(self, key: str, value: Any):
+        value_json = json.dumps(value)
+        created_at = time.time()
+        self.memory.set(key, (value_json, created_at))
+        self.touched.set(key, True)
+        try:
+            await self.pool.run(self._store, key, value_json, created_at)
+        except Exception as e:
+            # The memory copy still serves this process
+            logger.warning("[LLM CACHE] Failed to persist %s: %s", key, e)
+
+    def _revalidate(self, key: str, compute: Callable[[], Awaitable[Optional[Any]]]):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                value = await compute()
+                if value is not None:
+                    await self._put(key, value)
+                    self.refreshes += 1
+            except Exception as e:
+                logger.warning("[LLM CACHE] Background refresh of %s failed: %s", key, e)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters for monitoring endpoints"""
+        return {
+            "namespace": self.namespace,
+            "memory": self.memory.stats(),
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stale_served": self.stale_served,
+            "refreshes": self.refreshes,
+            "disk_evictions": self.evictions,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "touch_interval_seconds": self.touched.ttl,
+        }
@@ -0,0 +1,198 @@
+"""
+Async LLM Client for AI Study Planner
+Shared, non-blocking access to Gemini for every agent. Calls are bounded by a
+process-wide concurrency limit, time out individually and are cancelled with
+the request that awaits them.
+
+Set LLM_BACKEND=fake to swap Gemini for a local fake with configurable latency
+(LLM_FAKE_LATENCY seconds), e.g. for offline load tests.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+try:
+    import google.generativeai as genai
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+logger = get_logger("llm_client")
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0.2"))
+
+
+class LLMError(Exception):
+    """Raised when an LLM call fails"""
+
+
+class LLMTimeoutError(LLMError, TimeoutError):
+    """Raised when an LLM call exceeds its timeout"""
+
+
+class GeminiBackend:
+    """google.generativeai model; uses the SDK's native async call when present"""
+
+    def __init__(self, model_name: str):
+        self.name = f"gemini:{model_name}"
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt: str) -> str:
+        if hasattr(self.model, "generate_content_async"):
+            response = await self.model.generate_content_async(prompt)
+        else:
+            response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response.text
+
+
+class FakeLLMBackend:
+    """Offline stand-in that answers each prompt shape the agents send"""
+
+    def __init__(self, model_name: str, latency: float = LLM_FAKE_LATENCY):
+        self.name = f"fake:{model_name}"
+        self.latency = latency
+
+    async def generate(self, prompt: str) -> str:
+        await asyncio.sleep(self.latency)
+        subject_match = re.search(r'for: "([^"]+)"', prompt)
+        subject = subject_match.group(1) if subject_match else "your subject"
+        count_match = re.search(r'Generate (\d+)', prompt)
+        count = int(count_match.group(1)) if count_match else 8
+        topics = [f"{subject} Skill Area {i + 1}: Worked Examples and Practice" for i in range(count)]
+
+        if "JSON array" in prompt:
+            return json.dumps(topics)
+        if '"topics"' in prompt:
+            return json.dumps({"estimated_hours": count * 3, "topics": topics})
+        if "quote" in prompt.lower():
+            return f'"Small, steady steps in {subject} add up to real mastery." - Study Mentor AI'
+        return f"Summary (offline fake backend): {prompt[:200]}"
+
+
+class _LoopLocalSemaphore:
+    """One asyncio.Semaphore per running event loop (asyncio primitives are loop-bound)"""
+
+    def __init__(self, value: int):
+        self.value = max(1, value)
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.value)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+
+# All clients share one limit: they spend the same upstream quota
+_shared_limit = _LoopLocalSemaphore(LLM_MAX_CONCURRENCY)
+
+
+class AsyncLLMClient:
+    """Bounded, timed, cancellable text generation over a backend"""
+
+    def __init__(self, backend, timeout: float = LLM_TIMEOUT,
+                 limit: Optional[_LoopLocalSemaphore] = None):
+        self.backend = backend
+        self.timeout = timeout
+        self._limit = limit or _shared_limit
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Return the model's text for prompt; raises LLMTimeoutError or LLMError.
+        The timeout covers waiting for a concurrency slot as well as the call.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(self._generate(prompt), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise LLMTimeoutError(f"{self.backend.name} did not answer within {timeout}s")
+
+    async def _generate(self, prompt: str) -> str:
+        async with self._limit.get():
+            self.calls += 1
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                return await self.backend.generate(prompt)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                raise LLMError(f"{self.backend.name} failed: {e}") from e
+            finally:
+                self.in_flight -= 1
+                self.total_seconds += time.perf_counter() - started
+
+    def stats(self) -> Dict:
+        """Call counters for monitoring endpoints"""
+        return {
+            "backend": self.backend.name,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "max_concurrency": self._limit.value,
+            "timeout_seconds": self.timeout,
+            "avg_seconds": round(self.total_seconds / self.calls, 4) if self.calls else 0.0,
+        }
+
+
+_clients: Dict[str, AsyncLLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(model_name: str) -> Optional[AsyncLLMClient]:
+    """
+    Process-wide client for a model, or None when no backend is usable
+    (google.generativeai missing or GEMINI_API_KEY unset).
+    """
+    with _clients_lock:
+        client = _clients.get(model_name)
+        if client is not None:
+            return client
+
+        if os.getenv("LLM_BACKEND", "gemini").lower() == "fake":
+            backend = FakeLLMBackend(model_name)
+        elif GENAI_AVAILABLE and os.getenv("GEMINI_API_KEY"):
+            try:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                backend = GeminiBackend(model_name)
+            except Exception as e:
+                logger.error("[LLM] Failed to initialize %s: %s", model_name, e)
+                return None
+        else:
+            return None
+
+        client = AsyncLLMClient(backend)
+        _clients[model_name] = client
+        logger.info("[LLM] Using %s backend", backend.name)
+        return client
+
+
+def llm_stats() -> Dict[str, Dict]:
+    """Stats for every client created so far"""
+    with _clients_lock:
+        return {model_name: client.stats() for model_name, client in _clients.items()}
@@ -0,0 +1,151 @@
+"""
+Structured, Non-Blocking Logging for AI Study Planner
+Module loggers hand records to a queue; a single background listener thread
+formats and writes them, so request handlers never block on stdout. The
+caller only merges the message arguments (so later changes to them cannot
+leak into the record); rendering the line and any traceback happens on the
+listener thread.
+
+Levels can be toggled per module through the environment, e.g.
+    LOG_LEVEL=INFO LOG_LEVELS="simple_agents=DEBUG,nlp_processor=INFO"
+or at runtime with set_module_level().
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Dict, Optional, Union
+
+ROOT_LOGGER_NAME = "study_planner"
+
+# Per-request hot paths stay silent unless explicitly enabled
+DEFAULT_MODULE_LEVELS = {
+    "nlp_processor": logging.WARNING,
+    "enhanced_motivation": logging.WARNING,
+}
+
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_setup_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as single-line key=value output. Anything passed through
+    ``extra=`` is appended as additional fields; a traceback or stack follows
+    on its own lines.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith("_"):
+                fields[key] = value
+
+        line = " ".join(f"{key}={self._quote(value)}" for key, value in fields.items())
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        if record.stack_info:
+            line += "\n" + self.formatStack(record.stack_info)
+        return line
+
+    @staticmethod
+    def _quote(value) -> str:
+        if isinstance(value, (int, float, bool)) or value is None:
+            return str(value)
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        return json.dumps(text, ensure_ascii=False) if (" " in text or "=" in text or not text) else text
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler.prepare formats the whole record (traceback included) on the
+    logging thread and folds it into the message; this one only merges the
+    arguments and leaves exc_info for the listener's formatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _parse_level(level: Union[str, int]) -> int:
+    if isinstance(level, int):
+        return level
+    level = level.strip()
+    if level.isdigit():
+        return int(level)
+    value = logging.getLevelName(level.upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def _parse_module_levels(spec: str) -> Dict[str, int]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            module, level = item.split("=", 1)
+            levels[module.strip()] = _parse_level(level)
+    return levels
+
+
+def setup_logging(level: Optional[Union[str, int]] = None, stream=None):
+    """Install the queue handler and start the background listener (idempotent)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(_parse_level(level or os.getenv("LOG_LEVEL", "INFO")))
+        root.propagate = False
+        root.handlers.clear()
+
+        log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(StructuredFormatter())
+        root.addHandler(_DeferredQueueHandler(log_queue))
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        module_levels = dict(DEFAULT_MODULE_LEVELS)
+        module_levels.update(_parse_module_levels(os.getenv("LOG_LEVELS", "")))
+        for module, module_level in module_levels.items():
+            set_module_level(module, module_level)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def set_module_level(module: str, level: Union[str, int]):
+    """Toggle verbosity for one module at runtime"""
+    logging.getLogger(f"{ROOT_LOGGER_NAME}.{module}").setLevel(_parse_level(level))
+
+
+def get_logger(module: str) -> logging.Logger:
+    """Logger for a backend module, e.g. get_logger("simple_agents")"""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{module}")
@@ -1,13 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, Request, status, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Annotated, List
 import asyncio
+import json
 from jose import jwt
 from jose.exceptions import JWTError
 import os
 import sys
+import time
+import hashlib
 from datetime import datetime, timedelta
 
 # Add current directory to Python path for imports
@@ -26,6 +30,25 @@ except ImportError:
     except ImportError:
         # Fallback for direct execution from backend directory
         from simple_agents import generate_schedule, find_resource, coordinator
+
+try:
+    from .cache_utils import TTLCache
+    from .log_config import get_logger
+    from .llm_client import llm_stats
+    from .upload_ingest import UPLOAD_MAX_REQUEST_BYTES, UploadTooLargeError, check_content_length, spool_upload
+except ImportError:
+    try:
+        from backend.cache_utils import TTLCache
+        from backend.log_config import get_logger
+        from backend.llm_client import llm_stats
+        from backend.upload_ingest import UPLOAD_MAX_REQUEST_BYTES, UploadTooLargeError, check_content_length, spool_upload
+    except ImportError:
+        from cache_utils import TTLCache
+        from log_config import get_logger
+        from llm_client import llm_stats
+        from upload_ingest import UPLOAD_MAX_REQUEST_BYTES, UploadTooLargeError, check_content_length, spool_upload
+
+logger = get_logger("main")
 app = FastAPI(title="AI Study Planner - Multi-Agent System", version="2.0.0")
 
 # JWT Configuration
@@ -33,6 +56,14 @@ JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-super-secret-jwt-key-change-t
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Recently verified tokens, keyed by SHA-256 digest of the bearer token.
+# Entries never outlive the token's own "exp" claim.
+verified_token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "600")),
+    name="verified_tokens"
+)
+
 # Security setup
 security = HTTPBearer(auto_error=False)
 
@@ -45,6 +76,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Refuse oversized uploads from their Content-Length, before the body is read"""
+    if request.url.path.startswith("/api/file-analysis/"):
+        try:
+            check_content_length(request.headers.get("content-length"), UPLOAD_MAX_REQUEST_BYTES)
+        except UploadTooLargeError as e:
+            return JSONResponse(status_code=413, content={"detail": str(e)})
+    return await call_next(request)
+
 # Pydantic models
 class StudyGoal(BaseModel):
     goal: str
@@ -57,6 +98,29 @@ class AdvancedStudyRequest(BaseModel):
     knowledge_level: Optional[str] = "beginner"
     user_mood: Optional[str] = "neutral"
 
+class SubjectWeight(BaseModel):
+    subject: str
+    weight: Optional[float] = 1.0
+
+class MultiSubjectStudyRequest(BaseModel):
+    subjects: List[SubjectWeight]
+    available_hours_per_day: int
+    total_days: int
+    knowledge_level: Optional[str] = "beginner"
+    rest_weekdays: Optional[List[int]] = []  # 0 = Monday ... 6 = Sunday
+    max_topic_hours_per_day: Optional[int] = None
+    start: Optional[int] = 1
+    count: Optional[int] = 30
+
+class ReplanRequest(BaseModel):
+    from_day: Optional[int] = None  # default: today's day of the plan
+    missed_days: Optional[List[int]] = []
+    completed_topics: Optional[List[str]] = []
+    available_hours_per_day: Optional[int] = None
+
+class FileQuestionRequest(BaseModel):
+    query: str
+
 class ResourceRequest(BaseModel):
     subject: str
     resource_type: Optional[str] = None
@@ -95,17 +159,32 @@ def create_access_token(data: dict):
 
 def verify_token(token: str):
     """Verify JWT token and return user data"""
+    token_digest = hashlib.sha256(token.encode()).hexdigest()
+    cached = verified_token_cache.get(token_digest)
+    if cached is not None:
+        if cached["exp"] is None or cached["exp"] > time.time():
+            return dict(cached)
+        verified_token_cache.invalidate(token_digest)
+    
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
-        return {"user_id": user_id, "exp": payload.get("exp")}
+        token_data = {"user_id": user_id, "exp": payload.get("exp")}
+        
+        # Cache until the token expires (or the cache TTL, whichever is sooner)
+        ttl = None
+        if token_data["exp"] is not None:
+            ttl = min(verified_token_cache.ttl, token_data["exp"] - time.time())
+        if ttl is None or ttl > 0:
+            verified_token_cache.set(token_digest, token_data, ttl=ttl)
+        return dict(token_data)
     except JWTError as e:
-        print(f"JWT Error: {e}")
+        logger.warning("JWT Error: %s", e)
         return None
     except Exception as e:
-        print(f"Token verification error: {e}")
+        logger.error("Token verification error: %s", e)
         return None
 
 async def get_current_user(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]):
@@ -126,7 +205,7 @@ async def get_current_user(credentials: Annotated[HTTPAuthorizationCredentials,
         )
     
     # Get user from database
-    user = coordinator.security_agent.get_user_by_id(token_data["user_id"])
+    user = await coordinator.security_agent.get_user_by_id_async(token_data["user_id"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -141,7 +220,7 @@ async def get_current_user(credentials: Annotated[HTTPAuthorizationCredentials,
 async def register_user(user_data: UserRegistration):
     """Register a new user"""
     try:
-        result = coordinator.security_agent.register_user(
+        result = await coordinator.security_agent.register_user_async(
             first_name=user_data.first_name,
             last_name=user_data.last_name,
             username=user_data.username,
@@ -163,7 +242,7 @@ async def login_user(login_data: UserLogin):
     """Authenticate user and return JWT token"""
     try:
         # Authenticate user
-        result = coordinator.security_agent.authenticate_user(
+        result = await coordinator.security_agent.authenticate_user_async(
             email=login_data.email,
             password=login_data.password
         )
@@ -198,7 +277,7 @@ async def get_available_subjects(current_user: dict = Depends(get_current_user))
         subjects = list(coordinator.schedule_agent.subjects_db.keys())
         return subjects  # Return as simple list for frontend compatibility
     except Exception as e:
-        print(f"Error getting subjects: {e}")
+        logger.error("Error getting subjects: %s", e)
         # Fallback subjects
         return [
             "Machine Learning",
@@ -218,8 +297,8 @@ async def generate_advanced_plan(
 ):
     """Generate a comprehensive study plan using the multi-agent system (PROTECTED)"""
     try:
-        print(f"[DEBUG] Generating advanced plan for user: {current_user['id']}")
-        print(f"[DEBUG] Request: {request}")
+        logger.debug("Generating advanced plan for user: %s", current_user['id'])
+        logger.debug("Request: %s", request)
         
         result = await coordinator.generate_complete_study_plan(
             user_id=current_user["id"],
@@ -231,15 +310,13 @@ async def generate_advanced_plan(
             user_mood=request.user_mood or "neutral"
         )
         
-        print(f"[DEBUG] Plan generation result: {result}")
+        logger.debug("Plan generation result: %s", result)
         
-        # Debug hours specifically
         if result["status"] == "success" and "study_plan" in result:
             plan = result["study_plan"]
-            print(f"[API DEBUG] Returning to frontend:")
-            print(f"[API DEBUG] - daily_hours: {plan.get('daily_hours')}")
-            print(f"[API DEBUG] - total_hours: {plan.get('total_hours')}")
-            print(f"[API DEBUG] - Input was: {request.available_hours_per_day}h/day * {request.total_days} days")
+            logger.debug("Plan hours: daily_hours=%s total_hours=%s (requested %sh/day * %s days)",
+                         plan.get('daily_hours'), plan.get('total_hours'),
+                         request.available_hours_per_day, request.total_days)
         
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result["message"])
@@ -249,9 +326,112 @@ async def generate_advanced_plan(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] Exception in generate_advanced_plan: {e}")
+        logger.error("Exception in generate_advanced_plan: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/generate-advanced-plan/stream")
+async def generate_advanced_plan_stream(
+    request: AdvancedStudyRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Streaming variant of /api/generate-advanced-plan (PROTECTED).
+    Responds with NDJSON: one {"event": ..., "data": ...} object per line, sent as
+    each stage finishes (subject, topics, day..., resources, motivation, done).
+    """
+    logger.debug("Streaming advanced plan for user: %s", current_user['id'])
+    
+    async def events():
+        async for event in coordinator.stream_complete_study_plan(
+            user_id=current_user["id"],
+            subject=request.subject,
+            available_hours_per_day=request.available_hours_per_day,
+            total_days=request.total_days,
+            learning_style=request.learning_style or "mixed",
+            knowledge_level=request.knowledge_level or "beginner",
+            user_mood=request.user_mood or "neutral"
+        ):
+            yield json.dumps(event) + "\n"
+    
+    # no-transform/X-Accel-Buffering keep proxies from holding lines back
+    return StreamingResponse(events(), media_type="application/x-ndjson", headers={
+        "Cache-Control": "no-cache, no-transform",
+        "X-Accel-Buffering": "no"
+    })
+
+@app.post("/api/generate-multi-subject-plan")
+async def generate_multi_subject_plan(
+    request: MultiSubjectStudyRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Schedule several weighted subjects into one plan (PROTECTED). Returns the
+    days start..start+count-1; repeat the request with next_start for more.
+    """
+    if not request.subjects:
+        raise HTTPException(status_code=400, detail="At least one subject is required")
+    
+    try:
+        result = await coordinator.generate_multi_subject_plan(
+            user_id=current_user["id"],
+            subjects=[{"subject": entry.subject, "weight": entry.weight} for entry in request.subjects],
+            available_hours_per_day=request.available_hours_per_day,
+            total_days=request.total_days,
+            knowledge_level=request.knowledge_level or "beginner",
+            rest_weekdays=tuple(request.rest_weekdays or ()),
+            max_topic_hours_per_day=request.max_topic_hours_per_day,
+            start=request.start or 1,
+            count=request.count or 30
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result["status"] == "error":
+        raise HTTPException(status_code=500, detail=result["message"])
+    return result
+
+@app.get("/api/study-plans/{plan_id}/days")
+async def get_study_plan_days(
+    plan_id: str,
+    start: int = 1,
+    count: int = 30,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Page through the days of a stored plan (PROTECTED). Days are expanded from
+    the plan's compact layout on request; count is capped server-side.
+    """
+    page = await coordinator.schedule_agent.get_plan_days_async(plan_id, current_user["id"], start, count)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Study plan not found")
+    return {"status": "success", **page}
+
+@app.post("/api/study-plans/{plan_id}/replan")
+async def replan_study_plan(
+    plan_id: str,
+    request: ReplanRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Adjust a stored plan for missed days, completed topics or new daily hours
+    (PROTECTED). Only days from from_day change; topics are reused, so this
+    never calls the AI. Returns the first page of the reflowed days.
+    """
+    try:
+        page = await coordinator.schedule_agent.replan_async(
+            plan_id, current_user["id"],
+            from_day=request.from_day,
+            missed_days=request.missed_days or [],
+            completed_topics=request.completed_topics or [],
+            daily_hours=request.available_hours_per_day
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=404, detail="Study plan not found")
+    return {"status": "success", **page}
+
 @app.post("/api/find-resources")
 async def find_resources(
     request: ResourceRequest,
@@ -259,19 +439,19 @@ async def find_resources(
 ):
     """Find educational resources for a subject (PROTECTED)"""
     try:
-        print(f"[DEBUG] Finding resources for: {request.subject}")
+        logger.debug("Finding resources for: %s", request.subject)
         
         # Process subject with NLP for coursework demonstration
         processed_subject = None
         try:
             processed_subject = coordinator.schedule_agent.process_subject_with_nlp(request.subject)
         except Exception as nlp_error:
-            print(f"[DEBUG] NLP processing failed: {nlp_error}")
+            logger.warning("NLP processing failed: %s", nlp_error)
             processed_subject = request.subject  # Fallback to original
         
         # Use processed subject for better search results
         search_subject = processed_subject if processed_subject else request.subject
-        print(f"[DEBUG] Searching with processed subject: '{search_subject}' (from '{request.subject}')")
+        logger.debug("Searching with processed subject: '%s' (from '%s')", search_subject, request.subject)
         
         resources = coordinator.resource_agent.find_best_resources(
             subject=search_subject,
@@ -280,7 +460,7 @@ async def find_resources(
             limit=request.limit or 5
         )
         
-        print(f"[DEBUG] Found {len(resources)} resources")
+        logger.debug("Found %s resources", len(resources))
         
         return {
             "resources": resources,
@@ -290,7 +470,7 @@ async def find_resources(
                              (f" (processed from '{request.subject}')" if processed_subject != request.subject else "")
         }
     except Exception as e:
-        print(f"[ERROR] Exception in find_resources: {e}")
+        logger.error("Exception in find_resources: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/get-motivation")
@@ -300,10 +480,10 @@ async def get_motivation(
 ):
     """Get motivational message based on user mood (PROTECTED) - Legacy version"""
     try:
-        print(f"[DEBUG] Getting motivation for mood: {request.mood_text}")
+        logger.debug("Getting motivation for mood: %s", request.mood_text)
         
         # Use enhanced system if available
-        motivation = coordinator.motivation_agent.get_motivation_message(
+        motivation = await coordinator.motivation_agent.get_motivation_message(
             user_input=request.mood_text,
             progress_percentage=request.progress_percentage,
             subject=request.subject,
@@ -316,7 +496,7 @@ async def get_motivation(
             "enhanced": coordinator.motivation_agent.enhanced_mode
         }
     except Exception as e:
-        print(f"[ERROR] Exception in get_motivation: {e}")
+        logger.error("Exception in get_motivation: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/enhanced-motivation")
@@ -326,9 +506,9 @@ async def get_enhanced_motivation(
 ):
     """Get AI-powered personalized motivation with ethics compliance (PROTECTED)"""
     try:
-        print(f"[DEBUG] Enhanced motivation for user: {current_user.get('username')}")
+        logger.debug("Enhanced motivation for user: %s", current_user.get('username'))
         
-        motivation_result = coordinator.motivation_agent.get_motivation_message(
+        motivation_result = await coordinator.motivation_agent.get_motivation_message(
             user_input=request.user_input,
             progress_percentage=request.progress_percentage or 0.0,
             subject=request.subject,
@@ -348,7 +528,7 @@ async def get_enhanced_motivation(
             }
         }
     except Exception as e:
-        print(f"[ERROR] Exception in enhanced motivation: {e}")
+        logger.error("Exception in enhanced motivation: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Legacy endpoint for simple plan generation (for homepage demo)
@@ -356,20 +536,20 @@ async def get_enhanced_motivation(
 async def generate_study_plan_legacy(request: StudyGoal):
     """Legacy endpoint - generates simple 3-day plan"""
     try:
-        print(f"[DEBUG] Received legacy request for goal: '{request.goal}'")
+        logger.debug("Received legacy request for goal: '%s'", request.goal)
         
         # Import here to avoid circular imports
         from simple_agents import generate_schedule, find_resource
         
         # Generate schedule using the async function
-        print("[DEBUG] Calling generate_schedule...")
+        logger.debug("Calling generate_schedule...")
         schedule_items = await generate_schedule(request.goal)
-        print(f"[DEBUG] Generated schedule items: {schedule_items}")
+        logger.debug("Generated schedule items: %s", schedule_items)
         
         # Find resource using the async function
-        print("[DEBUG] Calling find_resource...")
+        logger.debug("Calling find_resource...")
         resource_info = await find_resource(request.goal)
-        print(f"[DEBUG] Found resource: {resource_info}")
+        logger.debug("Found resource: %s", resource_info)
         
         # Ensure we return a proper response structure
         response_data = {
@@ -384,13 +564,11 @@ async def generate_study_plan_legacy(request: StudyGoal):
             }
         }
         
-        print(f"[DEBUG] Final response: {response_data}")
+        logger.debug("Final response: %s", response_data)
         return response_data
         
     except Exception as e:
-        print(f"[ERROR] Exception in generate_study_plan_legacy: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception in generate_study_plan_legacy: %s", e)
         
         # Return a structured error response instead of raising HTTPException
         return {
@@ -428,7 +606,7 @@ async def get_privacy_report(current_user: dict = Depends(get_current_user)):
             "generated_at": datetime.now().isoformat()
         }
     except Exception as e:
-        print(f"[ERROR] Privacy report generation failed: {e}")
+        logger.error("Privacy report generation failed: %s", e)
         raise HTTPException(status_code=500, detail="Privacy report generation failed")
 
 @app.post("/api/privacy/delete-data")
@@ -440,6 +618,7 @@ async def request_data_deletion(current_user: dict = Depends(get_current_user)):
         
         # Process deletion request
         deletion_report = privacy_manager.process_deletion_request(current_user.get("id"))
+        coordinator.security_agent.invalidate_user(current_user.get("id"))
         
         return {
             "status": "success",
@@ -447,9 +626,33 @@ async def request_data_deletion(current_user: dict = Depends(get_current_user)):
             "deletion_report": deletion_report
         }
     except Exception as e:
-        print(f"[ERROR] Data deletion failed: {e}")
+        logger.error("Data deletion failed: %s", e)
         raise HTTPException(status_code=500, detail="Data deletion request failed")
 
+@app.get("/api/system/cache-stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Get in-process cache, connection pool and LLM client statistics (PROTECTED)"""
+    return {
+        "status": "success",
+        "caches": {
+            "user_profiles": coordinator.security_agent.user_cache.stats(),
+            "verified_tokens": verified_token_cache.stats(),
+            "subject_normalization": coordinator.schedule_agent.subject_cache.stats(),
+            "subject_info_responses": coordinator.schedule_agent.subject_info_cache.stats(),
+            "study_plan_layouts": coordinator.schedule_agent.plan_layouts.stats(),
+            "file_analyses": coordinator.file_analysis_agent.analysis_cache.stats()
+        },
+        "passage_index": coordinator.file_analysis_agent.passage_index.stats(),
+        "batch_jobs": coordinator.file_analysis_agent.batch_jobs.stats(),
+        "plan_coalescing": coordinator.plan_flight.stats(),
+        "file_analysis_coalescing": coordinator.file_analysis_agent.analysis_flight.stats(),
+        "chunked_summaries": (coordinator.file_analysis_agent.summarizer.stats()
+                              if coordinator.file_analysis_agent.summarizer else None),
+        "db_pool": coordinator.db.pool.stats(),
+        "extraction": coordinator.file_analysis_agent.extractor.stats(),
+        "llm": llm_stats()
+    }
+
 @app.get("/api/ethics/transparency")
 async def get_ai_transparency_info():
     """Get information about AI decision-making transparency (PUBLIC)"""
@@ -501,7 +704,7 @@ async def check_upload_limit(current_user: dict = Depends(get_current_user)):
         # For now, assume all users are free tier (add premium check later)
         is_premium = False  # TODO: Check user's subscription status
         
-        limit_info = coordinator.file_analysis_agent.check_daily_upload_limit(
+        limit_info = await coordinator.file_analysis_agent.check_daily_upload_limit_async(
             user_id=current_user["id"],
             is_premium=is_premium
         )
@@ -511,7 +714,7 @@ async def check_upload_limit(current_user: dict = Depends(get_current_user)):
             "limit_info": limit_info
         }
     except Exception as e:
-        print(f"[ERROR] Check upload limit failed: {e}")
+        logger.error("Check upload limit failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/file-analysis/upload")
@@ -522,7 +725,7 @@ async def upload_and_analyze_file(
 ):
     """Upload and analyze a single file (PROTECTED)"""
     try:
-        print(f"[FILE UPLOAD] User: {current_user['id']}, File: {file.filename}, Query: {query}")
+        logger.debug("[FILE UPLOAD] User: %s, File: %s, Query: %s", current_user['id'], file.filename, query)
         
         # Check file type
         allowed_extensions = ['pdf', 'pptx', 'ppt', 'png', 'jpg', 'jpeg']
@@ -534,35 +737,49 @@ async def upload_and_analyze_file(
                 detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Check upload limit
+        # Check upload limit first: only a cached repeat can get past a spent
+        # limit (see ANALYSIS_CACHE_HITS_COUNT), and only then is the body needed
         is_premium = False  # TODO: Check user's subscription status
-        limit_info = coordinator.file_analysis_agent.check_daily_upload_limit(
+        agent = coordinator.file_analysis_agent
+        limit_info = await agent.check_daily_upload_limit_async(
             user_id=current_user["id"],
             is_premium=is_premium
         )
+        limit_reached = HTTPException(
+            status_code=429,
+            detail=f"Daily upload limit reached ({limit_info['limit']} files). Upgrade to premium for unlimited uploads."
+        )
+        if not limit_info["allowed"] and agent.analysis_cache.hits_count_toward_limit:
+            raise limit_reached
         
-        if not limit_info["allowed"]:
-            raise HTTPException(
-                status_code=429,
-                detail=f"Daily upload limit reached ({limit_info['limit']} files). Upgrade to premium for unlimited uploads."
-            )
-        
-        # Read file content
-        file_content = await file.read()
+        # Size-check and hash the upload in chunks into a copy of our own: identical
+        # uploads arriving meanwhile share this analysis, which may outlive the request
+        upload = await spool_upload(file, detach=True)
+        logger.debug("[FILE UPLOAD] %s: %s bytes, sha256 %s", upload.filename, upload.size, upload.sha256)
         
-        # Analyze file
-        result = await coordinator.file_analysis_agent.analyze_file(
-            file_content=file_content,
+        try:
+            if not limit_info["allowed"] and not await agent.is_uncounted_cache_hit(
+                    upload.sha256, file.filename, query):
+                raise limit_reached
+        except BaseException:
+            upload.close()
+            raise
+        
+        # Analyze file (it closes the copy once done with it)
+        result = await agent.analyze_file(
+            file_content=upload.stream(),
             filename=file.filename,
             user_query=query,
-            user_id=current_user["id"]
+            user_id=current_user["id"],
+            content_sha256=upload.sha256,
+            release=upload.close
         )
         
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result["message"])
         
         # Get updated limit info
-        updated_limit = coordinator.file_analysis_agent.check_daily_upload_limit(
+        updated_limit = await agent.check_daily_upload_limit_async(
             user_id=current_user["id"],
             is_premium=is_premium
         )
@@ -572,21 +789,25 @@ async def upload_and_analyze_file(
             "limit_info": updated_limit
         }
         
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] File upload failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("File upload failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/file-analysis/upload-multiple")
+@app.post("/api/file-analysis/upload-multiple", status_code=202)
 async def upload_and_analyze_multiple_files(
     files: List[UploadFile] = File(...),
     query: Optional[str] = Form(None),
     current_user: dict = Depends(get_current_user)
 ):
-    """Upload and analyze multiple files at once - PREMIUM FEATURE (PROTECTED)"""
+    """
+    Upload several files for analysis - PREMIUM FEATURE (PROTECTED). The
+    files are analyzed concurrently in a background job; poll
+    /api/file-analysis/batches/{job_id} for per-file progress and results.
+    """
     try:
         # Check if user is premium
         is_premium = False  # TODO: Check user's subscription status
@@ -597,45 +818,81 @@ async def upload_and_analyze_multiple_files(
                 detail="Multiple file upload is a premium feature. Please upgrade your plan."
             )
         
-        print(f"[MULTIPLE FILE UPLOAD] User: {current_user['id']}, Files: {len(files)}")
+        logger.debug("[MULTIPLE FILE UPLOAD] User: %s, Files: %s", current_user['id'], len(files))
         
-        results = []
+        entries = []
         allowed_extensions = ['pdf', 'pptx', 'ppt', 'png', 'jpg', 'jpeg']
         
-        for file in files:
-            file_ext = file.filename.lower().split('.')[-1]
-            
-            if file_ext not in allowed_extensions:
-                results.append({
-                    "filename": file.filename,
-                    "status": "error",
-                    "message": f"Unsupported file type: {file_ext}"
-                })
-                continue
-            
-            # Read and analyze file
-            file_content = await file.read()
-            result = await coordinator.file_analysis_agent.analyze_file(
-                file_content=file_content,
-                filename=file.filename,
-                user_query=query,
-                user_id=current_user["id"]
-            )
-            
-            results.append(result)
+        try:
+            for file in files:
+                file_ext = file.filename.lower().split('.')[-1]
+                
+                if file_ext not in allowed_extensions:
+                    entries.append((file.filename, f"Unsupported file type: {file_ext}"))
+                    continue
+                
+                # Size-check and hash in chunks into a copy the job owns (the request's files close on return)
+                try:
+                    entries.append((file.filename, await spool_upload(file, detach=True)))
+                except UploadTooLargeError as e:
+                    entries.append((file.filename, str(e)))
+        except BaseException:
+            for _, upload in entries:
+                if not isinstance(upload, str):
+                    upload.close()
+            raise
+        
+        job = coordinator.file_analysis_agent.start_batch_analysis(current_user["id"], entries, query)
         
         return {
-            "status": "success",
+            "status": "accepted",
+            "job_id": job.job_id,
             "total_files": len(files),
-            "results": results,
+            "poll_url": f"/api/file-analysis/batches/{job.job_id}",
             "is_premium": is_premium
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] Multiple file upload failed: {e}")
+        logger.error("Multiple file upload failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/file-analysis/batches/{job_id}")
+async def get_batch_analysis(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Progress and per-file results of a multiple file upload (PROTECTED)"""
+    job = coordinator.file_analysis_agent.batch_jobs.get(current_user["id"], job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found or expired")
+    return {"status": "success", **job.snapshot()}
+
+@app.post("/api/file-analysis/uploads/{upload_id}/ask")
+async def ask_about_uploaded_file(
+    upload_id: str,
+    request: FileQuestionRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Ask a follow-up question about an earlier upload without uploading it
+    again (PROTECTED). Large documents are answered from their most relevant
+    indexed passages; this is not counted as an upload.
+    """
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Question must not be empty")
+    try:
+        result = await coordinator.file_analysis_agent.ask_about_upload(
+            current_user["id"], upload_id, request.query.strip()
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except Exception as e:
+        logger.exception("File question failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if result["status"] == "error":
+        raise HTTPException(status_code=500, detail=result["message"])
+    return result
 
 @app.get("/api/file-analysis/history")
 async def get_file_analysis_history(
@@ -644,31 +901,7 @@ async def get_file_analysis_history(
 ):
     """Get user's file analysis history (PROTECTED)"""
     try:
-        import sqlite3
-        conn = sqlite3.connect(coordinator.file_analysis_agent.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, filename, file_type, upload_date, query, result
-            FROM file_uploads
-            WHERE user_id = ?
-            ORDER BY upload_date DESC
-            LIMIT ?
-        ''', (current_user["id"], limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        history = []
-        for row in rows:
-            history.append({
-                "id": row[0],
-                "filename": row[1],
-                "file_type": row[2],
-                "upload_date": row[3],
-                "query": row[4],
-                "result": row[5]
-            })
+        history = await coordinator.file_analysis_agent.get_upload_history_async(current_user["id"], limit)
         
         return {
             "status": "success",
@@ -677,7 +910,7 @@ async def get_file_analysis_history(
         }
         
     except Exception as e:
-        print(f"[ERROR] Get history failed: {e}")
+        logger.error("Get history failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/")
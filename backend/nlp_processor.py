@@ -13,9 +13,17 @@ Techniques Implemented:
 
 import re
 import string
-from typing import List, Dict, Tuple
+import logging
+from typing import List, Dict, Tuple, NamedTuple, Optional, Iterable
 from dataclasses import dataclass
 
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+logger = get_logger("nlp_processor")
+
 # Simple implementations as per course requirements
 class BasicNLPProcessor:
     """
@@ -65,7 +73,7 @@ class BasicNLPProcessor:
         Converting text to all lowercase letters using text.lower()
         """
         result = text.lower()
-        print(f"[NLP] Lowercasing: '{text}' -> '{result}'")
+        logger.debug("[NLP] Lowercasing: '%s' -> '%s'", text, result)
         return result
     
     def remove_punctuation(self, text: str) -> str:
@@ -75,7 +83,9 @@ class BasicNLPProcessor:
         """
         # Using string.punctuation and simple string methods
         result = text.translate(str.maketrans('', '', string.punctuation))
-        print(f"[NLP] Punctuation removal: Removed {len([c for c in text if c in string.punctuation])} punctuation marks")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[NLP] Punctuation removal: Removed %s punctuation marks",
+                         len([c for c in text if c in string.punctuation]))
         return result
     
     def tokenize(self, text: str) -> List[str]:
@@ -85,7 +95,7 @@ class BasicNLPProcessor:
         """
         # Simple tokenization using split()
         tokens = text.split()
-        print(f"[NLP] Tokenization: {len(tokens)} tokens created from input")
+        logger.debug("[NLP] Tokenization: %s tokens created from input", len(tokens))
         return tokens
     
     def remove_stopwords(self, tokens: List[str]) -> List[str]:
@@ -96,7 +106,7 @@ class BasicNLPProcessor:
         original_count = len(tokens)
         filtered_tokens = [token for token in tokens if token.lower() not in self.stopwords]
         removed_count = original_count - len(filtered_tokens)
-        print(f"[NLP] Stopword removal: Removed {removed_count} stopwords, kept {len(filtered_tokens)} meaningful tokens")
+        logger.debug("[NLP] Stopword removal: Removed %s stopwords, kept %s meaningful tokens", removed_count, len(filtered_tokens))
         return filtered_tokens
     
     def apply_stemming(self, tokens: List[str]) -> List[str]:
@@ -118,7 +128,7 @@ class BasicNLPProcessor:
                     break
             stemmed_tokens.append(token)
         
-        print(f"[NLP] Stemming: Applied stemming to {stemmed_count} words")
+        logger.debug("[NLP] Stemming: Applied stemming to %s words", stemmed_count)
         return stemmed_tokens
     
     def apply_lemmatization(self, tokens: List[str]) -> List[str]:
@@ -135,11 +145,11 @@ class BasicNLPProcessor:
                 lemma = self.lemma_dict[token.lower()]
                 lemmatized_tokens.append(lemma)
                 lemmatized_count += 1
-                print(f"[NLP] Lemmatization: '{token}' -> '{lemma}'")
+                logger.debug("[NLP] Lemmatization: '%s' -> '%s'", token, lemma)
             else:
                 lemmatized_tokens.append(token)
         
-        print(f"[NLP] Lemmatization: Applied to {lemmatized_count} words using dictionary lookup")
+        logger.debug("[NLP] Lemmatization: Applied to %s words using dictionary lookup", lemmatized_count)
         return lemmatized_tokens
 
 @dataclass 
@@ -155,6 +165,19 @@ class NLPProcessingResult:
     final_processed: List[str]
     techniques_applied: List[str]
 
+class LeanNLPResult(NamedTuple):
+    """Lightweight result of the lean pipeline; stages that were not requested stay None"""
+    lowercased: Optional[str] = None
+    no_punctuation: Optional[str] = None
+    tokens: Optional[List[str]] = None
+    no_stopwords: Optional[List[str]] = None
+    stemmed: Optional[List[str]] = None
+    lemmatized: Optional[List[str]] = None
+
+# Pipeline order of the lean stages (stemming and lemmatization both branch off stopwords)
+LEAN_STAGES = ("lowercase", "punctuation", "tokenize", "stopwords", "stem", "lemmatize")
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
 class EnhancedNLPProcessor:
     """
     Enhanced NLP processor that applies all techniques in sequence
@@ -169,8 +192,7 @@ class EnhancedNLPProcessor:
         """
         Apply complete NLP pipeline demonstrating all 6 techniques
         """
-        print(f"\n[NLP PIPELINE] Processing: '{text}'")
-        print("=" * 50)
+        logger.debug("[NLP PIPELINE] Processing: '%s'", text)
         
         techniques_applied = []
         
@@ -201,8 +223,7 @@ class EnhancedNLPProcessor:
         # Use lemmatized as final (generally better than stemming)
         final_processed = lemmatized
         
-        print(f"[NLP PIPELINE] Complete! Applied {len(techniques_applied)} techniques")
-        print("=" * 50)
+        logger.debug("[NLP PIPELINE] Complete! Applied %s techniques", len(techniques_applied))
         
         return NLPProcessingResult(
             original_text=text,
@@ -216,15 +237,53 @@ class EnhancedNLPProcessor:
             techniques_applied=techniques_applied
         )
     
+    def process_text_lean(self, text: str, stages: Iterable[str] = ("stopwords",)) -> LeanNLPResult:
+        """
+        Production-mode pipeline: runs only the stages needed for the requested
+        outputs, performs no logging or I/O, and returns a LeanNLPResult.
+        Stages are named as in LEAN_STAGES.
+        """
+        stages = set(stages)
+        unknown = stages.difference(LEAN_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown NLP stages: {sorted(unknown)}")
+        
+        # Everything up to the furthest shared stage has to run
+        depth = max(min(LEAN_STAGES.index(stage), 3) for stage in stages) if stages else -1
+        basic = self.basic_processor
+        
+        lowercased = text.lower()
+        no_punctuation = tokens = no_stopwords = stemmed = lemmatized = None
+        if depth >= 1:
+            no_punctuation = lowercased.translate(_PUNCTUATION_TABLE)
+        if depth >= 2:
+            tokens = no_punctuation.split()
+        if depth >= 3:
+            stopwords = basic.stopwords
+            no_stopwords = [token for token in tokens if token not in stopwords]
+        
+        if "stem" in stages:
+            stemmed = []
+            for token in no_stopwords:
+                for suffix, replacement in basic.stemming_rules:
+                    if token.endswith(suffix) and len(token) > len(suffix) + 2:
+                        token = token[:-len(suffix)] + replacement
+                        break
+                stemmed.append(token)
+        
+        if "lemmatize" in stages:
+            lemma_dict = basic.lemma_dict
+            lemmatized = [lemma_dict.get(token, token) for token in no_stopwords]
+        
+        return LeanNLPResult(lowercased, no_punctuation, tokens, no_stopwords, stemmed, lemmatized)
+    
     def process_subject_input(self, subject: str) -> str:
         """
         Clean and normalize subject input using NLP techniques
         Perfect for handling messy user input
         """
-        print(f"\n[SUBJECT PROCESSING] Cleaning subject input...")
-        
-        # Apply basic cleaning
-        result = self.process_text_full_pipeline(subject, apply_all=False)
+        # Subjects only need the cleaned, stopword-free tokens
+        result = self.process_text_lean(subject, stages=("stopwords",))
         
         # For subjects, we want to keep it readable, so just basic cleaning
         cleaned_subject = ' '.join(result.no_stopwords)
@@ -232,16 +291,13 @@ class EnhancedNLPProcessor:
         # Capitalize for display
         final_subject = ' '.join(word.capitalize() for word in cleaned_subject.split())
         
-        print(f"[SUBJECT PROCESSING] '{subject}' -> '{final_subject}'")
         return final_subject
     
     def extract_key_sentiment_words(self, text: str) -> List[str]:
         """
         Extract key words for sentiment analysis using NLP preprocessing
         """
-        print(f"\n[SENTIMENT NLP] Extracting key words for sentiment analysis...")
-        
-        result = self.process_text_full_pipeline(text)
+        result = self.process_text_lean(text, stages=("lemmatize",))
         
         # Filter for emotion/sentiment related words
         sentiment_keywords = []
@@ -252,11 +308,10 @@ class EnhancedNLPProcessor:
             'stress', 'anxious', 'calm', 'relax', 'worry', 'concern'
         }
         
-        for word in result.final_processed:
+        for word in result.lemmatized:
             if word in emotion_words:
                 sentiment_keywords.append(word)
         
-        print(f"[SENTIMENT NLP] Found {len(sentiment_keywords)} sentiment keywords: {sentiment_keywords}")
         return sentiment_keywords
     
     def get_processing_summary(self) -> Dict:
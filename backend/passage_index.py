@@ -0,0 +1,196 @@
+"""
+Document Passage Index for AI Study Planner
+Analyzed documents are cut into passages (by page or slide, see
+chunked_summary.chunk_document) and indexed in the SQLite FTS5 table
+document_passages, so a question about a document sends the LLM only its
+top-k passages by BM25 instead of the whole text.
+
+Passages are stored once per document (SHA-256 of the file bytes) and every
+search is scoped to one document; callers resolve it from the user's own
+file_uploads row, so nobody can search a document they have not uploaded. At most RETRIEVAL_MAX_DOCUMENTS
+documents are kept, evicting the least recently used. Each passage keeps its
+page/slide label, so a document's text can be rebuilt with its page breaks
+or slide markers once the analysis cache has dropped it.
+"""
+
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from backend.chunked_summary import chunk_document, span_label
+    from backend.extraction_pool import PAGE_BREAK
+    from backend.log_config import get_logger
+except ImportError:
+    from chunked_summary import chunk_document, span_label
+    from extraction_pool import PAGE_BREAK
+    from log_config import get_logger
+
+logger = get_logger("passage_index")
+
+RETRIEVAL_PASSAGE_TOKENS = int(os.getenv("RETRIEVAL_PASSAGE_TOKENS", "300"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+# Smaller documents are cheap enough to send whole
+RETRIEVAL_MIN_TOKENS = int(os.getenv("RETRIEVAL_MIN_TOKENS", "3000"))
+RETRIEVAL_MAX_DOCUMENTS = int(os.getenv("RETRIEVAL_MAX_DOCUMENTS", "2000"))
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+# chunked_summary.span_label output, e.g. "Page 3" or "Slides 4-6"
+_LABEL = re.compile(r"^(Page|Slide|Part)s? (\d+)(?:-\d+)?$")
+
+
+def match_expression(query: str) -> Optional[str]:
+    """FTS5 MATCH expression for free text: any of its words, each quoted (no FTS syntax leaks through)"""
+    words = dict.fromkeys(word for word in _WORD.findall(query.lower()) if len(word) > 1)
+    if not words:
+        return None
+    return "body : (" + " OR ".join(f'"{word}"' for word in words) + ")"
+
+
+def rebuild_document(passages: List[Tuple[str, str]]) -> str:
+    """
+    Document text from its (label, body) passages in order, with the page
+    breaks or slide markers the extractors wrote, so chunked_summary splits
+    it into the same numbered sections again. Consecutive passages of one
+    section are pieces of it cut at line breaks, so they are concatenated;
+    a passage spanning several pages or slides is kept whole under its
+    first one.
+    """
+    spans = []
+    for label, body in passages:
+        match = _LABEL.match(label or "")
+        spans.append((match.group(1), int(match.group(2))) if match else ("Part", 0))
+    unit = spans[0][0]
+
+    if unit == "Page":
+        pages: Dict[int, List[str]] = {}
+        for (_, first), (_, body) in zip(spans, passages):
+            pages.setdefault(first, []).append(body)
+        # Every page number up to the last is written (empty ones too) to keep the numbering
+        return "".join("".join(pages.get(number, [])) + "\n" + PAGE_BREAK
+                       for number in range(1, max(pages) + 1))
+    if unit == "Slide":
+        parts, previous = [], None
+        for (_, first), (_, body) in zip(spans, passages):
+            if first != previous:
+                parts.append(f"\n--- Slide {first} ---\n")
+                previous = first
+            parts.append(body)
+        return "".join(parts)
+    return "\n\n".join(body for _, body in passages)
+
+
+class PassageIndex:
+    """
+    BM25 passage search over analyzed documents. ``pool`` is a
+    database_pool.ConnectionPool whose database has been migrated to v5+;
+    without FTS5 support the index reports itself unavailable.
+    """
+
+    def __init__(self, pool, passage_tokens: int = RETRIEVAL_PASSAGE_TOKENS, top_k: int = RETRIEVAL_TOP_K,
+                 max_documents: int = RETRIEVAL_MAX_DOCUMENTS):
+        self.pool = pool
+        self.passage_tokens = max(1, passage_tokens)
+        self.top_k = max(1, top_k)
+        self.max_documents = max(1, max_documents)
+        with pool.connection() as conn:
+            self.available = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'document_passages'"
+            ).fetchone() is not None
+        if not self.available:
+            logger.warning("[PASSAGE INDEX] document_passages table missing; retrieval disabled")
+        self.documents_indexed = 0
+        self.searches = 0
+        self.evictions = 0
+
+    # Database layer (runs on the pool's executor threads)
+
+    def _add(self, sha256: str, text: str) -> bool:
+        unit, passages = chunk_document(text, self.passage_tokens)
+        now = time.time()
+        with self.pool.connection() as conn:
+            # Claiming the document row first means concurrent adds index it once
+            claimed = conn.execute('''
+                INSERT OR IGNORE INTO indexed_documents (sha256, passages, indexed_at, last_access)
+                VALUES (?, ?, ?, ?)
+            ''', (sha256, len(passages), now, now)).rowcount
+            if not claimed:
+                return False
+            conn.executemany(
+                'INSERT INTO document_passages (body, sha256, label) VALUES (?, ?, ?)',
+                [(body, sha256, span_label(unit, first, last)) for first, last, body in passages]
+            )
+
+            stale = [row[0] for row in conn.execute(
+                'SELECT sha256 FROM indexed_documents ORDER BY last_access DESC LIMIT -1 OFFSET ?',
+                (self.max_documents,)
+            )]
+            for old in stale:
+                conn.execute('DELETE FROM document_passages WHERE document_passages MATCH ?',
+                             (f'sha256 : "{old}"',))
+                conn.execute('DELETE FROM indexed_documents WHERE sha256 = ?', (old,))
+        if stale:
+            self.evictions += len(stale)
+        return True
+
+    def _search(self, expression: str, sha256: str, k: int) -> List[Dict]:
+        with self.pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT label, body, bm25(document_passages, 1.0, 0.0) AS score
+                FROM document_passages
+                WHERE document_passages MATCH ?
+                ORDER BY score LIMIT ?
+            ''', (f'sha256 : "{sha256}" AND {expression}', k)).fetchall()
+            conn.execute('UPDATE indexed_documents SET last_access = ? WHERE sha256 = ?', (time.time(), sha256))
+        return [{"label": label, "text": body, "sha256": sha256, "score": -score}
+                for label, body, score in rows]
+
+    def _document_text(self, sha256: str) -> Optional[str]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                'SELECT label, body FROM document_passages WHERE document_passages MATCH ? ORDER BY rowid',
+                (f'sha256 : "{sha256}"',)
+            ).fetchall()
+        return rebuild_document(rows) if rows else None
+
+    # Public API
+
+    async def add_document(self, sha256: str, text: str) -> bool:
+        """Index a document's passages once; True when it was newly indexed"""
+        if not self.available or not text.strip():
+            return False
+        try:
+            added = await self.pool.run(self._add, sha256, text)
+        except Exception as e:
+            logger.warning("[PASSAGE INDEX] Failed to index %s: %s", sha256, e)
+            return False
+        if added:
+            self.documents_indexed += 1
+        return added
+
+    async def search(self, query: str, sha256: str, k: Optional[int] = None) -> List[Dict]:
+        """Top passages of one document (sha256) for query by BM25, best first"""
+        expression = match_expression(query)
+        if not self.available or expression is None:
+            return []
+        self.searches += 1
+        return await self.pool.run(self._search, expression, sha256, k or self.top_k)
+
+    async def document_text(self, sha256: str) -> Optional[str]:
+        """The indexed passages of a document put back together (None when not indexed)"""
+        if not self.available:
+            return None
+        return await self.pool.run(self._document_text, sha256)
+
+    def stats(self) -> Dict:
+        """Index counters for monitoring endpoints"""
+        return {
+            "available": self.available,
+            "documents_indexed": self.documents_indexed,
+            "searches": self.searches,
+            "evictions": self.evictions,
+            "passage_tokens": self.passage_tokens,
+            "top_k": self.top_k,
+            "max_documents": self.max_documents,
+        }
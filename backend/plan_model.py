@@ -0,0 +1,297 @@
+"""
+Compact Study Plan Model for AI Study Planner
+A plan is stored as its topics plus the allocation rules (hours per day,
+total hours, number of days, start date). Any window of days can be expanded
+on demand without building the days before it, so long plans never need to
+be materialized in full.
+
+Expanded windows are columnar (DayWindow): topic ids and hours in flat
+arrays, with dates and goals rendered only when a day is converted to JSON.
+
+Re-planning (missed days, completed topics, new hours per day) appends a
+revision: from its first day on, the hours each topic still needs are laid
+out again under the new rule, while earlier days are left as they were.
+"""
+
+import json
+import sys
+from array import array
+from bisect import bisect_right
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+PLAN_FORMAT = "compact-v1"
+
+DEFAULT_TOPICS = ["Introduction", "Main Concepts", "Practice"]
+
+# Difficulty-based goal generation
+GOAL_TEMPLATES = {
+    'beginner': [
+        'Understand the basics of {}',
+        'Complete introductory exercises for {}',
+        'Learn fundamental concepts in {}',
+        'Practice basic {} skills',
+        'Review and solidify {} understanding'
+    ],
+    'intermediate': [
+        'Apply {} in practical scenarios',
+        'Build a project using {}',
+        'Implement {} techniques',
+        'Solve real-world problems with {}',
+        'Master {} best practices'
+    ],
+    'advanced': [
+        'Optimize {} for performance',
+        'Architect solutions with {}',
+        'Master advanced {} patterns',
+        'Innovate using {}',
+        'Contribute to {} at expert level'
+    ]
+}
+
+
+def _even_split(total_hours: int, count: int) -> List[int]:
+    """Whole hours per topic, summing to total_hours (largest remainder)"""
+    # Imported here: scheduler_engine imports this module for GOAL_TEMPLATES
+    try:
+        from backend.scheduler_engine import apportion
+    except ImportError:
+        from scheduler_engine import apportion
+    return apportion(total_hours, [1] * count)
+
+
+@dataclass
+class CompactPlan:
+    """
+    Topics are studied in order, topic i for ``topic_hours[i]`` hours (an even
+    whole-hour split of ``total_hours``), filling ``daily_hours`` per day. Days
+    after the last topic is finished stay in the plan with no topics.
+
+    Each entry of ``revisions`` ({"from_day", "daily_hours", "topic_hours",
+    "missed_days"}) replaces that rule from its first day: topics are studied
+    in order for ``topic_hours[i]`` hours each, ``daily_hours`` per day. Its
+    ``missed_days`` are the earlier days whose hours it already carries.
+    """
+    subject: str
+    topics: List[str]
+    total_hours: int
+    daily_hours: int
+    total_days: int
+    knowledge_level: str
+    start_date: str  # YYYY-MM-DD of day 1
+    revisions: List[Dict] = field(default_factory=list)
+    missed_days: List[int] = field(default_factory=list)
+    topic_hours: List[int] = field(default_factory=list)
+
+    def __post_init__(self):
+        # Every window refers to topics by index into this (interned) tuple
+        self.topics = tuple(sys.intern(str(topic)) for topic in self.topics or DEFAULT_TOPICS)
+        # Hours may arrive as floats (AI estimates); windows store whole hours
+        self.total_hours = int(round(self.total_hours))
+        self.daily_hours = int(round(self.daily_hours))
+        self.total_days = int(self.total_days)
+        if self.topic_hours:
+            if len(self.topic_hours) != len(self.topics):
+                raise ValueError("topic_hours must give the hours of every topic")
+            self.topic_hours = [int(round(hours)) for hours in self.topic_hours]
+        else:
+            self.topic_hours = _even_split(self.total_hours, len(self.topics))
+        for revision in self.revisions:
+            revision["daily_hours"] = int(round(revision["daily_hours"]))
+            revision["topic_hours"] = [int(round(hours)) for hours in revision["topic_hours"]]
+        self._phases = None
+
+    def _phase_index(self, day_number: int) -> int:
+        """0 for the original rule, i for revisions[i - 1]"""
+        self._phase(day_number)
+        return max(0, bisect_right([phase[0] for phase in self._phases], day_number) - 1)
+
+    def _phase(self, day_number: int) -> Tuple[int, int, List[int]]:
+        """(first day, hours per day, cumulative topic hours) of the rule in force on a day"""
+        if self._phases is None:
+            phases = [(1, self.daily_hours, list(accumulate(self.topic_hours)))]
+            for revision in self.revisions:
+                phases.append((revision["from_day"], revision["daily_hours"],
+                               list(accumulate(revision["topic_hours"]))))
+            self._phases = phases
+        phases = self._phases
+        return phases[max(0, bisect_right([phase[0] for phase in phases], day_number) - 1)]
+
+    def _segments(self, day_number: int) -> Iterator[Tuple[int, int]]:
+        """(topic index, hours) studied on a day (1-based)"""
+        # Topics form one continuous stream of hours from the phase's first day;
+        # this day covers [hour, end)
+        first_day, daily_hours, cumulative = self._phase(day_number)
+        scheduled_hours = cumulative[-1]
+        hour = min((day_number - first_day) * daily_hours, scheduled_hours)
+        end = min(hour + daily_hours, scheduled_hours)
+        while hour < end:
+            topic_index = bisect_right(cumulative, hour)
+            segment_end = min(cumulative[topic_index], end)
+            yield topic_index, segment_end - hour
+            hour = segment_end
+
+    def hours_on(self, day_number: int) -> int:
+        """Study hours budgeted for a day"""
+        return self._phase(day_number)[1]
+
+    def unscheduled_hours(self) -> int:
+        """Hours the current rule cannot fit before the plan ends"""
+        first_day, daily_hours, cumulative = self._phase(self.total_days)
+        return max(0, cumulative[-1] - max(0, self.total_days - first_day + 1) * daily_hours)
+
+    def replan(self, from_day: int, missed_days: Iterable[int] = (),
+               completed_topics: Iterable[str] = (),
+               daily_hours: Optional[int] = None) -> "CompactPlan":
+        """
+        Copy of the plan reflowed from ``from_day`` on. Days before it are
+        taken as studied unless listed in ``missed_days`` (their hours are
+        carried forward); ``completed_topics`` need no more hours. Only the
+        days from ``from_day`` change.
+        """
+        if not 1 <= from_day <= self.total_days:
+            raise ValueError(f"from_day must be between 1 and {self.total_days}")
+        missed = {day for day in self.missed_days if day < from_day}
+        missed.update(day for day in missed_days if 1 <= day < from_day)
+
+        # Hours still owed per topic under the rule in force on from_day...
+        phase_index = self._phase_index(from_day)
+        first_day, current_daily_hours, cumulative = self._phases[phase_index]
+        remaining = [total - (cumulative[i - 1] if i else 0) for i, total in enumerate(cumulative)]
+        # ...less what was studied since that rule started...
+        for day_number in range(first_day, from_day):
+            if day_number not in missed:
+                for topic_index, hours in self._segments(day_number):
+                    remaining[topic_index] -= hours
+        # ...plus earlier missed days that rule assumed were studied
+        carried = set(self.revisions[phase_index - 1].get("missed_days", ())) if phase_index else set()
+        for day_number in missed:
+            if day_number < first_day and day_number not in carried:
+                for topic_index, hours in self._segments(day_number):
+                    remaining[topic_index] += hours
+
+        for topic in completed_topics:
+            if topic not in self.topics:
+                raise ValueError(f"Unknown topic '{topic}'")
+            remaining[self.topics.index(topic)] = 0
+
+        revision = {
+            "from_day": from_day,
+            "daily_hours": current_daily_hours if daily_hours is None else max(0, int(round(daily_hours))),
+            "topic_hours": [max(0, hours) for hours in remaining],
+            "missed_days": sorted(missed),
+        }
+        values = asdict(self)
+        values["revisions"] = [r for r in self.revisions if r["from_day"] < from_day] + [revision]
+        values["missed_days"] = sorted(missed)
+        return CompactPlan(**values)
+
+    def window(self, start: int = 1, count: Optional[int] = None) -> "DayWindow":
+        """Days start..start+count-1 (clipped to the plan) in columnar form"""
+        start = max(1, start)
+        stop = self.total_days if count is None else min(self.total_days, start + count - 1)
+        return DayWindow(self, start, max(0, stop - start + 1))
+
+    def day(self, day_number: int) -> Dict:
+        """Expand one day (1-based) into the schedule day format"""
+        return self.window(day_number, 1).day(day_number)
+
+    def iter_days(self, start: int = 1, count: Optional[int] = None) -> Iterator[Dict]:
+        """Yield days start..start+count-1 (clipped to the plan)"""
+        return iter(self.window(start, count))
+
+    def days(self, start: int = 1, count: Optional[int] = None) -> List[Dict]:
+        return self.window(start, count).to_json()
+
+    def with_start_date(self, start_date: Optional[str] = None) -> "CompactPlan":
+        """Copy of the plan starting on start_date (default: today)"""
+        values = asdict(self)
+        values["start_date"] = start_date or datetime.now().strftime("%Y-%m-%d")
+        return CompactPlan(**values)
+
+    def to_json(self) -> str:
+        return json.dumps({"format": PLAN_FORMAT, **asdict(self)})
+
+    @classmethod
+    def from_json(cls, text: str) -> "CompactPlan":
+        values = json.loads(text)
+        if values.pop("format", None) != PLAN_FORMAT:
+            raise ValueError("Not a compact study plan")
+        if "topic_hours" not in values:
+            # Stored before plans kept their topic hours: every topic got
+            # total_hours // len(topics) (at least 1)
+            topics = values.get("topics") or DEFAULT_TOPICS
+            values["topic_hours"] = [max(1, int(round(values["total_hours"])) // len(topics))] * len(topics)
+        return cls(**values)
+
+
+class DayWindow:
+    """
+    A run of consecutive days of a CompactPlan. Day ``start + i`` studies
+    ``topic_ids[offsets[i]:offsets[i + 1]]`` for the matching ``hours``; day
+    dicts (dates, topic names, goals) are only built by ``day``/``to_json``.
+    """
+    __slots__ = ("plan", "start", "offsets", "topic_ids", "hours")
+
+    def __init__(self, plan: CompactPlan, start: int, count: int,
+                 columns: Optional[Tuple[array, array, array]] = None):
+        self.plan = plan
+        self.start = start
+        if columns is None:
+            offsets, topic_ids, hours = array('I', [0]), array('I'), array('I')
+            for day_number in range(start, start + count):
+                for topic_index, topic_hours in plan._segments(day_number):
+                    topic_ids.append(topic_index)
+                    hours.append(topic_hours)
+                offsets.append(len(topic_ids))
+            columns = (offsets, topic_ids, hours)
+        self.offsets, self.topic_ids, self.hours = columns
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[Dict]:
+        for day_number in range(self.start, self.start + len(self)):
+            yield self.day(day_number)
+
+    @property
+    def next_start(self) -> Optional[int]:
+        """First day after the window, or None when it reaches the end of the plan"""
+        following = self.start + len(self)
+        return following if following <= self.plan.total_days else None
+
+    def topic_hours(self, day_number: int) -> List[Tuple[str, int]]:
+        index = day_number - self.start
+        if not 0 <= index < len(self):
+            raise IndexError(f"Day {day_number} is outside this window")
+        first, last = self.offsets[index], self.offsets[index + 1]
+        topics = self.plan.topics
+        return [(topics[self.topic_ids[i]], self.hours[i]) for i in range(first, last)]
+
+    def day(self, day_number: int) -> Dict:
+        """One day (1-based, inside the window) in the schedule day format"""
+        plan = self.plan
+        goals = GOAL_TEMPLATES.get(plan.knowledge_level, GOAL_TEMPLATES['intermediate'])
+        goal = goals[(day_number - 1) % len(goals)]
+        segments = self.topic_hours(day_number)
+        day_plan = {
+            "day": day_number,
+            "date": (date.fromisoformat(plan.start_date) + timedelta(days=day_number - 1)).strftime("%Y-%m-%d"),
+            "hours": plan.hours_on(day_number),
+            "topics": [{"topic": topic, "hours": hours, "type": "study"} for topic, hours in segments],
+            "goals": [goal.format(topic) for topic, _ in segments]
+        }
+        if day_number in plan.missed_days:
+            day_plan["missed"] = True
+        return day_plan
+
+    def to_json(self) -> List[Dict]:
+        """The window as a list of day dicts (for API responses)"""
+        return list(self)
+
+    def with_start_date(self, start_date: Optional[str] = None) -> "DayWindow":
+        """Same days re-dated to start on start_date (default: today); columns are shared"""
+        return DayWindow(self.plan.with_start_date(start_date), self.start, len(self),
+                         columns=(self.offsets, self.topic_ids, self.hours))
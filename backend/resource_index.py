@@ -0,0 +1,139 @@
+"""
+Educational Resource Index for AI Study Planner
+Built once when the resources database loads. Matching resources are kept as
+integer bitmaps (bit i = i-th resource), so field matches, facet filters and
+learning-style boosts are whole-catalog bitwise operations, and only the
+top-k results are ever copied.
+"""
+
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from backend.subject_index import NGramIndex
+except ImportError:
+    from subject_index import NGramIndex
+
+# Scored fields in precedence order: a resource scores for the first field that
+# matches, even if a later field carries a higher weight
+FIELD_WEIGHTS: Tuple[Tuple[str, float], ...] = (
+    ("subject_exact", 1.0),
+    ("subject", 0.9),
+    ("title", 0.8),
+    ("keywords", 0.85),
+    ("tags", 0.75),
+    ("category", 0.7),
+)
+
+LEARNING_STYLE_TYPES: Dict[str, Tuple[str, ...]] = {
+    "visual": ('video_course', 'video_series', 'interactive_tutorial'),
+    "auditory": ('video_course', 'podcast'),
+    "reading": ('book', 'guide', 'tutorial', 'academic_paper'),
+    "kinesthetic": ('interactive_course', 'interactive_tutorial', 'mobile_app'),
+}
+LEARNING_STYLE_BOOST = 0.15
+
+
+def _iter_bits(bits: int):
+    """Yield the positions of set bits, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class _FieldPostings:
+    """Distinct lowercased values of one field -> bitmap of resources having them"""
+
+    def __init__(self):
+        self.values = NGramIndex()
+        self.bitmaps: List[int] = []
+        self._value_ids: Dict[str, int] = {}
+
+    def add(self, value: str, resource_id: int):
+        value_id = self._value_ids.get(value)
+        if value_id is None:
+            value_id = self.values.add(value)
+            self._value_ids[value] = value_id
+            self.bitmaps.append(0)
+        self.bitmaps[value_id] |= 1 << resource_id
+
+    def exact(self, query: str) -> int:
+        value_id = self._value_ids.get(query)
+        return self.bitmaps[value_id] if value_id is not None else 0
+
+    def containing(self, query: str) -> int:
+        bits = 0
+        for value_id in self.values.containing(query):
+            bits |= self.bitmaps[value_id]
+        return bits
+
+
+class ResourceIndex:
+    """Field postings plus resource_type / difficulty / learning-style facets"""
+
+    def __init__(self, resources: List[Dict]):
+        self.resources = resources
+        self._fields = {name: _FieldPostings() for name in ("subject", "title", "keywords", "tags", "category")}
+        self._resource_types: Dict[str, int] = defaultdict(int)
+        self._difficulties: Dict[str, int] = defaultdict(int)
+        self._learning_styles: Dict[str, int] = defaultdict(int)
+
+        for resource_id, resource in enumerate(resources):
+            bit = 1 << resource_id
+            for name in ("subject", "title", "category"):
+                self._fields[name].add((resource.get(name) or '').lower(), resource_id)
+            for name in ("keywords", "tags"):
+                for value in resource.get(name) or []:
+                    self._fields[name].add(value.lower(), resource_id)
+
+            self._resource_types[resource.get('resource_type')] |= bit
+            self._difficulties[resource.get('difficulty')] |= bit
+            resource_type = (resource.get('resource_type') or '').lower()
+            for style, types in LEARNING_STYLE_TYPES.items():
+                if resource_type in types:
+                    self._learning_styles[style] |= bit
+
+    def search(self, subject: str, difficulty: str = "beginner", resource_type: Optional[str] = None,
+               limit: int = 3, learning_style: str = "mixed") -> List[Dict]:
+        """
+        Top ``limit`` resources as copies carrying ``similarity_score``. Equal
+        scores keep catalog order.
+        """
+        if limit <= 0 or not self.resources:
+            return []
+        subject_lower = subject.lower()
+
+        # Facets first, so field matching only has to keep what survives them
+        allowed = (1 << len(self.resources)) - 1
+        if resource_type is not None:
+            allowed &= self._resource_types.get(resource_type, 0)
+        if difficulty != "beginner":
+            allowed &= self._difficulties.get(difficulty, 0)
+        if not allowed:
+            return []
+
+        boosted = self._learning_styles.get(learning_style, 0) if learning_style != "mixed" else 0
+        candidates: List[Tuple[float, int]] = []
+        remaining = allowed
+        for field, weight in FIELD_WEIGHTS:
+            if not remaining:
+                break
+            if field == "subject_exact":
+                hits = self._fields["subject"].exact(subject_lower)
+            else:
+                hits = self._fields[field].containing(subject_lower)
+            hits &= remaining
+            remaining &= ~hits
+            for resource_id in _iter_bits(hits):
+                score = weight + LEARNING_STYLE_BOOST if boosted >> resource_id & 1 else weight
+                candidates.append((min(score, 1.0), resource_id))
+
+        top = heapq.nsmallest(limit, candidates, key=lambda item: (-item[0], item[1]))
+        results = []
+        for score, resource_id in top:
+            resource_copy = self.resources[resource_id].copy()
+            resource_copy['similarity_score'] = score
+            results.append(resource_copy)
+        return results
@@ -0,0 +1,353 @@
+"""
+Time-Allocation Scheduler Engine for AI Study Planner
+Packs one or more subjects, each a list of weighted topics, into per-day hour
+budgets. Two steps:
+
+1. Apportionment - the hours available (or requested) are split between
+   subjects and then topics in proportion to their weights with the
+   largest-remainder method, so every hour is handed out (no floor() loss);
+   no subject gets more hours than it asks for.
+2. Placement - days are filled in order, one hour at a time, from the topics
+   whose prerequisites are complete, respecting rest days and the per-topic
+   daily cap. The next hour goes to the ready topic with the longest
+   remaining critical path (in days, at its cap).
+
+Without prerequisites and with one cap for every topic this is the
+longest-remaining-first rule, which places as many hours as any schedule can
+(a max-flow/transportation optimum) and finishes as early as possible; with
+prerequisites it is a critical-path list-scheduling heuristic. Both run in
+O(hours * log topics), a few milliseconds for a year-long plan.
+"""
+
+import heapq
+from array import array
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from backend.plan_model import GOAL_TEMPLATES
+except ImportError:
+    from plan_model import GOAL_TEMPLATES
+
+
+class ScheduleError(ValueError):
+    """Raised for inconsistent scheduling input (unknown or cyclic prerequisites)"""
+
+
+@dataclass
+class TopicSpec:
+    """A topic; ``prerequisites`` name topics of the same subject"""
+    name: str
+    weight: float = 1.0
+    prerequisites: Tuple[str, ...] = ()
+
+    def __post_init__(self):
+        self.weight = float(self.weight)
+        if self.weight < 0:
+            raise ScheduleError(f"Topic '{self.name}' has a negative weight")
+
+
+@dataclass
+class SubjectSpec:
+    """
+    A subject to schedule. ``hours`` is its demand (None: as much as the
+    weights allow). With ``sequential`` each topic depends on the previous one.
+    """
+    name: str
+    topics: List[TopicSpec]
+    weight: float = 1.0
+    hours: Optional[int] = None
+    sequential: bool = True
+
+    def __post_init__(self):
+        # Hour estimates may be floats; the engine hands out whole hours
+        if self.hours is not None:
+            self.hours = int(round(self.hours))
+        self.weight = float(self.weight)
+        if self.weight < 0:
+            raise ScheduleError(f"Subject '{self.name}' has a negative weight")
+
+
+@dataclass
+class ScheduleConstraints:
+    daily_hours: int
+    total_days: int
+    start_date: str  # YYYY-MM-DD of day 1
+    rest_weekdays: Tuple[int, ...] = ()  # 0 = Monday ... 6 = Sunday
+    rest_days: Tuple[int, ...] = ()  # 1-based day numbers
+    max_topic_hours_per_day: Optional[int] = None
+    knowledge_level: str = "intermediate"
+
+    def __post_init__(self):
+        self.daily_hours = int(round(self.daily_hours))
+        self.total_days = int(self.total_days)
+        if self.max_topic_hours_per_day is not None:
+            self.max_topic_hours_per_day = int(round(self.max_topic_hours_per_day))
+
+    def day_budgets(self) -> List[int]:
+        start = date.fromisoformat(self.start_date)
+        rest_weekdays = set(self.rest_weekdays)
+        rest_days = set(self.rest_days)
+        return [
+            0 if day in rest_days or (start + timedelta(days=day - 1)).weekday() in rest_weekdays
+            else max(0, self.daily_hours)
+            for day in range(1, self.total_days + 1)
+        ]
+
+
+def apportion(total: int, weights: Sequence[float], minimum: int = 0) -> List[int]:
+    """
+    Split ``total`` whole hours in proportion to weights (largest remainder);
+    the result always sums to ``total``. Each share gets at least ``minimum``
+    when the total allows it.
+    """
+    count = len(weights)
+    total = int(round(total))
+    if count == 0 or total <= 0:
+        return [0] * count
+    floor = minimum if minimum * count <= total else 0
+    remaining = total - floor * count
+    weights = [max(0.0, float(weight)) for weight in weights]
+    weight_sum = sum(weights) or float(count)
+    if not any(weights):
+        weights = [1.0] * count
+
+    quotas = [remaining * weight / weight_sum for weight in weights]
+    shares = [int(quota) for quota in quotas]
+    leftover = remaining - sum(shares)
+    # Ties go to the earlier entry so the split is deterministic
+    by_remainder = sorted(range(count), key=lambda i: (shares[i] - quotas[i], i))
+    for i in by_remainder[:leftover]:
+        shares[i] += 1
+    return [floor + share for share in shares]
+
+
+@dataclass
+class _Topic:
+    subject_index: int
+    name: str
+    hours: int
+    cap: int
+    prerequisites: List[int] = field(default_factory=list)
+    dependents: List[int] = field(default_factory=list)
+    tail_days: float = 0.0  # critical path after this topic, in days at cap
+
+
+class EngineSchedule:
+    """
+    Placement result in columnar form: day ``d`` studies
+    ``topic_ids[offsets[d-1]:offsets[d]]`` for the matching ``hours``.
+    """
+    __slots__ = ("subjects", "topic_names", "topic_subjects", "budgets", "constraints",
+                 "offsets", "topic_ids", "hours", "allocated", "placed")
+
+    def __init__(self, subjects: List[str], topics: List[_Topic], budgets: List[int],
+                 constraints: ScheduleConstraints):
+        self.subjects = subjects
+        self.topic_names = tuple(topic.name for topic in topics)
+        self.topic_subjects = array('I', (topic.subject_index for topic in topics))
+        self.budgets = array('I', budgets)
+        self.constraints = constraints
+        self.offsets = array('I', [0])
+        self.topic_ids = array('I')
+        self.hours = array('I')
+        self.allocated = array('I', (topic.hours for topic in topics))
+        self.placed = array('I', [0] * len(topics))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def unscheduled_hours(self) -> int:
+        return sum(self.allocated) - sum(self.placed)
+
+    @property
+    def finish_day(self) -> int:
+        """Last day with any study (0 when nothing was placed)"""
+        for day in range(len(self), 0, -1):
+            if self.offsets[day] > self.offsets[day - 1]:
+                return day
+        return 0
+
+    def day(self, day_number: int) -> Dict:
+        """One day (1-based) in the schedule day format, plus subject and rest flags"""
+        first, last = self.offsets[day_number - 1], self.offsets[day_number]
+        goals = GOAL_TEMPLATES.get(self.constraints.knowledge_level, GOAL_TEMPLATES['intermediate'])
+        goal = goals[(day_number - 1) % len(goals)]
+        segments = [(self.topic_ids[i], self.hours[i]) for i in range(first, last)]
+        return {
+            "day": day_number,
+            "date": (date.fromisoformat(self.constraints.start_date)
+                     + timedelta(days=day_number - 1)).strftime("%Y-%m-%d"),
+            "hours": self.budgets[day_number - 1],
+            "rest": self.budgets[day_number - 1] == 0,
+            "topics": [{
+                "topic": self.topic_names[topic_id],
+                "subject": self.subjects[self.topic_subjects[topic_id]],
+                "hours": hours,
+                "type": "study"
+            } for topic_id, hours in segments],
+            "goals": [goal.format(self.topic_names[topic_id]) for topic_id, _ in segments]
+        }
+
+    def days(self, start: int = 1, count: Optional[int] = None) -> List[Dict]:
+        start = max(1, start)
+        stop = len(self) if count is None else min(len(self), start + count - 1)
+        return [self.day(day_number) for day_number in range(start, stop + 1)]
+
+    def summary(self) -> Dict:
+        per_subject = {name: {"allocated_hours": 0, "scheduled_hours": 0} for name in self.subjects}
+        for topic_id, subject_index in enumerate(self.topic_subjects):
+            entry = per_subject[self.subjects[subject_index]]
+            entry["allocated_hours"] += self.allocated[topic_id]
+            entry["scheduled_hours"] += self.placed[topic_id]
+        return {
+            "subject_hours": per_subject,
+            "capacity_hours": sum(self.budgets),
+            "scheduled_hours": sum(self.placed),
+            "unscheduled_hours": self.unscheduled_hours,
+            "rest_days": sum(1 for budget in self.budgets if budget == 0),
+            "finish_day": self.finish_day,
+        }
+
+
+def _build_topics(subjects: Sequence[SubjectSpec], capacity: int,
+                  cap: Optional[int]) -> List[_Topic]:
+    # Open-ended subjects want everything that is left
+    demands = [capacity if subject.hours is None else max(0, subject.hours) for subject in subjects]
+    subject_hours = _share_capacity(capacity, demands, [subject.weight for subject in subjects])
+
+    topics: List[_Topic] = []
+    for subject_index, (subject, hours) in enumerate(zip(subjects, subject_hours)):
+        first = len(topics)
+        names = [topic.name for topic in subject.topics]
+        if len(set(names)) != len(names):
+            raise ScheduleError(f"Duplicate topic names in subject '{subject.name}'")
+        ids = {name: first + i for i, name in enumerate(names)}
+        shares = apportion(hours, [topic.weight for topic in subject.topics], minimum=1)
+        for i, (spec, share) in enumerate(zip(subject.topics, shares)):
+            topic = _Topic(subject_index, spec.name, share, cap or share or 1)
+            for prerequisite in spec.prerequisites:
+                if prerequisite not in ids:
+                    raise ScheduleError(f"'{spec.name}' requires unknown topic '{prerequisite}'")
+                topic.prerequisites.append(ids[prerequisite])
+            if subject.sequential and i > 0:
+                topic.prerequisites.append(first + i - 1)
+            topics.append(topic)
+
+    for topic_id, topic in enumerate(topics):
+        for prerequisite in set(topic.prerequisites):
+            topics[prerequisite].dependents.append(topic_id)
+    _compute_tails(topics)
+    return topics
+
+
+def _share_capacity(capacity: int, demands: List[int], weights: List[float]) -> List[int]:
+    """
+    Weighted water-filling: capacity is apportioned by weight, no subject gets
+    more than its demand, and what a satisfied subject leaves is shared again
+    among the others (zero-weight subjects only get hours nobody else wants).
+    """
+    hours = [0] * len(demands)
+    active = [i for i, demand in enumerate(demands) if demand > 0]
+    remaining = capacity
+    while remaining > 0 and active:
+        shares = apportion(remaining, [weights[i] for i in active])
+        still_active = []
+        for i, share in zip(active, shares):
+            granted = min(share, demands[i] - hours[i])
+            hours[i] += granted
+            remaining -= granted
+            if hours[i] < demands[i]:
+                still_active.append(i)
+        if len(still_active) == len(active):
+            break  # nobody was capped, so every share was granted
+        active = still_active
+    return hours
+
+
+def _compute_tails(topics: List[_Topic]):
+    """Longest dependent chain after each topic (raises on cycles)"""
+    indegree = [len(set(topic.prerequisites)) for topic in topics]
+    order = [topic_id for topic_id, degree in enumerate(indegree) if degree == 0]
+    for topic_id in order:  # grows while iterating (Kahn's algorithm)
+        for dependent in topics[topic_id].dependents:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                order.append(dependent)
+    if len(order) != len(topics):
+        raise ScheduleError("Topic prerequisites form a cycle")
+    for topic_id in reversed(order):
+        topic = topics[topic_id]
+        topic.tail_days = max(
+            (topics[d].hours / topics[d].cap + topics[d].tail_days for d in topic.dependents),
+            default=0.0
+        )
+
+
+def build_schedule(subjects: Sequence[SubjectSpec],
+                   constraints: ScheduleConstraints) -> EngineSchedule:
+    """Apportion hours to topics and place them on days (see module docstring)"""
+    budgets = constraints.day_budgets()
+    topics = _build_topics(subjects, sum(budgets), constraints.max_topic_hours_per_day)
+    schedule = EngineSchedule([subject.name for subject in subjects], topics, budgets, constraints)
+
+    remaining = [topic.hours for topic in topics]
+    waiting = [len(set(topic.prerequisites)) for topic in topics]
+
+    def priority(topic_id: int) -> Tuple[float, int, int]:
+        topic = topics[topic_id]
+        return (-(remaining[topic_id] / topic.cap + topic.tail_days), -remaining[topic_id], topic_id)
+
+    def complete(topic_id: int, ready: List):
+        # Zero-hour dependents finish at once; a stack (not recursion) keeps
+        # long chains of them from hitting the recursion limit
+        finished = [topic_id]
+        while finished:
+            for dependent in topics[finished.pop()].dependents:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    if remaining[dependent] > 0:
+                        heapq.heappush(ready, (priority(dependent), dependent))
+                    else:
+                        finished.append(dependent)
+
+    ready: List = []
+    # Collected first: completing a zero-hour topic below may release (and push) others
+    initially_ready = [topic_id for topic_id in range(len(topics)) if waiting[topic_id] == 0]
+    for topic_id in initially_ready:
+        if remaining[topic_id] > 0:
+            heapq.heappush(ready, (priority(topic_id), topic_id))
+        else:
+            complete(topic_id, ready)
+
+    for budget in budgets:
+        today: Dict[int, int] = {}  # topic id -> hours, in first-studied order
+        capped = []  # topics at their daily cap, ready again tomorrow
+        while budget > 0 and ready:
+            _, topic_id = heapq.heappop(ready)
+            today[topic_id] = today.get(topic_id, 0) + 1
+            remaining[topic_id] -= 1
+            budget -= 1
+            if remaining[topic_id] == 0:
+                complete(topic_id, ready)
+            elif today[topic_id] >= topics[topic_id].cap:
+                capped.append(topic_id)
+            else:
+                heapq.heappush(ready, (priority(topic_id), topic_id))
+        for topic_id in capped:
+            heapq.heappush(ready, (priority(topic_id), topic_id))
+
+        for topic_id, hours in today.items():
+            schedule.topic_ids.append(topic_id)
+            schedule.hours.append(hours)
+            schedule.placed[topic_id] += hours
+        schedule.offsets.append(len(schedule.topic_ids))
+
+    return schedule
+
+
+def topic_specs(names: Iterable[str]) -> List[TopicSpec]:
+    """Equal-weight topics from plain names (e.g. resolved subject info)"""
+    return [TopicSpec(str(name)) for name in names]
@@ -7,12 +7,23 @@ import os
 import json
 import sqlite3
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Awaitable, BinaryIO, Callable, Iterator, Optional, Tuple, Union
 import asyncio
 from dataclasses import dataclass
+import copy
 import hashlib
 import io
 import base64
+import logging
+import uuid
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+logger = get_logger("simple_agents")
+
 # Try to import intelligent topics generator
 try:
     from intelligent_topics import IntelligentTopicGenerator
@@ -34,7 +45,42 @@ except ImportError:
         NLP_AVAILABLE = True
     except ImportError:
         NLP_AVAILABLE = False
-        print("[WARNING] NLP processor not available - coursework features disabled")
+        logger.warning("NLP processor not available - coursework features disabled")
+
+try:
+    from backend.database_pool import get_pool
+    from backend.db_migrations import apply_migrations
+    from backend.cache_utils import TTLCache
+    from backend.subject_index import SubjectIndex
+    from backend.resource_index import ResourceIndex
+    from backend.llm_client import get_llm_client
+    from backend.llm_cache import ResponseCache, content_key, day_bucket
+    from backend.singleflight import SingleFlight
+    from backend.stage_graph import Stage, StageGraph
+    from backend.plan_model import CompactPlan, DayWindow
+    from backend.scheduler_engine import ScheduleConstraints, SubjectSpec, build_schedule, topic_specs
+    from backend.extraction_pool import extract_pdf_pages, extract_pptx_text, get_extraction_pool
+    from backend.analysis_cache import AnalysisCache, file_sha256
+    from backend.chunked_summary import ChunkedSummarizer, estimate_tokens
+    from backend.passage_index import RETRIEVAL_MIN_TOKENS, PassageIndex
+    from backend.batch_jobs import BatchFile, BatchJob, BatchJobRunner
+except ImportError:
+    from database_pool import get_pool
+    from db_migrations import apply_migrations
+    from cache_utils import TTLCache
+    from subject_index import SubjectIndex
+    from resource_index import ResourceIndex
+    from llm_client import get_llm_client
+    from llm_cache import ResponseCache, content_key, day_bucket
+    from singleflight import SingleFlight
+    from stage_graph import Stage, StageGraph
+    from plan_model import CompactPlan, DayWindow
+    from scheduler_engine import ScheduleConstraints, SubjectSpec, build_schedule, topic_specs
+    from extraction_pool import extract_pdf_pages, extract_pptx_text, get_extraction_pool
+    from analysis_cache import AnalysisCache, file_sha256
+    from chunked_summary import ChunkedSummarizer, estimate_tokens
+    from passage_index import RETRIEVAL_MIN_TOKENS, PassageIndex
+    from batch_jobs import BatchFile, BatchJob, BatchJobRunner
 
 # Try to import optional libraries, fall back to basic functionality if not available
 try:
@@ -77,7 +123,7 @@ class StudyPlan:
     daily_hours: int
     difficulty: str
     start_date: str
-    schedule: List[Dict]
+    schedule: DayWindow  # Columnar days; schedule.plan expands any other window
     resources: List[Dict]
     original_subject: str = None  # For NLP demonstration
     nlp_feedback: str = None  # For NLP demonstration
@@ -97,104 +143,38 @@ class DatabaseManager:
     
     def __init__(self, db_path: str = "study_planner.db"):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
         self.init_database()
     
+    def connection(self):
+        """Check out a pooled connection (commits when the block exits cleanly)"""
+        return self.pool.connection()
+    
+    async def run(self, fn, *args, **kwargs):
+        """Await blocking database code on the dedicated DB executor"""
+        return await self.pool.run(fn, *args, **kwargs)
+    
     def init_database(self):
-        """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if users table exists and migrate if needed
-        cursor.execute("PRAGMA table_info(users)")
-        columns_info = cursor.fetchall()
-        existing_columns = [row[1] for row in columns_info]
-        
-        # Migrate existing table if it doesn't have the new columns
-        if existing_columns and 'first_name' not in existing_columns:
-            print("Migrating database: Adding first_name and last_name columns...")
-            try:
-                cursor.execute('ALTER TABLE users ADD COLUMN first_name TEXT')
-                cursor.execute('ALTER TABLE users ADD COLUMN last_name TEXT')
-                
-                # Update existing records with placeholder values
-                cursor.execute('''
-                    UPDATE users 
-                    SET first_name = 'User',
-                        last_name = username
-                    WHERE first_name IS NULL OR last_name IS NULL
-                ''')
-                conn.commit()
-                print("Migration completed successfully!")
-            except sqlite3.OperationalError as e:
-                print(f"Migration error (might be already migrated): {e}")
-        
-        # Users table - create if not exists
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                hashed_password TEXT NOT NULL,
-                created_at TEXT
-            )
-        ''')
-        
-        # Study plans table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS study_plans (
-                id TEXT PRIMARY KEY,
-                user_id TEXT,
-                subject TEXT,
-                total_hours INTEGER,
-                daily_hours INTEGER,
-                difficulty TEXT,
-                start_date TEXT,
-                schedule TEXT,
-                resources TEXT,
-                created_at TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # User progress table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_progress (
-                id TEXT PRIMARY KEY,
-                user_id TEXT,
-                plan_id TEXT,
-                completed_hours INTEGER,
-                current_topic TEXT,
-                progress_percentage REAL,
-                last_activity TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # File uploads tracking table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS file_uploads (
-                id TEXT PRIMARY KEY,
-                user_id TEXT,
-                filename TEXT,
-                file_type TEXT,
-                upload_date TEXT,
-                query TEXT,
-                result TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Initialize database tables by applying pending schema migrations"""
+        with self.connection() as conn:
+            apply_migrations(conn)
 
 class SecurityAgent:
     """Handles authentication, authorization, and data security"""
     
-    def __init__(self):
+    def __init__(self, db: Optional[DatabaseManager] = None):
         self.secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key")
-        self.db = DatabaseManager()
+        self.db = db or DatabaseManager()
+        # Profiles of recently authenticated users, keyed by user id
+        self.user_cache = TTLCache(
+            maxsize=int(os.getenv("USER_CACHE_SIZE", "2048")),
+            ttl=float(os.getenv("USER_CACHE_TTL", "300")),
+            name="user_profiles"
+        )
+    
+    def invalidate_user(self, user_id: str):
+        """Drop a cached profile after the user's record changes or is deleted"""
+        self.user_cache.invalidate(user_id)
     
     def hash_password(self, password: str) -> str:
         """Simple hash function - in production use bcrypt"""
@@ -210,16 +190,12 @@ class SecurityAgent:
             user_id = hashlib.md5(email.encode()).hexdigest()
             hashed_password = self.hash_password(password)
             
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO users (id, first_name, last_name, username, email, hashed_password, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, first_name, last_name, username, email, hashed_password, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+            self.invalidate_user(user_id)
+            with self.db.connection() as conn:
+                conn.execute('''
+                    INSERT INTO users (id, first_name, last_name, username, email, hashed_password, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (user_id, first_name, last_name, username, email, hashed_password, datetime.now().isoformat()))
             
             return {"status": "success", "user_id": user_id, "message": "User registered successfully"}
         except Exception as e:
@@ -228,16 +204,11 @@ class SecurityAgent:
     def authenticate_user(self, email: str, password: str) -> Dict:
         """Authenticate user login"""
         try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, first_name, last_name, username, email, hashed_password
-                FROM users WHERE email = ?
-            ''', (email,))
-            
-            user_data = cursor.fetchone()
-            conn.close()
+            with self.db.connection() as conn:
+                user_data = conn.execute('''
+                    SELECT id, first_name, last_name, username, email, hashed_password
+                    FROM users WHERE email = ?
+                ''', (email,)).fetchone()
             
             if not user_data:
                 return {"status": "error", "message": "User not found"}
@@ -264,21 +235,23 @@ class SecurityAgent:
     
     def get_user_by_id(self, user_id: str) -> Optional[Dict]:
         """Get user information by ID"""
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+        return self._load_user(user_id)
+    
+    def _load_user(self, user_id: str) -> Optional[Dict]:
+        """Read a profile from the database (bypassing the cache) and cache it"""
         try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, first_name, last_name, username, email, created_at
-                FROM users WHERE id = ?
-            ''', (user_id,))
-            
-            user_data = cursor.fetchone()
-            conn.close()
+            with self.db.connection() as conn:
+                user_data = conn.execute('''
+                    SELECT id, first_name, last_name, username, email, created_at
+                    FROM users WHERE id = ?
+                ''', (user_id,)).fetchone()
             
             if user_data:
                 user_id, first_name, last_name, username, email, created_at = user_data
-                return {
+                user = {
                     "id": user_id,
                     "first_name": first_name,
                     "last_name": last_name,
@@ -286,37 +259,66 @@ class SecurityAgent:
                     "email": email,
                     "created_at": created_at
                 }
+                self.user_cache.set(user_id, user)
+                return dict(user)
             return None
             
         except Exception as e:
             return None
+    
+    async def register_user_async(self, first_name: str, last_name: str, username: str, email: str, password: str) -> Dict:
+        """Async version of register_user for FastAPI handlers"""
+        return await self.db.run(self.register_user, first_name, last_name, username, email, password)
+    
+    async def authenticate_user_async(self, email: str, password: str) -> Dict:
+        """Async version of authenticate_user for FastAPI handlers"""
+        return await self.db.run(self.authenticate_user, email, password)
+    
+    async def get_user_by_id_async(self, user_id: str) -> Optional[Dict]:
+        """Async version of get_user_by_id for FastAPI handlers"""
+        # Serve cache hits on the event loop without an executor round-trip
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+        return await self.db.run(self._load_user, user_id)
+
+# Days expanded into a plan response; the rest are fetched a page at a time
+PLAN_INLINE_DAYS = int(os.getenv("PLAN_INLINE_DAYS", "30"))
+PLAN_PAGE_MAX_DAYS = int(os.getenv("PLAN_PAGE_MAX_DAYS", "90"))
 
 class ScheduleCreatorAgent:
     """Enhanced schedule creator with personalization and datasets"""
     
-    def __init__(self):
-        self.genai_initialized = False
-        if GENAI_AVAILABLE:
-            api_key = os.getenv("GEMINI_API_KEY")
-            print(f"[GEMINI DEBUG] API Available: {GENAI_AVAILABLE}")
-            print(f"[GEMINI DEBUG] API Key exists: {bool(api_key)}")
-            print(f"[GEMINI DEBUG] API Key length: {len(api_key) if api_key else 0}")
-            if api_key:
-                try:
-                    genai.configure(api_key=api_key)
-                    # Use the stable Gemini model
-                    self.model = genai.GenerativeModel('gemini-pro')
-                    self.genai_initialized = True
-                    print("[GEMINI DEBUG] ✅ Gemini API initialized successfully with gemini-pro!")
-                except Exception as e:
-                    print(f"[GEMINI DEBUG] ❌ Failed to initialize Gemini: {e}")
-                    self.genai_initialized = False
-            else:
-                print("[GEMINI DEBUG] ❌ No API key found in environment")
+    # Bump whenever the curriculum prompt changes so cached responses are not reused
+    SUBJECT_INFO_PROMPT_VERSION = "1"
+    
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or DatabaseManager()
+        # Curriculum responses keyed on (subject, level, day bucket, prompt version)
+        self.subject_info_cache = ResponseCache(self.db.pool, namespace="subject_info")
+        # Shared async Gemini client (None when no API key / library)
+        self.llm = get_llm_client('gemini-pro')
+        self.genai_initialized = self.llm is not None
+        if self.genai_initialized:
+            logger.info("[GEMINI DEBUG] ✅ LLM client ready: %s", self.llm.backend.name)
+        elif not GENAI_AVAILABLE:
+            logger.warning("[GEMINI DEBUG] ❌ google.generativeai library not available")
         else:
-            print("[GEMINI DEBUG] ❌ google.generativeai library not available")
+            logger.warning("[GEMINI DEBUG] ❌ No API key found in environment")
         
+        # Raw subject string -> canonical subject; cleared whenever the catalog reloads
+        self.subject_cache = TTLCache(
+            maxsize=int(os.getenv("SUBJECT_CACHE_SIZE", "1024")),
+            ttl=None,
+            name="subject_normalization"
+        )
         self.load_subjects_database()
+        # Stored plan layouts, so paging through days skips the database
+        self.plan_layouts = TTLCache(
+            maxsize=int(os.getenv("PLAN_LAYOUT_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("PLAN_LAYOUT_CACHE_TTL", "1800")),
+            name="study_plan_layouts"
+        )
         # Initialize the intelligent topic generator
         if INTELLIGENT_TOPICS_AVAILABLE:
             self.topic_generator = IntelligentTopicGenerator()
@@ -331,33 +333,42 @@ class ScheduleCreatorAgent:
         if not NLP_AVAILABLE:
             return raw_subject.strip().title()
         
-        print(f"\n[COURSEWORK] Applying NLP techniques to subject input...")
-        print(f"[COURSEWORK] Raw input: '{raw_subject}'")
+        # The pipeline lowercases and splits on whitespace first, so inputs that
+        # differ only in case or spacing normalize to the same subject
+        cache_key = ' '.join(raw_subject.lower().split())
+        final_subject = self.subject_cache.get(cache_key)
+        if final_subject is None:
+            final_subject = self._normalize_subject(raw_subject)
+            self.subject_cache.set(cache_key, final_subject)
+        return final_subject
+    
+    def _normalize_subject(self, raw_subject: str) -> str:
+        """Run the NLP pipeline and match the result against the subjects catalog"""
+        logger.debug("[COURSEWORK] Applying NLP techniques to subject input...")
+        logger.debug("[COURSEWORK] Raw input: '%s'", raw_subject)
         
         # Apply full NLP pipeline to demonstrate all 6 techniques
         processed_subject = nlp_processor.process_subject_input(raw_subject)
         
-        print(f"[COURSEWORK] Processed subject: '{processed_subject}'")
+        logger.debug("[COURSEWORK] Processed subject: '%s'", processed_subject)
         
         # Try to match to existing subjects in database
         cleaned_subject = processed_subject.lower()
         
         # Look for matches in subject database using cleaned input
-        best_match = None
-        for subject_name in self.subjects_db.keys():
-            if cleaned_subject in subject_name.lower() or subject_name.lower() in cleaned_subject:
-                best_match = subject_name
-                break
+        best_match = self.subject_index.match_name(cleaned_subject)
         
         # Use matched subject or processed input
         final_subject = best_match if best_match else processed_subject
         
-        print(f"[COURSEWORK] Final subject: '{final_subject}' {'(matched from database)' if best_match else '(user input processed)'}")
+        logger.debug("[COURSEWORK] Final subject: '%s' %s", final_subject, '(matched from database)' if best_match else '(user input processed)')
         
         return final_subject
     
     def load_subjects_database(self):
         """Load subjects database with estimated hours and topics"""
+        # Cached normalizations may point at subjects that no longer exist
+        self.subject_cache.clear()
         try:
             with open('datasets/subjects_database.json', 'r') as f:
                 data = json.load(f)
@@ -379,7 +390,7 @@ class ScheduleCreatorAgent:
                 if category:
                     self.subjects_by_keywords[category].append(name)
         except Exception as e:
-            print(f"Error loading subjects database: {e}")
+            logger.error("Error loading subjects database: %s", e)
             # Fallback subjects database
             self.subjects_db = {
                 "Machine Learning": {
@@ -405,45 +416,62 @@ class ScheduleCreatorAgent:
                 }
             }
             self.subjects_by_keywords = {}
+        
+        # Substring index over names, keywords and categories for lookups
+        self.subject_index = SubjectIndex(self.subjects_db, self.subjects_by_keywords)
     
-    def create_personalized_schedule(self, user_id: str, subject: str, 
+    async def create_personalized_schedule(self, user_id: str, subject: str, 
                                    available_hours_per_day: int, 
                                    total_days: int, 
-                                   knowledge_level: str = "beginner") -> StudyPlan:
-        """Create a personalized study schedule with NLP-processed subject input"""
+                                   knowledge_level: str = "beginner",
+                                   use_ai: bool = True) -> StudyPlan:
+        """
+        Create a personalized study schedule with NLP-processed subject input.
+        use_ai=False builds it from the datasets only (no Gemini calls).
+        """
         
-        print(f"\n{'='*80}")
-        print(f"[SCHEDULE DEBUG] Creating schedule for: {subject}")
-        print(f"[SCHEDULE DEBUG] Knowledge Level: {knowledge_level}")
-        print(f"[SCHEDULE DEBUG] Days: {total_days}, Hours/day: {available_hours_per_day}")
-        print(f"[SCHEDULE DEBUG] Gemini Initialized: {self.genai_initialized}")
-        print(f"[SCHEDULE DEBUG] Has model: {hasattr(self, 'model')}")
-        print(f"{'='*80}\n")
+        logger.debug("[SCHEDULE DEBUG] Creating schedule for: %s", subject)
+        logger.debug("[SCHEDULE DEBUG] Knowledge Level: %s", knowledge_level)
+        logger.debug("[SCHEDULE DEBUG] Days: %s, Hours/day: %s", total_days, available_hours_per_day)
+        logger.debug("[SCHEDULE DEBUG] Gemini Initialized: %s", self.genai_initialized)
         
         # COURSEWORK DEMONSTRATION: Apply NLP techniques to subject input
         processed_subject = self.process_subject_with_nlp(subject)
         
+        subject_info, final_hours = await self.resolve_subject_info(
+            subject, processed_subject, available_hours_per_day, total_days, knowledge_level, use_ai
+        )
+        return self.build_study_plan(
+            user_id, subject, processed_subject, subject_info, final_hours,
+            available_hours_per_day, total_days, knowledge_level
+        )
+    
+    async def resolve_subject_info(self, subject: str, processed_subject: str,
+                                   available_hours_per_day: int, total_days: int,
+                                   knowledge_level: str, use_ai: bool = True) -> Tuple[Dict, int]:
+        """
+        Topics and estimated hours for a subject (AI, then database, then fuzzy
+        match, then generated), plus the hours the plan will actually schedule
+        """
         # PRIORITY 1: Try AI generation first (for dynamic, non-templated content)
         subject_info = None
-        if self.genai_initialized and hasattr(self, 'model'):
-            print(f"[AI PRIORITY] ✅ Attempting full AI generation for {processed_subject} ({knowledge_level})")
+        if self.genai_initialized and use_ai:
+            logger.debug("[AI PRIORITY] ✅ Attempting full AI generation for %s (%s)", processed_subject, knowledge_level)
             try:
-                subject_info = self._generate_subject_info_with_ai(processed_subject, knowledge_level, total_days)
+                subject_info = await self._cached_subject_info_with_ai(processed_subject, knowledge_level, total_days)
                 if subject_info:
-                    print(f"[AI PRIORITY] ✅ Successfully generated via Gemini API!")
-                    print(f"[AI PRIORITY] Topics generated: {len(subject_info.get('topics', []))}")
+                    logger.debug("[AI PRIORITY] ✅ Successfully generated via Gemini API!")
+                    logger.debug("[AI PRIORITY] Topics generated: %s", len(subject_info.get('topics', [])))
                 else:
-                    print(f"[AI PRIORITY] ⚠️ Gemini returned None")
+                    logger.warning("[AI PRIORITY] ⚠️ Gemini returned None")
             except Exception as e:
-                print(f"[AI PRIORITY] ❌ Exception during AI generation: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("[AI PRIORITY] ❌ Exception during AI generation: %s", e)
         else:
-            print(f"[AI PRIORITY] ❌ Skipping AI generation - Gemini not initialized")
+            logger.debug("[AI PRIORITY] ❌ Skipping AI generation - Gemini not initialized")
         
         # PRIORITY 2: Try database lookup (only if AI fails)
         if not subject_info:
-            print(f"[DATABASE] Checking database for {processed_subject}")
+            logger.debug("[DATABASE] Checking database for %s", processed_subject)
             subject_info = self.subjects_db.get(processed_subject)
             
             # Also try original subject if processed didn't match
@@ -452,29 +480,29 @@ class ScheduleCreatorAgent:
             
             # Update difficulty if found in database
             if subject_info:
-                print(f"[DATABASE] ✅ Found in database!")
+                logger.debug("[DATABASE] ✅ Found in database!")
                 subject_info = subject_info.copy()  # Don't modify original
                 subject_info['difficulty'] = knowledge_level  # Use user's selected level
             else:
-                print(f"[DATABASE] ❌ Not found in database")
+                logger.debug("[DATABASE] ❌ Not found in database")
         
         # PRIORITY 3: Try fuzzy matching with keywords
         if not subject_info:
-            print(f"[FUZZY] Attempting fuzzy match for {processed_subject}")
+            logger.debug("[FUZZY] Attempting fuzzy match for %s", processed_subject)
             subject_info = self._find_similar_subject(subject)
             if subject_info:
-                print(f"[FUZZY] ✅ Found fuzzy match!")
+                logger.debug("[FUZZY] ✅ Found fuzzy match!")
                 subject_info['difficulty'] = knowledge_level  # Override with user's level
             else:
-                print(f"[FUZZY] ❌ No fuzzy match found")
+                logger.debug("[FUZZY] ❌ No fuzzy match found")
         
         # PRIORITY 4: Fallback to AI-generated generic structure
         if not subject_info:
-            print(f"[FALLBACK] Using fallback generation for {processed_subject}")
+            logger.debug("[FALLBACK] Using fallback generation for %s", processed_subject)
             subject_info = {
                 "estimated_hours": max(10, available_hours_per_day * total_days),
                 "difficulty": knowledge_level,
-                "topics": self._generate_dynamic_topics(processed_subject, total_days)
+                "topics": await self._generate_dynamic_topics(processed_subject, total_days, use_ai=use_ai)
             }
         
         # Ensure difficulty matches user selection
@@ -489,24 +517,32 @@ class ScheduleCreatorAgent:
         elif knowledge_level == "advanced":
             adjusted_hours = int(estimated_hours * 0.8)
         else:
-            adjusted_hours = estimated_hours
+            adjusted_hours = int(round(estimated_hours))
         
         # Ensure we don't exceed available time
-        final_hours = min(adjusted_hours, total_available_hours)
-        
-        # Create detailed schedule
-        schedule = self._generate_detailed_schedule(
-            processed_subject, subject_info, final_hours, 
-            available_hours_per_day, total_days, knowledge_level
-        )
+        final_hours = int(min(adjusted_hours, total_available_hours))
+        return subject_info, final_hours
+    
+    def build_study_plan(self, user_id: str, subject: str, processed_subject: str,
+                         subject_info: Dict, final_hours: int, available_hours_per_day: int,
+                         total_days: int, knowledge_level: str) -> StudyPlan:
+        """
+        Lay the resolved topics out over the days of the plan. Only the first
+        PLAN_INLINE_DAYS days are expanded; ``schedule.plan`` produces the rest.
+        """
+        layout = self.plan_layout(processed_subject, subject_info, final_hours,
+                                  available_hours_per_day, total_days, knowledge_level)
+        schedule = layout.window(1, PLAN_INLINE_DAYS)
         
         # Prepare NLP demonstration data
         original_subject = subject  # Store the original input
         display_subject = processed_subject if processed_subject else subject
         nlp_feedback = f"Processed from '{original_subject}'" if processed_subject and processed_subject != subject else None
         
-        print(f"[FINAL] ✅ Created plan: {display_subject} ({knowledge_level}) - {final_hours}h total, {available_hours_per_day}h/day")
-        print(f"[FINAL] Topics in schedule: {[t.get('topic', 'N/A') for day in schedule for t in day.get('topics', [])][:5]}")
+        logger.debug("[FINAL] ✅ Created plan: %s (%s) - %sh total, %sh/day", display_subject, knowledge_level, final_hours, available_hours_per_day)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[FINAL] Topics in schedule: %s",
+                         [layout.topics[topic_id] for topic_id in schedule.topic_ids[:5]])
         
         return StudyPlan(
             user_id=user_id,
@@ -525,81 +561,160 @@ class ScheduleCreatorAgent:
                                   total_hours: int, daily_hours: int, total_days: int,
                                   knowledge_level: str = "intermediate") -> List[Dict]:
         """Generate detailed daily schedule with difficulty-aware content"""
-        topics = subject_info.get("topics", ["Introduction", "Main Concepts", "Practice"])
-        hours_per_topic = max(1, total_hours // len(topics))
-        
-        schedule = []
-        current_topic_index = 0
-        remaining_topic_hours = hours_per_topic
-        
-        # Difficulty-based goal generation
-        goal_templates = {
-            'beginner': [
-                'Understand the basics of {}',
-                'Complete introductory exercises for {}',
-                'Learn fundamental concepts in {}',
-                'Practice basic {} skills',
-                'Review and solidify {} understanding'
-            ],
-            'intermediate': [
-                'Apply {} in practical scenarios',
-                'Build a project using {}',
-                'Implement {} techniques',
-                'Solve real-world problems with {}',
-                'Master {} best practices'
-            ],
-            'advanced': [
-                'Optimize {} for performance',
-                'Architect solutions with {}',
-                'Master advanced {} patterns',
-                'Innovate using {}',
-                'Contribute to {} at expert level'
-            ]
-        }
-        
-        goals = goal_templates.get(knowledge_level, goal_templates['intermediate'])
+        return list(self.iter_detailed_schedule(subject, subject_info, total_hours,
+                                                daily_hours, total_days, knowledge_level))
+    
+    def iter_detailed_schedule(self, subject: str, subject_info: Dict, 
+                               total_hours: int, daily_hours: int, total_days: int,
+                               knowledge_level: str = "intermediate") -> Iterator[Dict]:
+        """Yield the detailed daily schedule one day at a time"""
+        return self.plan_layout(subject, subject_info, total_hours, daily_hours,
+                                total_days, knowledge_level).iter_days()
+    
+    def plan_layout(self, subject: str, subject_info: Dict, total_hours: int, daily_hours: int,
+                    total_days: int, knowledge_level: str = "intermediate") -> CompactPlan:
+        """Compact form of the schedule, starting today"""
+        return CompactPlan(
+            subject=subject,
+            topics=subject_info.get("topics", []),
+            total_hours=total_hours,
+            daily_hours=daily_hours,
+            total_days=total_days,
+            knowledge_level=knowledge_level,
+            start_date=datetime.now().strftime("%Y-%m-%d")
+        )
+    
+    def save_plan(self, user_id: str, study_plan: Dict, layout: CompactPlan) -> str:
+        """
+        Store a generated plan in study_plans and return its id. The schedule
+        column holds the compact layout, not the expanded days.
+        """
+        plan_id = uuid.uuid4().hex
+        layout_json = layout.to_json()
+        with self.db.connection() as conn:
+            conn.execute('''
+                INSERT INTO study_plans (id, user_id, subject, total_hours, daily_hours, difficulty,
+                                         start_date, schedule, resources, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (plan_id, user_id, study_plan["subject"], study_plan["total_hours"],
+                  study_plan["daily_hours"], study_plan["difficulty"], layout.start_date,
+                  layout_json, json.dumps(study_plan.get("resources", [])), datetime.now().isoformat()))
+        self.plan_layouts.set(plan_id, (user_id, layout_json))
+        return plan_id
+    
+    def _read_plan_entry(self, plan_id: str) -> Optional[Tuple[str, str]]:
+        """(owner, layout JSON) of a stored plan, through the layout cache"""
+        entry = self.plan_layouts.get(plan_id)
+        if entry is None:
+            with self.db.connection() as conn:
+                row = conn.execute(
+                    'SELECT user_id, schedule FROM study_plans WHERE id = ?', (plan_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], row[1])
+            self.plan_layouts.set(plan_id, entry)
+        return entry
+    
+    def _plan_page(self, plan_id: str, entry: Optional[Tuple[str, str]], user_id: str,
+                   start: int, count: int) -> Optional[Dict]:
+        if entry is None or entry[0] != user_id:
+            return None
+        try:
+            layout = CompactPlan.from_json(entry[1])
+        except (ValueError, TypeError):
+            # Plans stored before the compact format have no layout to expand
+            return None
         
-        for day in range(total_days):
-            day_plan = {
-                "day": day + 1,
-                "date": (datetime.now() + timedelta(days=day)).strftime("%Y-%m-%d"),
-                "hours": daily_hours,
-                "topics": [],
-                "goals": []
-            }
-            
-            hours_left_today = daily_hours
-            
-            while hours_left_today > 0 and current_topic_index < len(topics):
-                current_topic = topics[current_topic_index]
-                hours_to_spend = min(hours_left_today, remaining_topic_hours)
-                
-                day_plan["topics"].append({
-                    "topic": current_topic,
-                    "hours": hours_to_spend,
-                    "type": "study"
-                })
-                
-                # Add difficulty-appropriate goals
-                goal_text = goals[day % len(goals)].format(current_topic)
-                day_plan["goals"].append(goal_text)
-                
-                hours_left_today -= hours_to_spend
-                remaining_topic_hours -= hours_to_spend
-                
-                if remaining_topic_hours <= 0:
-                    current_topic_index += 1
-                    if current_topic_index < len(topics):
-                        remaining_topic_hours = hours_per_topic
+        start = max(1, start)
+        count = max(1, min(count, PLAN_PAGE_MAX_DAYS))
+        window = layout.window(start, count)
+        return {
+            "plan_id": plan_id,
+            "total_days": layout.total_days,
+            "start": start,
+            "days": window.to_json(),
+            "next_start": window.next_start
+        }
+    
+    def get_plan_days(self, plan_id: str, user_id: str, start: int = 1,
+                      count: int = PLAN_INLINE_DAYS) -> Optional[Dict]:
+        """
+        One page of a stored plan's days, or None when the plan does not exist
+        or belongs to another user.
+        """
+        return self._plan_page(plan_id, self._read_plan_entry(plan_id), user_id, start, count)
+    
+    def replan(self, plan_id: str, user_id: str, from_day: Optional[int] = None,
+               missed_days: List[int] = (), completed_topics: List[str] = (),
+               daily_hours: Optional[int] = None) -> Optional[Dict]:
+        """
+        Reflow a stored plan from from_day (default: today) after missed days,
+        completed topics or a change of hours per day. Topics are kept, so no
+        AI call is made. Returns the first page from from_day, or None when the
+        plan is not available; raises ValueError for an invalid delta.
+        """
+        for _ in range(3):
+            entry = self._read_plan_entry(plan_id)
+            if entry is None or entry[0] != user_id:
+                return None
+            layout = CompactPlan.from_json(entry[1])
+            if from_day is None:
+                elapsed = (datetime.now().date() - datetime.strptime(layout.start_date, "%Y-%m-%d").date()).days
+                first_day = min(max(1, elapsed + 1), layout.total_days)
+            else:
+                first_day = from_day
+            revised = layout.replan(first_day, missed_days, completed_topics, daily_hours)
+            revised_json = revised.to_json()
             
-            schedule.append(day_plan)
-        
-        return schedule
+            # Compare-and-swap so concurrent re-plans of one plan cannot overwrite each other
+            with self.db.connection() as conn:
+                updated = conn.execute('''
+                    UPDATE study_plans SET schedule = ?, daily_hours = ?
+                    WHERE id = ? AND user_id = ? AND schedule = ?
+                ''', (revised_json, revised.hours_on(first_day), plan_id, user_id, entry[1])).rowcount
+            if updated:
+                self.plan_layouts.set(plan_id, (user_id, revised_json))
+                page = self._plan_page(plan_id, (user_id, revised_json), user_id, first_day, PLAN_INLINE_DAYS)
+                page["missed_days"] = revised.missed_days
+                page["unscheduled_hours"] = revised.unscheduled_hours()
+                return page
+            # Stale cached layout or a concurrent update: re-read and try again
+            self.plan_layouts.invalidate(plan_id)
+        raise RuntimeError("Study plan was modified concurrently, please retry")
+    
+    async def replan_async(self, plan_id: str, user_id: str, from_day: Optional[int] = None,
+                           missed_days: List[int] = (), completed_topics: List[str] = (),
+                           daily_hours: Optional[int] = None) -> Optional[Dict]:
+        """Async version of replan for FastAPI handlers"""
+        return await self.db.run(self.replan, plan_id, user_id, from_day,
+                                 missed_days, completed_topics, daily_hours)
+    
+    async def save_plan_async(self, user_id: str, study_plan: Dict, layout: CompactPlan) -> str:
+        """Async version of save_plan for FastAPI handlers"""
+        return await self.db.run(self.save_plan, user_id, study_plan, layout)
+    
+    async def get_plan_days_async(self, plan_id: str, user_id: str, start: int = 1,
+                                  count: int = PLAN_INLINE_DAYS) -> Optional[Dict]:
+        """Async version of get_plan_days for FastAPI handlers"""
+        # Cached layouts expand on the event loop without an executor round-trip
+        entry = self.plan_layouts.get(plan_id)
+        if entry is None:
+            entry = await self.db.run(self._read_plan_entry, plan_id)
+        return self._plan_page(plan_id, entry, user_id, start, count)
+    
+    async def _cached_subject_info_with_ai(self, subject: str, knowledge_level: str, total_days: int) -> Dict:
+        """Subject information from AI, answered from the response cache for repeat prompts"""
+        key = content_key("subject_info", self.SUBJECT_INFO_PROMPT_VERSION,
+                          subject, knowledge_level, day_bucket(total_days))
+        return await self.subject_info_cache.get_or_compute(
+            key, lambda: self._generate_subject_info_with_ai(subject, knowledge_level, total_days)
+        )
     
-    def _generate_subject_info_with_ai(self, subject: str, knowledge_level: str, total_days: int) -> Dict:
+    async def _generate_subject_info_with_ai(self, subject: str, knowledge_level: str, total_days: int) -> Dict:
         """Generate subject information using AI when available - FULLY AI-POWERED"""
-        print(f"\n[AI GEN] Starting Gemini API call...")
-        print(f"[AI GEN] Subject: {subject}, Level: {knowledge_level}, Days: {total_days}")
+        logger.debug("[AI GEN] Starting Gemini API call...")
+        logger.debug("[AI GEN] Subject: %s, Level: %s, Days: %s", subject, knowledge_level, total_days)
         
         try:
             # Enhanced prompt for better, difficulty-aware topic generation
@@ -643,14 +758,13 @@ class ScheduleCreatorAgent:
             Make it creative, specific to {subject}, and perfectly suited for {knowledge_level} learners!
             """
             
-            print(f"[AI GEN] Sending request to Gemini API...")
-            response = self.model.generate_content(prompt)
-            print(f"[AI GEN] ✅ Received response from Gemini API")
-            print(f"[AI GEN] ✅ Received response from Gemini API")
-            response_text = response.text.strip()
+            logger.debug("[AI GEN] Sending request to Gemini API...")
+            raw_response = await self.llm.generate(prompt)
+            logger.debug("[AI GEN] ✅ Received response from Gemini API")
+            response_text = raw_response.strip()
             
-            print(f"[AI GEN] Response length: {len(response_text)} chars")
-            print(f"[AI GEN] First 200 chars: {response_text[:200]}")
+            logger.debug("[AI GEN] Response length: %s chars", len(response_text))
+            logger.debug("[AI GEN] First 200 chars: %s", response_text[:200])
             
             # Clean up markdown code blocks if present
             import re
@@ -659,19 +773,19 @@ class ScheduleCreatorAgent:
             response_text = re.sub(r'```\s*', '', response_text)
             response_text = response_text.strip()
             
-            print(f"[AI GEN] After cleaning: {response_text[:200]}")
+            logger.debug("[AI GEN] After cleaning: %s", response_text[:200])
             
             # Try to parse JSON from response
             json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
             if json_match:
-                print(f"[AI GEN] Found JSON match in response")
+                logger.debug("[AI GEN] Found JSON match in response")
                 try:
                     parsed_data = json.loads(json_match.group())
-                    print(f"[AI GEN] ✅ Successfully parsed JSON!")
+                    logger.debug("[AI GEN] ✅ Successfully parsed JSON!")
                     
                     # Validate and clean the topics
                     if 'topics' in parsed_data and isinstance(parsed_data['topics'], list):
-                        print(f"[AI GEN] Found {len(parsed_data['topics'])} topics")
+                        logger.debug("[AI GEN] Found %s topics", len(parsed_data['topics']))
                         # Ensure topics are unique and non-empty
                         cleaned_topics = []
                         seen_topics = set()
@@ -684,7 +798,7 @@ class ScheduleCreatorAgent:
                             if topic_str and topic_lower not in seen_topics:
                                 cleaned_topics.append(topic_str)
                                 seen_topics.add(topic_lower)
-                                print(f"[AI GEN]   ✓ Topic: {topic_str}")
+                                logger.debug("[AI GEN]   ✓ Topic: %s", topic_str)
                         
                         parsed_data['topics'] = cleaned_topics
                         
@@ -692,27 +806,24 @@ class ScheduleCreatorAgent:
                         if 'difficulty' not in parsed_data or not parsed_data['difficulty']:
                             parsed_data['difficulty'] = knowledge_level
                         
-                        print(f"[AI SUCCESS] ✅ Generated {len(cleaned_topics)} unique topics for {subject} ({knowledge_level})")
+                        logger.debug("[AI SUCCESS] ✅ Generated %s unique topics for %s (%s)", len(cleaned_topics), subject, knowledge_level)
                         return parsed_data
                         
                 except json.JSONDecodeError as je:
-                    print(f"[AI GEN] ❌ JSON parsing failed: {je}")
+                    logger.warning("[AI GEN] ❌ JSON parsing failed: %s", je)
                     pass
             else:
-                print(f"[AI GEN] ⚠️ No JSON pattern found in response")
+                logger.warning("[AI GEN] ⚠️ No JSON pattern found in response")
             
             # If JSON parsing fails, try to extract structured data
-            print("[AI GEN] Falling back to text extraction")
-            return self._extract_info_from_text(response.text, subject, knowledge_level)
+            logger.debug("[AI GEN] Falling back to text extraction")
+            return await self._extract_info_from_text(raw_response, subject, knowledge_level)
             
         except Exception as e:
-            print(f"[AI ERROR] ❌ Generation failed with exception: {e}")
-            import traceback
-            print(f"[AI ERROR] Traceback:")
-            traceback.print_exc()
+            logger.exception("[AI ERROR] ❌ Generation failed with exception: %s", e)
             return None
     
-    def _extract_info_from_text(self, text: str, subject: str, knowledge_level: str = "intermediate") -> Dict:
+    async def _extract_info_from_text(self, text: str, subject: str, knowledge_level: str = "intermediate") -> Dict:
         """Extract structured information from AI response text"""
         import re
         lines = text.strip().split('\n')
@@ -736,8 +847,8 @@ class ScheduleCreatorAgent:
         
         # If no topics found, try to use AI topic generator
         if not topics or len(topics) < 3:
-            print(f"[AI] Extracted {len(topics)} topics, generating more with AI...")
-            topics = self._generate_dynamic_topics(subject, 8, knowledge_level)
+            logger.debug("[AI] Extracted %s topics, generating more with AI...", len(topics))
+            topics = await self._generate_dynamic_topics(subject, 8, knowledge_level)
         
         # Calculate hours based on difficulty
         hours_per_topic = 3 if knowledge_level == "beginner" else 2.5 if knowledge_level == "intermediate" else 2
@@ -748,14 +859,15 @@ class ScheduleCreatorAgent:
             "topics": topics[:10]  # Limit to 10 topics
         }
     
-    def _generate_dynamic_topics(self, subject: str, total_days: int, knowledge_level: str = "intermediate") -> List[str]:
+    async def _generate_dynamic_topics(self, subject: str, total_days: int, knowledge_level: str = "intermediate",
+                                       use_ai: bool = True) -> List[str]:
         """
         AI-powered topic generation using Gemini API directly for fully dynamic content.
         NO templates, NO hardcoding - pure AI generation based on subject and knowledge level.
         """
-        print(f"\n[DYNAMIC TOPICS] Starting generation for {subject} (Level: {knowledge_level})")
+        logger.debug("[DYNAMIC TOPICS] Starting generation for %s (Level: %s)", subject, knowledge_level)
         num_topics = max(3, min(total_days, 10))
-        print(f"[DYNAMIC TOPICS] Target: {num_topics} topics at {knowledge_level} level")
+        logger.debug("[DYNAMIC TOPICS] Target: %s topics at %s level", num_topics, knowledge_level)
         
         # Level-specific instructions for Gemini
         level_instructions = {
@@ -806,8 +918,8 @@ class ScheduleCreatorAgent:
         level_instruction = level_instructions.get(knowledge_level, level_instructions["intermediate"])
         
         # Try Gemini API first for fully AI-generated content
-        if self.genai_initialized and hasattr(self, 'model'):
-            print(f"[DYNAMIC TOPICS] ✅ Gemini available, attempting AI generation...")
+        if self.genai_initialized and use_ai:
+            logger.debug("[DYNAMIC TOPICS] ✅ Gemini available, attempting AI generation...")
             try:
                 prompt = f"""
                 You are an expert curriculum designer. Generate {num_topics} specific, actionable learning topics for: "{subject}"
@@ -837,13 +949,12 @@ class ScheduleCreatorAgent:
                 ["Topic 1", "Topic 2", "Topic 3", ...]
                 """
                 
-                print(f"[DYNAMIC TOPICS] Sending request to Gemini...")
-                print(f"[DYNAMIC TOPICS] 🎯 LEVEL: {knowledge_level.upper()} - This will determine topic complexity!")
-                response = self.model.generate_content(prompt)
-                response_text = response.text.strip()
+                logger.debug("[DYNAMIC TOPICS] Sending request to Gemini...")
+                logger.debug("[DYNAMIC TOPICS] 🎯 LEVEL: %s - This will determine topic complexity!", knowledge_level.upper())
+                response_text = (await self.llm.generate(prompt)).strip()
                 
-                print(f"[DYNAMIC TOPICS] Response received: {len(response_text)} chars")
-                print(f"[DYNAMIC TOPICS] First 200 chars: {response_text[:200]}")
+                logger.debug("[DYNAMIC TOPICS] Response received: %s chars", len(response_text))
+                logger.debug("[DYNAMIC TOPICS] First 200 chars: %s", response_text[:200])
                 
                 # Clean markdown if present
                 import re
@@ -855,7 +966,7 @@ class ScheduleCreatorAgent:
                 try:
                     topics = json.loads(response_text)
                     if isinstance(topics, list) and len(topics) >= 3:
-                        print(f"[DYNAMIC TOPICS] ✅ Parsed {len(topics)} topics from JSON array")
+                        logger.debug("[DYNAMIC TOPICS] ✅ Parsed %s topics from JSON array", len(topics))
                         # Clean and validate topics
                         valid_topics = []
                         seen = set()
@@ -872,21 +983,21 @@ class ScheduleCreatorAgent:
                                 topic_lower not in seen and not is_generic):
                                 valid_topics.append(topic_str)
                                 seen.add(topic_lower)
-                                print(f"[DYNAMIC TOPICS]   ✓ {topic_str}")
+                                logger.debug("[DYNAMIC TOPICS]   ✓ %s", topic_str)
                             elif is_generic:
-                                print(f"[DYNAMIC TOPICS]   ✗ Rejected (too generic): {topic_str}")
+                                logger.debug("[DYNAMIC TOPICS]   ✗ Rejected (too generic): %s", topic_str)
                         
                         if len(valid_topics) >= 3:
-                            print(f"[AI SUCCESS] ✅ Generated {len(valid_topics)} dynamic topics via Gemini")
-                            print(f"[AI SUCCESS] 🎯 Topics for {knowledge_level.upper()} level:")
+                            logger.debug("[AI SUCCESS] ✅ Generated %s dynamic topics via Gemini", len(valid_topics))
+                            logger.debug("[AI SUCCESS] 🎯 Topics for %s level:", knowledge_level.upper())
                             for i, topic in enumerate(valid_topics[:5], 1):
-                                print(f"[AI SUCCESS]    {i}. {topic}")
+                                logger.debug("[AI SUCCESS]    %s. %s", i, topic)
                             return valid_topics[:num_topics]
                         else:
-                            print(f"[DYNAMIC TOPICS] ⚠️ Only {len(valid_topics)} valid topics after filtering")
+                            logger.warning("[DYNAMIC TOPICS] ⚠️ Only %s valid topics after filtering", len(valid_topics))
                 
                 except json.JSONDecodeError as je:
-                    print(f"[DYNAMIC TOPICS] ⚠️ JSON array parsing failed: {je}")
+                    logger.warning("[DYNAMIC TOPICS] ⚠️ JSON array parsing failed: %s", je)
                     # Try to extract topics from text
                     lines = response_text.split('\n')
                     topics = []
@@ -896,25 +1007,23 @@ class ScheduleCreatorAgent:
                         topic = re.sub(r'^[\d\.\-\*\s\"\']', '', line).strip('"\' ,')
                         if len(topic) > 10 and topic not in topics:
                             topics.append(topic)
-                            print(f"[DYNAMIC TOPICS]   ✓ Extracted: {topic}")
+                            logger.debug("[DYNAMIC TOPICS]   ✓ Extracted: %s", topic)
                     
                     if len(topics) >= 3:
-                        print(f"[AI PARTIAL] ✅ Extracted {len(topics)} topics from Gemini response")
+                        logger.debug("[AI PARTIAL] ✅ Extracted %s topics from Gemini response", len(topics))
                         return topics[:num_topics]
                     else:
-                        print(f"[DYNAMIC TOPICS] ⚠️ Only extracted {len(topics)} topics")
+                        logger.warning("[DYNAMIC TOPICS] ⚠️ Only extracted %s topics", len(topics))
                     
             except Exception as e:
-                print(f"[AI ERROR] ❌ Gemini topic generation failed: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("[AI ERROR] ❌ Gemini topic generation failed: %s", e)
         else:
-            print(f"[DYNAMIC TOPICS] ❌ Gemini not initialized (genai_initialized={self.genai_initialized}, has_model={hasattr(self, 'model')})")
+            logger.debug("[DYNAMIC TOPICS] ❌ Gemini not initialized")
         
         # If Gemini fails, provide a minimal subject-specific fallback
         # This is better than crashing, but still subject-specific (not generic templates)
-        print(f"[WARNING] ⚠️ Gemini API failed for {subject}. Using minimal subject-specific topics.")
-        print(f"[WARNING] Please check your GEMINI_API_KEY in the .env file")
+        logger.warning("⚠️ Gemini API failed for %s. Using minimal subject-specific topics.", subject)
+        logger.warning("Please check your GEMINI_API_KEY in the .env file")
         
         # Create subject-specific topics (not generic templates)
         return [
@@ -930,34 +1039,14 @@ class ScheduleCreatorAgent:
     
     def _find_similar_subject(self, subject: str) -> Dict:
         """Find similar subjects using keyword matching and fuzzy search"""
-        subject_lower = subject.lower()
-        best_match = None
-        best_score = 0
-        
-        # Check direct keyword matches first
-        for keyword, subject_names in getattr(self, 'subjects_by_keywords', {}).items():
-            if subject_lower in keyword.lower() or keyword.lower() in subject_lower:
-                for subject_name in subject_names:
-                    subject_data = self.subjects_db.get(subject_name)
-                    if subject_data:
-                        score = len(keyword) / len(subject_lower)  # Longer matches get higher scores
-                        if score > best_score:
-                            best_score = score
-                            best_match = subject_data.copy()
-                            best_match['matched_via'] = f'keyword: {keyword}'
-        
-        # Check partial matches in subject names
-        for subject_name, subject_data in self.subjects_db.items():
-            # Check if search term is in subject name or vice versa
-            if (subject_lower in subject_name.lower() or 
-                any(word in subject_name.lower() for word in subject_lower.split())):
-                score = 0.8  # High score for name matches
-                if score > best_score:
-                    best_score = score
-                    best_match = subject_data.copy()
-                    best_match['matched_via'] = f'name similarity: {subject_name}'
-        
-        return best_match if best_score > 0.3 else None  # Only return if reasonably good match
+        matches = self.subject_index.search(subject, limit=1)
+        if not matches or matches[0].score <= 0.3:  # Only return if reasonably good match
+            return None
+        
+        best = matches[0]
+        best_match = self.subjects_db[best.name].copy()
+        best_match['matched_via'] = best.matched_via
+        return best_match
 
 class ResourceFinderAgent:
     """Resource finder with basic search capabilities"""
@@ -969,7 +1058,7 @@ class ResourceFinderAgent:
             from nlp_processor import EnhancedNLPProcessor
             self.nlp_processor = EnhancedNLPProcessor()
         except ImportError:
-            print("[DEBUG] NLP processor not available for ResourceFinderAgent")
+            logger.warning("NLP processor not available for ResourceFinderAgent")
             self.nlp_processor = None
     
     def load_resources_database(self):
@@ -1005,64 +1094,18 @@ class ResourceFinderAgent:
                     "source": "Coursera"
                 }
             ]
+        
+        # Field postings and facet bitmaps so queries only touch matching resources
+        self.resource_index = ResourceIndex(self.resources_db or [])
     
     def find_best_resources(self, subject: str, difficulty: str = "beginner", 
                           resource_type: str = None, limit: int = 3, learning_style: str = "mixed") -> List[Dict]:
         """Find best resources using simple matching and generate fallbacks"""
-        best_resources = []
-        
         # First, try to find resources in the database
-        if self.resources_db:
-            for resource in self.resources_db:
-                score = 0
-                subject_lower = subject.lower()
-                
-                # Enhanced matching with scoring
-                # Exact subject match gets highest score
-                if subject_lower == resource.get('subject', '').lower():
-                    score = 1.0
-                # Subject contains the search term
-                elif subject_lower in resource.get('subject', '').lower():
-                    score = 0.9
-                # Title contains the search term
-                elif subject_lower in resource.get('title', '').lower():
-                    score = 0.8
-                # Keywords match
-                elif any(subject_lower in keyword.lower() for keyword in resource.get('keywords', [])):
-                    score = 0.85
-                # Tags match
-                elif any(subject_lower in tag.lower() for tag in resource.get('tags', [])):
-                    score = 0.75
-                # Category match
-                elif subject_lower in resource.get('category', '').lower():
-                    score = 0.7
-                
-                # If we found a match
-                if score > 0:
-                    # Filter by resource type if specified
-                    if resource_type is None or resource.get('resource_type') == resource_type:
-                        # Filter by difficulty if specified
-                        if difficulty == "beginner" or resource.get('difficulty') == difficulty:
-                            resource_copy = resource.copy()
-                            
-                            # Boost score based on learning style preference
-                            if learning_style != "mixed":
-                                resource_type_val = resource.get('resource_type', '').lower()
-                                if learning_style == "visual" and resource_type_val in ['video_course', 'video_series', 'interactive_tutorial']:
-                                    score += 0.15
-                                elif learning_style == "auditory" and resource_type_val in ['video_course', 'podcast']:
-                                    score += 0.15
-                                elif learning_style == "reading" and resource_type_val in ['book', 'guide', 'tutorial', 'academic_paper']:
-                                    score += 0.15
-                                elif learning_style == "kinesthetic" and resource_type_val in ['interactive_course', 'interactive_tutorial', 'mobile_app']:
-                                    score += 0.15
-                            
-                            resource_copy['similarity_score'] = min(score, 1.0)  # Cap at 1.0
-                            best_resources.append(resource_copy)
-            
-            # Sort by similarity score (highest first)
-            best_resources.sort(key=lambda x: x.get('similarity_score', 0), reverse=True)
-            best_resources = best_resources[:limit]
+        best_resources = self.resource_index.search(
+            subject, difficulty=difficulty, resource_type=resource_type,
+            limit=limit, learning_style=learning_style
+        )
         
         # If we don't have enough resources, generate fallback resources
         if len(best_resources) < limit:
@@ -1235,7 +1278,7 @@ class ResourceFinderAgent:
                 clean_subject = ' '.join(clean_subject.split())  # Normalize whitespace
                 clean_subject = clean_subject.lower().title()    # Proper case
         except Exception as e:
-            print(f"[DEBUG] NLP processing failed for URL: {e}")
+            logger.warning("NLP processing failed for URL: %s", e)
             # Basic cleaning as fallback
             import re
             clean_subject = re.sub(r'[^\w\s]', '', subject)
@@ -1297,7 +1340,7 @@ class MotivationCoachAgent:
             self.ethics_framework = AIEthicsFramework()
             self.enhanced_mode = True
         except ImportError:
-            print("Enhanced motivation system not available, using basic mode")
+            logger.warning("Enhanced motivation system not available, using basic mode")
             self.enhanced_mode = False
     
     def load_motivation_data(self):
@@ -1359,7 +1402,7 @@ class MotivationCoachAgent:
             "subjectivity": 0.5
         }
     
-    def get_motivation_message(self, 
+    async def get_motivation_message(self, 
                              user_input: str = "", 
                              mood: str = "neutral", 
                              progress_percentage: float = 0,
@@ -1368,11 +1411,11 @@ class MotivationCoachAgent:
         """Enhanced motivation with AI-powered personalization and ethics validation"""
         
         if self.enhanced_mode and user_input:
-            return self._get_enhanced_motivation(user_input, progress_percentage, subject, user_id)
+            return await self._get_enhanced_motivation(user_input, progress_percentage, subject, user_id)
         else:
             return self._get_basic_motivation(mood, progress_percentage)
     
-    def _get_enhanced_motivation(self, user_input: str, progress_percentage: float, 
+    async def _get_enhanced_motivation(self, user_input: str, progress_percentage: float, 
                                subject: str, user_id: str) -> Dict:
         """Get AI-powered personalized motivation with ethics compliance"""
         
@@ -1400,12 +1443,12 @@ class MotivationCoachAgent:
         # Generate AI content using LLM for personalized responses
         try:
             # Always generate AI content for personalized experience
-            ai_content = self.content_generator.generate_personalized_quote_sync(mood_profile, subject, user_input)
+            ai_content = await self.content_generator.generate_contextual_quote(mood_profile, subject, user_input)
             if ai_content:
                 available_content.append(ai_content)
-                print(f"[SUCCESS] AI content generated: {ai_content.content[:50]}...")
+                logger.debug("[SUCCESS] AI content generated: %s...", ai_content.content[:50])
         except Exception as e:
-            print(f"[WARNING] AI content generation failed: {e}")
+            logger.warning("AI content generation failed: %s", e)
             # Generate dynamic encouragement based on user input
             dynamic_encouragement = self._generate_dynamic_encouragement(user_input, mood_profile)
             if dynamic_encouragement:
@@ -1585,36 +1628,45 @@ class MotivationCoachAgent:
 class FileAnalysisAgent:
     """Handles file upload, processing, and AI-powered analysis"""
     
-    def __init__(self):
-        self.db = DatabaseManager()
-        self.model = None
-        
-        # Initialize Gemini for multimodal analysis
-        if GENAI_AVAILABLE:
-            try:
-                api_key = os.getenv("GEMINI_API_KEY")
-                if api_key:
-                    genai.configure(api_key=api_key)
-                    # Use gemini-2.5-flash - stable multimodal model available in current API
-                    self.model = genai.GenerativeModel('gemini-2.5-flash')
-                    print("[FILE ANALYSIS] ✅ Gemini API initialized for file analysis with gemini-2.5-flash")
-            except Exception as e:
-                print(f"[FILE ANALYSIS] ❌ Failed to initialize Gemini: {e}")
+    # Bump whenever the analysis prompts change so cached results are not reused
+    ANALYSIS_PROMPT_VERSION = "3"
+    
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or DatabaseManager()
+        # gemini-2.5-flash - stable multimodal model available in current API
+        self.llm = get_llm_client('gemini-2.5-flash')
+        if self.llm:
+            logger.info("[FILE ANALYSIS] ✅ LLM client ready for file analysis: %s", self.llm.backend.name)
+        # PDF/PPTX parsing runs in worker processes, off the event loop
+        self.extractor = get_extraction_pool()
+        # Repeat uploads (same bytes) reuse extracted text and, for the same query, the analysis
+        self.analysis_cache = AnalysisCache(self.db.pool)
+        # Identical uploads analyzed at the same time share one extraction + LLM call
+        self.analysis_flight = SingleFlight("file_analyses")
+        # Large documents are condensed chunk by chunk; chunk summaries are shared across questions
+        self.summarizer = ChunkedSummarizer(
+            self.llm.generate, ResponseCache(self.db.pool, namespace="chunk_summaries"),
+            model=self.llm.backend.name
+        ) if self.llm else None
+        # BM25 passages per analyzed document, for questions about large documents
+        self.passage_index = PassageIndex(self.db.pool)
+        # Multi-file uploads run as background jobs that clients poll
+        self.batch_jobs = BatchJobRunner()
     
     def check_daily_upload_limit(self, user_id: str, is_premium: bool = False) -> Dict:
         """Check if user has exceeded daily upload limit"""
         today = datetime.now().date().isoformat()
-        
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT COUNT(*) FROM file_uploads 
-            WHERE user_id = ? AND DATE(upload_date) = ?
-        ''', (user_id, today))
-        
-        upload_count = cursor.fetchone()[0]
-        conn.close()
+        # Analyses served from the cache only count when configured to
+        uncounted = "" if self.analysis_cache.hits_count_toward_limit else " AND cache_hit = 0"
+        
+        # Range scan on idx_file_uploads_user_day
+        with self.db.connection() as conn:
+            upload_count = conn.execute('''
+                SELECT COUNT(*) FROM file_uploads 
+                WHERE user_id = ? AND upload_day = ?''' + uncounted,
+                (user_id, today)).fetchone()[0]
+        # Files of running batch jobs have no rows yet but count all the same
+        upload_count += self.batch_jobs.pending_uploads(user_id, self.analysis_cache.hits_count_toward_limit)
         
         max_uploads = 999 if is_premium else 3  # Premium: unlimited, Free: 3 per day
         remaining = max(0, max_uploads - upload_count)
@@ -1627,52 +1679,99 @@ class FileAnalysisAgent:
             "is_premium": is_premium
         }
     
-    def extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file"""
+    def get_upload_history(self, user_id: str, limit: int = 10) -> List[Dict]:
+        """Get the user's most recent file analyses"""
+        with self.db.connection() as conn:
+            rows = conn.execute('''
+                SELECT id, filename, file_type, upload_date, query, result
+                FROM file_uploads
+                WHERE user_id = ?
+                ORDER BY upload_date DESC
+                LIMIT ?
+            ''', (user_id, limit)).fetchall()
+        
+        return [
+            {
+                "id": row[0],
+                "filename": row[1],
+                "file_type": row[2],
+                "upload_date": row[3],
+                "query": row[4],
+                "result": row[5]
+            }
+            for row in rows
+        ]
+    
+    async def check_daily_upload_limit_async(self, user_id: str, is_premium: bool = False) -> Dict:
+        """Async version of check_daily_upload_limit for FastAPI handlers"""
+        return await self.db.run(self.check_daily_upload_limit, user_id, is_premium)
+    
+    async def get_upload_history_async(self, user_id: str, limit: int = 10) -> List[Dict]:
+        """Async version of get_upload_history for FastAPI handlers"""
+        return await self.db.run(self.get_upload_history, user_id, limit)
+    
+    @staticmethod
+    def _upload_row(upload_id: str, user_id: str, filename: str, file_ext: str,
+                    user_query: Optional[str], analysis_result: str, cache_hit: bool = False,
+                    content_sha256: Optional[str] = None) -> Tuple:
+        """A file_uploads row for a completed analysis"""
+        now = datetime.now()
+        return (upload_id, user_id, filename, file_ext, now.isoformat(), now.date().isoformat(),
+                user_query or "Summary", analysis_result, int(cache_hit), content_sha256)
+    
+    def _save_uploads(self, rows: List[Tuple]):
+        """Record completed analyses in file_uploads, all in one transaction"""
+        with self.db.connection() as conn:
+            conn.executemany('''
+                INSERT INTO file_uploads (id, user_id, filename, file_type, upload_date, upload_day, query, result,
+                                          cache_hit, sha256)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    
+    def _get_upload_document(self, user_id: str, upload_id: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        """(filename, file_type, sha256) of one of the user's uploads"""
+        with self.db.connection() as conn:
+            return conn.execute('''
+                SELECT filename, file_type, sha256 FROM file_uploads WHERE id = ? AND user_id = ?
+            ''', (upload_id, user_id)).fetchone()
+    
+    @staticmethod
+    def _as_stream(file_content: Union[bytes, BinaryIO]) -> BinaryIO:
+        """Seekable stream over raw bytes or an already spooled upload file"""
+        if isinstance(file_content, (bytes, bytearray)):
+            return io.BytesIO(file_content)
+        file_content.seek(0)
+        return file_content
+    
+    def extract_text_from_pdf(self, file_content: Union[bytes, BinaryIO]) -> str:
+        """Extract text from PDF file (bytes or a seekable file)"""
         if not PDF_AVAILABLE:
             return "PDF processing not available"
         
         try:
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
+            return extract_pdf_pages(self._as_stream(file_content)).strip()
         except Exception as e:
-            print(f"[PDF ERROR] {e}")
+            logger.error("[PDF ERROR] %s", e)
             return f"Error extracting PDF text: {str(e)}"
     
-    def extract_text_from_pptx(self, file_content: bytes) -> str:
-        """Extract text from PowerPoint file"""
+    def extract_text_from_pptx(self, file_content: Union[bytes, BinaryIO]) -> str:
+        """Extract text from PowerPoint file (bytes or a seekable file)"""
         if not PPTX_AVAILABLE:
             return "PowerPoint processing not available"
         
         try:
-            pptx_file = io.BytesIO(file_content)
-            presentation = Presentation(pptx_file)
-            
-            text = ""
-            for slide_num, slide in enumerate(presentation.slides, 1):
-                text += f"\n--- Slide {slide_num} ---\n"
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n"
-            
-            return text.strip()
+            return extract_pptx_text(self._as_stream(file_content)).strip()
         except Exception as e:
-            print(f"[PPTX ERROR] {e}")
+            logger.error("[PPTX ERROR] %s", e)
             return f"Error extracting PowerPoint text: {str(e)}"
     
-    def process_image(self, file_content: bytes) -> Dict:
+    def process_image(self, file_content: Union[bytes, BinaryIO]) -> Dict:
         """Process image file and return image data for Gemini"""
         if not IMAGE_AVAILABLE:
             return {"error": "Image processing not available"}
         
         try:
-            image = Image.open(io.BytesIO(file_content))
+            image = Image.open(self._as_stream(file_content))
             # Convert to RGB if necessary
             if image.mode != 'RGB':
                 image = image.convert('RGB')
@@ -1689,21 +1788,145 @@ class FileAnalysisAgent:
                 "size": image.size
             }
         except Exception as e:
-            print(f"[IMAGE ERROR] {e}")
+            logger.error("[IMAGE ERROR] %s", e)
             return {"error": f"Error processing image: {str(e)}"}
     
-    async def analyze_file(self, file_content: bytes, filename: str, 
-                          user_query: Optional[str], user_id: str) -> Dict:
-        """Analyze uploaded file with optional user query"""
+    def _analysis_key(self, content_sha256: str, file_ext: str, user_query: Optional[str]) -> str:
+        model = self.llm.backend.name if self.llm else ""
+        return AnalysisCache.result_key(content_sha256, file_ext, user_query, model, self.ANALYSIS_PROMPT_VERSION)
+    
+    async def is_uncounted_cache_hit(self, content_sha256: str, filename: str,
+                                     user_query: Optional[str]) -> bool:
+        """Whether this upload would be answered from the cache without counting toward the daily limit"""
+        if self.analysis_cache.hits_count_toward_limit:
+            return False
+        file_ext = filename.lower().split('.')[-1]
+        return await self.analysis_cache.has_result(self._analysis_key(content_sha256, file_ext, user_query))
+    
+    async def _extract_text(self, file_ext: str, file_content: Union[bytes, BinaryIO],
+                            content_sha256: str) -> str:
+        """Document text, from the cache when the same bytes were extracted before"""
+        text = await self.analysis_cache.get_text(content_sha256)
+        if text is None:
+            text = await self.extractor.extract(file_ext, self._as_stream(file_content))
+            # "... not available" placeholders are not worth keeping
+            if self.extractor.available(file_ext):
+                await self.analysis_cache.put_text(content_sha256, file_ext, text)
+        return text
+    
+    async def _answer(self, key: str, content_type: str, extracted_text: str, content_sha256: str,
+                      user_query: Optional[str]) -> str:
+        """Run (and cache) the analysis prompt for a document's text"""
+        document = None
+        # A question about a large document only needs its best-matching passages
+        if user_query and user_query.strip() and estimate_tokens(extracted_text) > RETRIEVAL_MIN_TOKENS:
+            passages = await self.passage_index.search(user_query, sha256=content_sha256)
+            if passages:
+                document = "\n\n".join(f"[{passage['label']}] {passage['text']}" for passage in passages)
+                document_label = "Most relevant document excerpts"
+        
+        if document is None:
+            # Too large for one prompt: work from (cached) per-section summaries instead
+            if self.summarizer.needs_chunking(extracted_text):
+                document = await self.summarizer.condense(extracted_text, content_type)
+                document_label = "Document section summaries"
+            else:
+                document = extracted_text
+                document_label = "Document content"
+        
+        # Prepare prompt based on user query
+        if user_query and user_query.strip():
+            prompt = f"User question: {user_query}\n\n{document_label}:\n{document}\n\nPlease answer based on the document."
+        else:
+            # Default summarization
+            prompt = f"Please provide a comprehensive summary of this {content_type}:\n\n{document}"
+        
+        # Call Gemini API (text only for gemini-1.0-pro)
+        analysis_result = await self.llm.generate(prompt)
+        await self.analysis_cache.put_result(key, content_sha256, analysis_result)
+        return analysis_result
+    
+    async def _analyze_uncached(self, key: str, file_ext: str, content_type: str,
+                                file_content: Union[bytes, BinaryIO], content_sha256: str,
+                                user_query: Optional[str]) -> str:
+        extracted_text = await self._extract_text(file_ext, file_content, content_sha256)
+        # Indexed once per document, so follow-up questions can use passages
+        if self.extractor.available(file_ext):
+            await self.passage_index.add_document(content_sha256, extracted_text)
+        return await self._answer(key, content_type, extracted_text, content_sha256, user_query)
+    
+    async def ask_about_upload(self, user_id: str, upload_id: str, user_query: str) -> Optional[Dict]:
+        """
+        Answer a follow-up question about one of the user's earlier uploads
+        without uploading the file again. Returns None when the upload is not
+        the user's; raises LookupError when its document is no longer stored.
+        """
+        row = await self.db.run(self._get_upload_document, user_id, upload_id)
+        if row is None:
+            return None
+        filename, file_ext, content_sha256 = row
+        if not content_sha256:
+            raise LookupError("This upload predates document storage; please upload the file again")
+        if not self.llm:
+            return {
+                "status": "error",
+                "message": "AI analysis not available. Please configure Gemini API key."
+            }
+        
+        content_type = "presentation" if file_ext in ('pptx', 'ppt') else "document"
+        key = self._analysis_key(content_sha256, file_ext, user_query)
+        analysis_result = await self.analysis_cache.get_result(key)
+        leads = False
+        if analysis_result is None:
+            extracted_text = (await self.analysis_cache.get_text(content_sha256)
+                              or await self.passage_index.document_text(content_sha256))
+            if extracted_text is None:
+                raise LookupError("The document is no longer stored; please upload the file again")
+            await self.passage_index.add_document(content_sha256, extracted_text)
+            
+            def lead():
+                nonlocal leads
+                leads = True
+                return self._answer(key, content_type, extracted_text, content_sha256, user_query)
+            
+            analysis_result = await self.analysis_flight.do(key, lead)
+        cache_hit = not leads
+        
+        return {
+            "status": "success",
+            "upload_id": upload_id,
+            "filename": filename,
+            "file_type": file_ext,
+            "content_type": content_type,
+            "query": user_query,
+            "analysis": analysis_result,
+            "cached": cache_hit,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def analyze_file(self, file_content: Union[bytes, BinaryIO], filename: str, 
+                          user_query: Optional[str], user_id: str,
+                          content_sha256: Optional[str] = None,
+                          pending_rows: Optional[List[Tuple]] = None,
+                          release: Optional[Callable[[], None]] = None) -> Dict:
+        """
+        Analyze uploaded file with optional user query. file_content is raw
+        bytes or a seekable file (e.g. SpooledUpload.stream()); pass the
+        upload's content_sha256 when known, otherwise it is computed here.
+        With ``pending_rows`` the file_uploads row is appended there for the
+        caller to write (see _save_uploads) instead of being saved now.
+        ``release`` (e.g. SpooledUpload.close) is called once file_content
+        is no longer needed: when this call starts the shared analysis that
+        concurrent identical uploads wait on, that analysis owns the file
+        and releases it when it ends, even if this caller goes away first.
+        """
+        leads = False
         try:
             file_ext = filename.lower().split('.')[-1]
             
-            # Extract content based on file type
             if file_ext == 'pdf':
-                extracted_text = self.extract_text_from_pdf(file_content)
                 content_type = "document"
             elif file_ext in ['pptx', 'ppt']:
-                extracted_text = self.extract_text_from_pptx(file_content)
                 content_type = "presentation"
             elif file_ext in ['png', 'jpg', 'jpeg']:
                 # gemini-1.0-pro doesn't support images, return helpful message
@@ -1718,37 +1941,37 @@ class FileAnalysisAgent:
                 }
             
             # Generate analysis using Gemini API
-            if not self.model:
+            if not self.llm:
                 return {
                     "status": "error",
                     "message": "AI analysis not available. Please configure Gemini API key."
                 }
             
-            # Prepare prompt based on user query
-            if user_query and user_query.strip():
-                prompt = f"User question: {user_query}\n\nDocument content:\n{extracted_text}\n\nPlease answer based on the document."
-            else:
-                # Default summarization
-                prompt = f"Please provide a comprehensive summary of this {content_type}:\n\n{extracted_text}"
-            
-            # Call Gemini API (text only for gemini-1.0-pro)
-            response = self.model.generate_content(prompt)
-            
-            analysis_result = response.text
-            
-            # Save to database
-            upload_id = hashlib.md5(f"{user_id}{datetime.now().isoformat()}".encode()).hexdigest()
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO file_uploads (id, user_id, filename, file_type, upload_date, query, result)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (upload_id, user_id, filename, file_ext, datetime.now().isoformat(), 
-                  user_query or "Summary", analysis_result))
+            # Same bytes + same question: reuse the stored analysis
+            if content_sha256 is None:
+                content_sha256 = await asyncio.to_thread(file_sha256, self._as_stream(file_content))
+            key = self._analysis_key(content_sha256, file_ext, user_query)
+            analysis_result = await self.analysis_cache.get_result(key)
+            if analysis_result is None:
+                def lead():
+                    nonlocal leads
+                    leads = True
+                    return self._release_after(self._analyze_uncached(
+                        key, file_ext, content_type, file_content, content_sha256, user_query
+                    ), release)
+                
+                analysis_result = await self.analysis_flight.do(key, lead)
+            # Only the caller that ran the analysis paid for it; followers got a shared answer
+            cache_hit = not leads
             
-            conn.commit()
-            conn.close()
+            # Save to database (uuid4: concurrent analyses must not share an id)
+            upload_id = uuid.uuid4().hex
+            row = self._upload_row(upload_id, user_id, filename, file_ext, user_query,
+                                   analysis_result, cache_hit, content_sha256)
+            if pending_rows is None:
+                await self.db.run(self._save_uploads, [row])
+            else:
+                pending_rows.append(row)
             
             return {
                 "status": "success",
@@ -1758,89 +1981,155 @@ class FileAnalysisAgent:
                 "query": user_query or "Summary requested",
                 "analysis": analysis_result,
                 "upload_id": upload_id,
+                "cached": cache_hit,
                 "timestamp": datetime.now().isoformat()
             }
             
         except Exception as e:
-            print(f"[FILE ANALYSIS ERROR] {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("[FILE ANALYSIS ERROR] %s", e)
             return {
                 "status": "error",
                 "message": f"Failed to analyze file: {str(e)}"
             }
+        finally:
+            if not leads and release is not None:
+                release()
+    
+    @staticmethod
+    async def _release_after(work: Awaitable, release: Optional[Callable[[], None]]):
+        try:
+            return await work
+        finally:
+            if release is not None:
+                release()
+
+    def start_batch_analysis(self, user_id: str, files: List[Tuple[str, Any]],
+                             user_query: Optional[str]) -> BatchJob:
+        """
+        Analyze several uploads in a background job. Each item is (filename,
+        upload) with a detached upload_ingest.SpooledUpload, or (filename,
+        message) for a file already rejected. The uploads are closed when
+        the job ends.
+        """
+        entries = [BatchFile(filename, status="error", message=item) if isinstance(item, str)
+                   else BatchFile(filename) for filename, item in files]
+        uploads = [item for _, item in files]
+        
+        async def analyze(index: int, rows: List[Tuple]) -> Dict:
+            upload = uploads[index]
+            return await self.analyze_file(upload.stream(), entries[index].filename, user_query, user_id,
+                                           content_sha256=upload.sha256, pending_rows=rows)
+        
+        async def save_rows(rows: List[Tuple]):
+            await self.db.run(self._save_uploads, rows)
+        
+        def cleanup():
+            for upload in uploads:
+                if not isinstance(upload, str):
+                    upload.close()
+        
+        return self.batch_jobs.start(user_id, entries, analyze, save_rows, cleanup)
+
+# Per-stage budgets for plan generation; a stage that overruns falls back to a partial result
+SCHEDULE_STAGE_TIMEOUT = float(os.getenv("SCHEDULE_STAGE_TIMEOUT", "45"))
+RESOURCES_STAGE_TIMEOUT = float(os.getenv("RESOURCES_STAGE_TIMEOUT", "5"))
+MOTIVATION_STAGE_TIMEOUT = float(os.getenv("MOTIVATION_STAGE_TIMEOUT", "10"))
 
 class CoordinatorAgent:
     """Coordinates between all agents and manages the overall system"""
     
     def __init__(self):
-        self.security_agent = SecurityAgent()
-        self.schedule_agent = ScheduleCreatorAgent()
+        # One database manager (and connection pool) shared by all agents
+        self.db = DatabaseManager()
+        self.security_agent = SecurityAgent(self.db)
+        self.schedule_agent = ScheduleCreatorAgent(self.db)
         self.resource_agent = ResourceFinderAgent()
         self.motivation_agent = MotivationCoachAgent()
-        self.file_analysis_agent = FileAnalysisAgent()
+        self.file_analysis_agent = FileAnalysisAgent(self.db)
         # Initialize enhanced motivation agent for mood-based responses
         try:
             from enhanced_motivation import AdvancedSentimentAnalyzer
             self.enhanced_motivation_agent = AdvancedSentimentAnalyzer()
         except ImportError:
-            print("[DEBUG] Enhanced motivation not available")
+            logger.warning("Enhanced motivation not available")
             self.enhanced_motivation_agent = None
+        # Identical plan requests in flight at the same time share one generation
+        self.plan_flight = SingleFlight("study_plans")
     
     async def generate_complete_study_plan(self, user_id: str, subject: str, 
                                          available_hours_per_day: int,
                                          total_days: int,
                                          learning_style: str = "mixed",
                                          knowledge_level: str = "beginner",
-                                         user_mood: str = "neutral") -> Dict:
-        """Generate a complete study plan using all agents"""
-        
-        try:
-            # 1. Create personalized schedule
-            study_plan = self.schedule_agent.create_personalized_schedule(
-                user_id, subject, available_hours_per_day, total_days, knowledge_level
+                                         user_mood: str = "neutral",
+                                         persist: bool = True) -> Dict:
+        """
+        Generate a complete study plan using all agents. The response carries
+        the first PLAN_INLINE_DAYS days; with ``persist`` the plan is stored
+        and the rest can be paged in by ``plan_id``.
+        """
+        # Nothing user-specific goes into the shared part of the plan
+        request_key = (
+            ' '.join(subject.lower().split()), available_hours_per_day, total_days,
+            learning_style, knowledge_level, user_mood
+        )
+        result = await self.plan_flight.do(request_key, lambda: self._generate_shared_study_plan(
+            subject, available_hours_per_day, total_days, learning_style, knowledge_level, user_mood
+        ))
+        result, layout = self._personalize_plan_result(result, user_id, subject)
+        if persist and layout is not None:
+            result["study_plan"]["plan_id"] = await self.schedule_agent.save_plan_async(
+                user_id, result["study_plan"], layout
             )
-            
-            # 2. Find best resources with learning style preference
-            resources = self.resource_agent.find_best_resources(
-                subject, knowledge_level, limit=5, learning_style=learning_style
+        return result
+    
+    def _personalize_plan_result(self, result: Dict, user_id: str,
+                                 subject: str) -> Tuple[Dict, Optional[CompactPlan]]:
+        """
+        Copy a (possibly shared) plan result and fill in the per-user fields;
+        also returns the plan's layout re-dated to start today.
+        """
+        shared_plan = result.get("study_plan")
+        if shared_plan is None:
+            return copy.deepcopy(result), None
+        # The columnar schedule is never modified, so it is re-dated rather than copied
+        window = shared_plan["schedule"]
+        result = copy.deepcopy({**result, "study_plan": {**shared_plan, "schedule": None}})
+        study_plan = result["study_plan"]
+        
+        processed_subject = study_plan["subject"]
+        study_plan["original_subject"] = subject
+        study_plan["nlp_feedback"] = f"Processed from '{subject}'" if processed_subject and processed_subject != subject else None
+        
+        # Dates count from when this request was made; days become dicts only here
+        window = window.with_start_date()
+        study_plan["schedule"] = window.to_json()
+        
+        logger.debug("[PLAN] Personalized plan for user %s", user_id)
+        return result, window.plan
+    
+    async def _generate_shared_study_plan(self, subject: str, available_hours_per_day: int,
+                                          total_days: int, learning_style: str,
+                                          knowledge_level: str, user_mood: str) -> Dict:
+        """Run all agents for a plan request; the result may be shared between users"""
+        graph = self._plan_stage_graph(subject, available_hours_per_day, total_days,
+                                       learning_style, knowledge_level, user_mood)
+        try:
+            outcome = await graph.run()
+            subject_info, final_hours = outcome.results["subject_info"]
+            # User fields are filled in per request
+            study_plan = self.schedule_agent.build_study_plan(
+                None, subject, outcome.results["normalize"], subject_info, final_hours,
+                available_hours_per_day, total_days, knowledge_level
             )
-            study_plan.resources = resources
-            
-            # 3. Get personalized motivation based on user mood (use processed subject)
-            processed_subject = study_plan.subject  # Use the cleaned subject from NLP processing
-            if self.enhanced_motivation_agent:
-                try:
-                    # Use enhanced motivation with processed subject and user mood
-                    # First analyze the mood
-                    mood_profile = self.enhanced_motivation_agent.analyze_mood(
-                        text=f"I'm feeling {user_mood} about learning {processed_subject}",
-                        context={"subject": processed_subject, "user_mood": user_mood}
-                    )
-                    # Generate personalized quote
-                    motivation_content = self.enhanced_motivation_agent.generate_personalized_quote_sync(
-                        mood_profile=mood_profile,
-                        subject=processed_subject,
-                        user_input=f"I'm feeling {user_mood} about learning {processed_subject}"
-                    )
-                    # Convert to expected format
-                    motivation = {
-                        "quote": {
-                            "content": motivation_content.content,
-                            "author": motivation_content.author
-                        },
-                        "encouragement": f"Keep going! Your progress in {processed_subject} matters."
-                    }
-                except Exception as e:
-                    print(f"[DEBUG] Enhanced motivation failed, using fallback: {e}")
-                    motivation = self._get_mood_based_motivation(user_mood, processed_subject)
-            else:
-                motivation = self._get_mood_based_motivation(user_mood, processed_subject)
+            study_plan.resources = outcome.results["resources"]
+            motivation = outcome.results["motivation"]
+            logger.debug("[STAGES] Timings: %s", outcome.seconds)
             
             # Debug logging for hour calculation
-            print(f"[HOUR DEBUG] Daily hours: {study_plan.daily_hours}")
-            print(f"[HOUR DEBUG] Total hours: {study_plan.total_hours}")
-            print(f"[HOUR DEBUG] Calculated: {study_plan.daily_hours} * days = total")
+            logger.debug("[HOUR DEBUG] Daily hours: %s", study_plan.daily_hours)
+            logger.debug("[HOUR DEBUG] Total hours: %s", study_plan.total_hours)
+            logger.debug("[HOUR DEBUG] Calculated: %s * days = total", study_plan.daily_hours)
             
             return {
                 "status": "success",
@@ -1850,10 +2139,14 @@ class CoordinatorAgent:
                     "daily_hours": study_plan.daily_hours,
                     "difficulty": study_plan.difficulty,
                     "schedule": study_plan.schedule,
+                    "total_days": total_days,
+                    "next_start": study_plan.schedule.next_start,
+                    "plan_id": None,
                     "resources": study_plan.resources,
                     "motivation": motivation,
                     "original_subject": getattr(study_plan, 'original_subject', None),
-                    "nlp_feedback": getattr(study_plan, 'nlp_feedback', None)
+                    "nlp_feedback": getattr(study_plan, 'nlp_feedback', None),
+                    "degraded_stages": outcome.degraded
                 }
             }
             
@@ -1863,6 +2156,219 @@ class CoordinatorAgent:
                 "message": f"Failed to generate study plan: {str(e)}"
             }
     
+    def _plan_stage_graph(self, subject: str, available_hours_per_day: int, total_days: int,
+                          learning_style: str, knowledge_level: str, user_mood: str) -> StageGraph:
+        """
+        Stages of plan generation. Subject info, resources and motivation only
+        share the normalized subject, so they run concurrently once it is known.
+        The NLP, resource and motivation steps are synchronous CPU work, so they
+        run in worker threads: that is what lets them overlap and lets their
+        timeouts fire (a timed-out thread finishes in the background).
+        """
+        async def normalize(_):
+            return await asyncio.to_thread(self.schedule_agent.process_subject_with_nlp, subject) or subject
+        
+        async def subject_info(inputs):
+            return await self.schedule_agent.resolve_subject_info(
+                subject, inputs["normalize"], available_hours_per_day, total_days, knowledge_level
+            )
+        
+        def subject_info_without_ai(inputs, error):
+            return self.schedule_agent.resolve_subject_info(
+                subject, inputs["normalize"], available_hours_per_day, total_days, knowledge_level, use_ai=False
+            )
+        
+        async def resources(_):
+            # Resources with learning style preference
+            return await asyncio.to_thread(
+                self.resource_agent.find_best_resources,
+                subject, knowledge_level, limit=5, learning_style=learning_style
+            )
+        
+        def fallback_resources(_, error):
+            return self.resource_agent._generate_fallback_resources(subject, knowledge_level, 5)
+        
+        async def motivation(inputs):
+            return await asyncio.to_thread(self._get_plan_motivation, user_mood, inputs["normalize"])
+        
+        def mood_based_motivation(inputs, error):
+            return self._get_mood_based_motivation(user_mood, inputs["normalize"])
+        
+        return StageGraph([
+            Stage("normalize", normalize),
+            Stage("subject_info", subject_info, deps=("normalize",),
+                  timeout=SCHEDULE_STAGE_TIMEOUT, fallback=subject_info_without_ai),
+            Stage("resources", resources, deps=("normalize",),
+                  timeout=RESOURCES_STAGE_TIMEOUT, fallback=fallback_resources),
+            Stage("motivation", motivation, deps=("normalize",),
+                  timeout=MOTIVATION_STAGE_TIMEOUT, fallback=mood_based_motivation),
+        ])
+    
+    async def stream_complete_study_plan(self, user_id: str, subject: str,
+                                         available_hours_per_day: int,
+                                         total_days: int,
+                                         learning_style: str = "mixed",
+                                         knowledge_level: str = "beginner",
+                                         user_mood: str = "neutral") -> AsyncIterator[Dict]:
+        """
+        Generate a study plan as a sequence of events, each sent as soon as it
+        is ready: subject, topics, one event per day, resources, motivation,
+        then done (or error). Only the first PLAN_INLINE_DAYS days are sent; the
+        plan is stored and done carries the plan_id to page in the rest.
+        """
+        run = self._plan_stage_graph(subject, available_hours_per_day, total_days,
+                                     learning_style, knowledge_level, user_mood).start()
+        try:
+            processed_subject = await run.result("normalize")
+            yield {"event": "subject", "data": {
+                "subject": processed_subject,
+                "original_subject": subject,
+                "nlp_feedback": f"Processed from '{subject}'" if processed_subject != subject else None,
+                "daily_hours": available_hours_per_day,
+                "difficulty": knowledge_level
+            }}
+            
+            subject_info, final_hours = await run.result("subject_info")
+            yield {"event": "topics", "data": {
+                "topics": subject_info.get("topics", []),
+                "total_hours": final_hours,
+                "total_days": total_days
+            }}
+            
+            layout = self.schedule_agent.plan_layout(
+                processed_subject, subject_info, final_hours,
+                available_hours_per_day, total_days, knowledge_level
+            )
+            window = layout.window(1, PLAN_INLINE_DAYS)
+            for day_plan in window:
+                yield {"event": "day", "data": day_plan}
+            
+            resources = await run.result("resources")
+            yield {"event": "resources", "data": resources}
+            yield {"event": "motivation", "data": await run.result("motivation")}
+            plan_id = await self.schedule_agent.save_plan_async(user_id, {
+                "subject": processed_subject,
+                "total_hours": final_hours,
+                "daily_hours": available_hours_per_day,
+                "difficulty": knowledge_level,
+                "resources": resources
+            }, layout)
+            yield {"event": "done", "data": {
+                "user_id": user_id,
+                "plan_id": plan_id,
+                "total_days": total_days,
+                "next_start": window.next_start,
+                "degraded_stages": run.outcome.degraded
+            }}
+        except Exception as e:
+            logger.exception("[STREAM] Plan generation failed: %s", e)
+            yield {"event": "error", "message": f"Failed to generate study plan: {str(e)}"}
+        finally:
+            # Client disconnects close the generator early; stop the remaining stages
+            await run.cancel()
+    
+    async def generate_multi_subject_plan(self, user_id: str, subjects: List[Dict],
+                                          available_hours_per_day: int, total_days: int,
+                                          knowledge_level: str = "beginner",
+                                          rest_weekdays: Tuple[int, ...] = (),
+                                          max_topic_hours_per_day: Optional[int] = None,
+                                          start: int = 1,
+                                          count: int = PLAN_INLINE_DAYS) -> Dict:
+        """
+        Plan several subjects at once with the scheduler engine. ``subjects``
+        holds {"subject": name, "weight": w}; topics and hour estimates come
+        from the same curriculum lookup as single-subject plans. The engine is
+        fast enough to rebuild per request, so days start..start+count-1 are
+        returned and further pages are fetched by asking again with ``start``.
+        Raises ValueError for negative weights.
+        """
+        async def resolve(subject: str):
+            processed_subject = self.schedule_agent.process_subject_with_nlp(subject) or subject
+            try:
+                info, hours = await asyncio.wait_for(self.schedule_agent.resolve_subject_info(
+                    subject, processed_subject, available_hours_per_day, total_days, knowledge_level
+                ), SCHEDULE_STAGE_TIMEOUT)
+            except Exception as e:
+                logger.warning("[MULTI PLAN] AI subject info for %s failed, using fallback: %s", subject, e)
+                info, hours = await self.schedule_agent.resolve_subject_info(
+                    subject, processed_subject, available_hours_per_day, total_days, knowledge_level, use_ai=False
+                )
+            return processed_subject, info, hours
+        
+        # An explicit weight of 0 is kept (that subject only gets spare hours)
+        weights = [1.0 if entry.get("weight") is None else float(entry["weight"]) for entry in subjects]
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Subject weights must not be negative")
+        
+        try:
+            resolved = await asyncio.gather(*(resolve(entry["subject"]) for entry in subjects))
+            specs = [
+                SubjectSpec(name=processed_subject, topics=topic_specs(info.get("topics", [])),
+                            weight=weight, hours=hours)
+                for weight, (processed_subject, info, hours) in zip(weights, resolved)
+            ]
+            constraints = ScheduleConstraints(
+                daily_hours=available_hours_per_day,
+                total_days=total_days,
+                start_date=datetime.now().strftime("%Y-%m-%d"),
+                rest_weekdays=tuple(rest_weekdays),
+                max_topic_hours_per_day=max_topic_hours_per_day,
+                knowledge_level=knowledge_level
+            )
+            schedule = build_schedule(specs, constraints)
+            
+            start = max(1, start)
+            count = max(1, min(count, PLAN_PAGE_MAX_DAYS))
+            days = schedule.days(start, count)
+            following = start + len(days)
+            return {
+                "status": "success",
+                "study_plan": {
+                    "subjects": [spec.name for spec in specs],
+                    "daily_hours": available_hours_per_day,
+                    "difficulty": knowledge_level,
+                    "total_days": total_days,
+                    "schedule": days,
+                    "next_start": following if following <= total_days else None,
+                    **schedule.summary()
+                }
+            }
+        except Exception as e:
+            logger.exception("[MULTI PLAN] Failed for user %s: %s", user_id, e)
+            return {
+                "status": "error",
+                "message": f"Failed to generate multi-subject plan: {str(e)}"
+            }
+    
+    def _get_plan_motivation(self, user_mood: str, processed_subject: str) -> Dict:
+        """Personalized motivation based on user mood (uses the processed subject)"""
+        if not self.enhanced_motivation_agent:
+            return self._get_mood_based_motivation(user_mood, processed_subject)
+        try:
+            # Use enhanced motivation with processed subject and user mood
+            # First analyze the mood
+            mood_profile = self.enhanced_motivation_agent.analyze_mood(
+                text=f"I'm feeling {user_mood} about learning {processed_subject}",
+                context={"subject": processed_subject, "user_mood": user_mood}
+            )
+            # Generate personalized quote
+            motivation_content = self.enhanced_motivation_agent.generate_personalized_quote_sync(
+                mood_profile=mood_profile,
+                subject=processed_subject,
+                user_input=f"I'm feeling {user_mood} about learning {processed_subject}"
+            )
+            # Convert to expected format
+            return {
+                "quote": {
+                    "content": motivation_content.content,
+                    "author": motivation_content.author
+                },
+                "encouragement": f"Keep going! Your progress in {processed_subject} matters."
+            }
+        except Exception as e:
+            logger.warning("Enhanced motivation failed, using fallback: %s", e)
+            return self._get_mood_based_motivation(user_mood, processed_subject)
+    
     def _get_mood_based_motivation(self, user_mood: str, subject: str):
         """Generate mood-specific motivation messages"""
         mood_messages = {
@@ -1909,7 +2415,8 @@ async def generate_schedule(goal: str) -> List[str]:
             subject=goal,
             available_hours_per_day=2,
             total_days=7,
-            knowledge_level="beginner"
+            knowledge_level="beginner",
+            persist=False
         )
         
         if result["status"] == "success":
@@ -1919,7 +2426,7 @@ async def generate_schedule(goal: str) -> List[str]:
         else:
             return ["Could not generate a schedule."]
     except Exception as e:
-        print(f"Error in generate_schedule: {e}")
+        logger.error("Error in generate_schedule: %s", e)
         return ["Could not generate a schedule."]
 
 async def find_resource(topic: str) -> Dict:
@@ -1938,7 +2445,7 @@ async def find_resource(topic: str) -> Dict:
                 "link": "No resources found"
             }
     except Exception as e:
-        print(f"Error in find_resource: {e}")
+        logger.error("Error in find_resource: %s", e)
         return {
             "topic": topic,
             "link": "Error finding resources"
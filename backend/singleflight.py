@@ -0,0 +1,51 @@
+"""
+Request Coalescing (singleflight) for AI Study Planner
+Concurrent callers asking for the same key share one in-flight computation
+instead of each starting their own.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async work by key.
+
+    The first caller for a key starts ``fn()`` as a task; callers arriving while
+    it runs await the same task. The shared result object is returned to every
+    caller, so callers that modify it must copy it first. A caller being
+    cancelled does not cancel the shared work for the others.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self):
+        """Leader/follower counters for monitoring endpoints"""
+        return {
+            "name": self.name,
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,139 @@
+"""
+Stage Graph Executor for AI Study Planner
+Runs agent stages as a small dependency graph: every stage starts as soon as
+the stages it depends on have finished, so independent stages overlap.
+Each stage can have its own timeout and a fallback that supplies a partial
+result when the stage fails or times out.
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+logger = get_logger("stage_graph")
+
+
+@dataclass
+class Stage:
+    """
+    One unit of work. ``run`` receives the results of ``deps`` (keyed by stage
+    name); ``fallback`` receives the same dict plus the exception and may
+    return a value or an awaitable.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    fallback: Optional[Callable[[Dict[str, Any], Exception], Any]] = None
+
+
+@dataclass
+class GraphResult:
+    results: Dict[str, Any] = field(default_factory=dict)
+    seconds: Dict[str, float] = field(default_factory=dict)
+    degraded: List[str] = field(default_factory=list)
+
+
+class StageGraph:
+    """Validated, reusable set of stages"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage dependency cycle through '{name}'")
+            state[name] = "visiting"
+            for dep in self.stages[name].deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+                visit(dep)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def start(self) -> "GraphRun":
+        """Schedule every stage on the running loop and return immediately"""
+        return GraphRun(self)
+
+    async def run(self) -> GraphResult:
+        """
+        Run every stage. A stage without a fallback that fails re-raises, and
+        the stages still running are cancelled.
+        """
+        return await self.start().wait()
+
+
+class GraphRun:
+    """A started graph; individual stage results can be awaited as they finish"""
+
+    def __init__(self, graph: StageGraph):
+        self.outcome = GraphResult()
+        self.tasks: Dict[str, asyncio.Task] = {}
+        for name in graph.order:
+            self.tasks[name] = asyncio.ensure_future(self._run_stage(graph.stages[name]))
+
+    async def _run_stage(self, stage: Stage):
+        inputs = {}
+        for dep in stage.deps:
+            inputs[dep] = await self.tasks[dep]
+        started = time.perf_counter()
+        try:
+            if stage.timeout is None:
+                result = await stage.run(inputs)
+            else:
+                result = await asyncio.wait_for(stage.run(inputs), stage.timeout)
+        except Exception as e:
+            if stage.fallback is None:
+                raise
+            logger.warning("[STAGES] %s degraded (%s): %s", stage.name, type(e).__name__,
+                           str(e) or f"exceeded {stage.timeout}s")
+            self.outcome.degraded.append(stage.name)
+            result = stage.fallback(inputs, e)
+            if inspect.isawaitable(result):
+                result = await result
+        self.outcome.seconds[stage.name] = round(time.perf_counter() - started, 4)
+        self.outcome.results[stage.name] = result
+        return result
+
+    async def result(self, name: str) -> Any:
+        """Wait for one stage (cancelling the rest if it fails)"""
+        try:
+            return await asyncio.shield(self.tasks[name])
+        except BaseException:
+            await self.cancel()
+            raise
+
+    async def wait(self) -> GraphResult:
+        """Wait for every stage"""
+        try:
+            await asyncio.gather(*self.tasks.values())
+        except BaseException:
+            await self.cancel()
+            raise
+        return self.outcome
+
+    async def cancel(self):
+        """Cancel unfinished stages (e.g. when the client goes away)"""
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
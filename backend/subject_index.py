@@ -0,0 +1,155 @@
+"""
+Subject Catalog Index for AI Study Planner
+Built once when the subjects database loads, so subject lookup and fuzzy
+matching no longer scan every subject and keyword on each request.
+
+Substring tests ("is the query inside this keyword?", "is this keyword inside
+the query?") are answered exactly with a character n-gram index; the query
+only touches postings for its own n-grams and then verifies the candidates.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+
+@dataclass
+class SubjectMatch:
+    """One ranked candidate for a subject query"""
+    name: str
+    score: float
+    matched_via: str
+
+
+class NGramIndex:
+    """Exact substring lookups over a set of short strings"""
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self.texts: List[str] = []
+        self._grams: Dict[str, Set[int]] = defaultdict(set)
+        # Every substring shorter than n -> ids of texts containing it
+        self._short_substrings: Dict[str, Set[int]] = defaultdict(set)
+        # Whole texts shorter than n -> ids (they have no n-grams)
+        self._short_texts: Dict[str, Set[int]] = defaultdict(set)
+        self._gram_counts: List[int] = []
+
+    def _ngrams(self, text: str) -> Set[str]:
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, text: str) -> int:
+        text_id = len(self.texts)
+        self.texts.append(text)
+        grams = self._ngrams(text)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._grams[gram].add(text_id)
+        for size in range(1, self.n):
+            for i in range(len(text) - size + 1):
+                self._short_substrings[text[i:i + size]].add(text_id)
+        if len(text) < self.n:
+            self._short_texts[text].add(text_id)
+        return text_id
+
+    def containing(self, query: str) -> Set[int]:
+        """Ids of texts that contain query as a substring"""
+        if not query:
+            return set(range(len(self.texts)))
+        if len(query) < self.n:
+            return set(self._short_substrings.get(query, ()))
+
+        postings = sorted((self._grams.get(gram, set()) for gram in self._ngrams(query)), key=len)
+        if not postings[0]:
+            return set()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        return {text_id for text_id in candidates if query in self.texts[text_id]}
+
+    def contained_in(self, query: str) -> Set[int]:
+        """Ids of (non-empty) texts that are substrings of query"""
+        found: Set[int] = set()
+        for size in range(1, min(self.n, len(query) + 1)):
+            for i in range(len(query) - size + 1):
+                found.update(self._short_texts.get(query[i:i + size], ()))
+
+        hits: Dict[int, int] = defaultdict(int)
+        for gram in self._ngrams(query):
+            for text_id in self._grams.get(gram, ()):
+                hits[text_id] += 1
+        for text_id, count in hits.items():
+            if count == self._gram_counts[text_id] and self.texts[text_id] in query:
+                found.add(text_id)
+        return found
+
+
+class SubjectIndex:
+    """Name, keyword and category index over the subjects catalog"""
+
+    def __init__(self, subjects_db: Dict[str, Dict], subjects_by_keywords: Dict[str, List[str]]):
+        # Catalog order matters: earlier subjects win ties, as with the old linear scans
+        self.names: List[str] = list(subjects_db.keys())
+        self._names = NGramIndex()
+        for name in self.names:
+            self._names.add(name.lower())
+
+        # Keywords and categories, in the order they were indexed
+        self._terms: List[Tuple[str, List[str]]] = []
+        self._term_grams = NGramIndex()
+        for term, subject_names in subjects_by_keywords.items():
+            if not term:
+                continue
+            self._terms.append((term, list(subject_names)))
+            self._term_grams.add(term.lower())
+
+    def match_name(self, cleaned_subject: str) -> Optional[str]:
+        """
+        First catalog subject whose name contains the cleaned input or is
+        contained in it (case-insensitive)
+        """
+        query = cleaned_subject.lower()
+        ids = self._names.containing(query) | self._names.contained_in(query)
+        return self.names[min(ids)] if ids else None
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[SubjectMatch]:
+        """
+        Ranked fuzzy matches, one per subject.
+
+        Keyword/category hits score len(keyword) / len(query); name hits (query
+        inside the name, or any query word inside the name) score 0.8. Ties go
+        to keyword hits, then to whichever was indexed first.
+        """
+        query = query.lower()
+        if not query:
+            return []
+
+        ranked: List[Tuple[float, int, int, int, SubjectMatch]] = []
+        term_ids = self._term_grams.containing(query) | self._term_grams.contained_in(query)
+        for term_id in term_ids:
+            term, subject_names = self._terms[term_id]
+            score = len(term) / len(query)
+            for position, name in enumerate(subject_names):
+                ranked.append((-score, 0, term_id, position,
+                               SubjectMatch(name, score, f'keyword: {term}')))
+
+        name_ids = set(self._names.containing(query))
+        for word in query.split():
+            name_ids |= self._names.containing(word)
+        for subject_id in name_ids:
+            name = self.names[subject_id]
+            ranked.append((-0.8, 1, subject_id, 0,
+                           SubjectMatch(name, 0.8, f'name similarity: {name}')))
+
+        ranked.sort(key=lambda item: item[:4])
+        matches: List[SubjectMatch] = []
+        seen: Set[str] = set()
+        for *_, match in ranked:
+            if match.name in seen:
+                continue
+            seen.add(match.name)
+            matches.append(match)
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
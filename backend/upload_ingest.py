@@ -0,0 +1,89 @@
+"""
+Streaming Upload Ingestion for AI Study Planner
+Uploads are consumed in fixed-size chunks, never as one bytes object: each
+chunk is counted against a hard size cap and fed to SHA-256, and the file
+itself stays on the spooled temporary file the multipart parser wrote it to
+(in memory up to 1 MB, on disk beyond that). Extractors get that seekable
+file object, so peak memory per upload is bounded by the spool threshold
+plus one chunk rather than by the document size.
+"""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+# Whole multipart request (several files plus form fields); each file is capped separately
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(100 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+# Same threshold as the multipart parser: detached copies stay in memory up to 1 MB
+UPLOAD_SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the size cap"""
+
+    def __init__(self, max_bytes: int):
+        limit = f"{max_bytes // (1024 * 1024)} MB" if max_bytes >= 1024 * 1024 else f"{max_bytes // 1024} KB"
+        super().__init__(f"Upload exceeds the {limit} upload limit")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class SpooledUpload:
+    """A size-checked, hashed upload backed by a seekable (spooled) file"""
+    filename: str
+    file: BinaryIO
+    size: int
+    sha256: str
+
+    def stream(self) -> BinaryIO:
+        """The file rewound to its start, for extractors that read it"""
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        self.file.close()
+
+
+def check_content_length(content_length: Optional[str], max_bytes: int) -> None:
+    """Reject a request early when its declared body size is already over the cap"""
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+
+async def spool_upload(upload, max_bytes: int = UPLOAD_MAX_BYTES,
+                       chunk_size: int = UPLOAD_CHUNK_SIZE, detach: bool = False) -> SpooledUpload:
+    """
+    Stream a FastAPI/Starlette UploadFile in chunks, enforcing the size cap
+    and hashing as it goes. The framework has already spooled the part to a
+    SpooledTemporaryFile, so that file is reused instead of copied - unless
+    ``detach`` is set: the framework closes its file once the response is
+    sent, so work that outlives the request gets its own spooled copy
+    (written in the same pass; the caller closes it).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    copy = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY) if detach else None
+    try:
+        await upload.seek(0)
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            digest.update(chunk)
+            if copy is not None:
+                copy.write(chunk)
+    except BaseException:
+        if copy is not None:
+            copy.close()
+        raise
+    await upload.seek(0)
+    return SpooledUpload(upload.filename or "upload", copy if copy is not None else upload.file,
+                         size, digest.hexdigest())
+
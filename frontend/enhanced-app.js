@@ -3,6 +3,7 @@
 const API_BASE_URL = 'http://127.0.0.1:8000';
 let currentUser = null;
 let authToken = null;
+let currentAdvancedPlan = null;  // Last rendered plan, extended by "Load more days"
 
 // ===== ETHICAL CONTENT VALIDATION =====
 function validateEthicalContent(subject) {
@@ -919,7 +920,8 @@ async function generateAdvancedPlan() {
         
         console.log('Generating advanced plan for:', { subject, dailyHours, totalDays, knowledgeLevel, learningStyle, selectedMood, userAssessmentData });
         
-        const response = await makeAuthenticatedRequest('/api/generate-advanced-plan', {
+        // Streaming endpoint: stages arrive as NDJSON lines and render as they come in
+        const response = await makeAuthenticatedRequest('/api/generate-advanced-plan/stream', {
             method: 'POST',
             body: JSON.stringify({
                 subject: subject,
@@ -950,11 +952,9 @@ async function generateAdvancedPlan() {
             throw new Error(`Server error: ${response.status} - ${errorText}`);
         }
         
-        const data = await response.json();
+        const data = await renderPlanStream(response, learningStyle, loadingDiv);
         console.log('Advanced plan generated:', data);
         
-        displayAdvancedResults(data, learningStyle);
-        
     } catch (error) {
         console.error('Error generating advanced plan:', error);
         showError('advanced-results', `Failed to generate advanced plan: ${error.message}`);
@@ -967,6 +967,100 @@ async function generateAdvancedPlan() {
     }
 }
 
+// Read an NDJSON plan stream, re-rendering the plan (at most once per frame) as each stage arrives
+async function renderPlanStream(response, learningStyle, loadingDiv) {
+    const data = { status: 'success', study_plan: { schedule: [], resources: [] } };
+    const plan = data.study_plan;
+    let renderQueued = false;
+    
+    const render = () => {
+        if (renderQueued) return;
+        renderQueued = true;
+        requestAnimationFrame(() => {
+            renderQueued = false;
+            if (loadingDiv) {
+                loadingDiv.classList.remove('show');
+                loadingDiv.style.display = 'none';
+            }
+            displayAdvancedResults(data, learningStyle);
+        });
+    };
+    
+    const handleEvent = (message) => {
+        switch (message.event) {
+            case 'subject':
+                // Nothing worth drawing until the topics and hours are known
+                Object.assign(plan, message.data);
+                return;
+            case 'topics':
+                Object.assign(plan, message.data);
+                break;
+            case 'day':
+                plan.schedule.push(message.data);
+                break;
+            case 'resources':
+                plan.resources = message.data;
+                break;
+            case 'motivation':
+                plan.motivation = message.data;
+                break;
+            case 'done':
+                plan.degraded_stages = message.data.degraded_stages;
+                plan.plan_id = message.data.plan_id;
+                plan.next_start = message.data.next_start;
+                break;
+            case 'error':
+                throw new Error(message.message);
+        }
+        render();
+    };
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) handleEvent(JSON.parse(line));
+        }
+    }
+    if (buffer.trim()) handleEvent(JSON.parse(buffer));
+    
+    return data;
+}
+
+// Fetch the next page of days for the current plan and append it to the roadmap
+async function loadMorePlanDays() {
+    if (!currentAdvancedPlan) return;
+    const { data, learningStyle } = currentAdvancedPlan;
+    const plan = data.study_plan;
+    if (!plan.plan_id || !plan.next_start) return;
+    
+    const button = document.getElementById('load-more-days-btn');
+    if (button) button.disabled = true;
+    
+    try {
+        const response = await makeAuthenticatedRequest(
+            `/api/study-plans/${encodeURIComponent(plan.plan_id)}/days?start=${plan.next_start}&count=30`
+        );
+        if (!response.ok) {
+            throw new Error(`Server error: ${response.status}`);
+        }
+        const page = await response.json();
+        plan.schedule.push(...page.days);
+        plan.next_start = page.next_start;
+        displayAdvancedResults(data, learningStyle);
+    } catch (error) {
+        console.error('Error loading more plan days:', error);
+        if (button) button.disabled = false;
+    }
+}
+
 function displayAdvancedResults(data, learningStyle = 'mixed') {
     const resultsDiv = document.getElementById('advanced-results');
     if (!resultsDiv) {
@@ -981,6 +1075,7 @@ function displayAdvancedResults(data, learningStyle = 'mixed') {
     }
     
     const plan = data.study_plan;
+    currentAdvancedPlan = { data, learningStyle };
     
     // Generate roadmap nodes
     let scheduleHtml = '';
@@ -1142,8 +1237,8 @@ function displayAdvancedResults(data, learningStyle = 'mixed') {
         }).join('');
     }
     
-    // Calculate total study days
-    const totalDays = plan.schedule ? plan.schedule.length : 0;
+    // Long plans arrive a page of days at a time, so prefer the server's total
+    const totalDays = plan.total_days || (plan.schedule ? plan.schedule.length : 0);
     const learningStyleDisplay = getLearningStyleDisplay(learningStyle);
     
     resultsDiv.innerHTML = `
@@ -1193,6 +1288,13 @@ function displayAdvancedResults(data, learningStyle = 'mixed') {
                             <div class="roadmap-path"></div>
                             ${scheduleHtml}
                         </div>
+                        ${plan.plan_id && plan.next_start ? `
+                            <div style="text-align: center; margin-top: 2rem;">
+                                <button class="btn-next" id="load-more-days-btn" onclick="loadMorePlanDays()">
+                                    Load more days (${plan.schedule.length} of ${totalDays} shown)
+                                </button>
+                            </div>
+                        ` : ''}
                     </div>
                 ` : ''}
                 
@@ -0,0 +1,16 @@
+"""Shared fixtures"""
+
+import pytest
+
+from backend.database_pool import ConnectionPool
+from backend.db_migrations import apply_migrations
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """Connection pool on a fresh, fully migrated database"""
+    pool = ConnectionPool(str(tmp_path / "test.db"), max_size=2)
+    with pool.connection() as conn:
+        apply_migrations(conn)
+    yield pool
+    pool.close_all()
@@ -0,0 +1,82 @@
+"""Tests for backend.analysis_cache"""
+
+import asyncio
+import io
+
+from backend.analysis_cache import AnalysisCache, file_sha256
+
+
+def stored(pool, table, column):
+    with pool.connection() as conn:
+        return {row[0] for row in conn.execute(f'SELECT {column} FROM {table}')}
+
+
+def test_file_sha256_rewinds_the_stream():
+    stream = io.BytesIO(b"lecture" * 100000)
+    stream.seek(5)
+    assert file_sha256(stream) == file_sha256(io.BytesIO(b"lecture" * 100000))
+    assert stream.tell() == 0
+
+
+def test_result_keys_normalize_the_query():
+    key = AnalysisCache.result_key("abc", "pdf", "What is  Mitosis?", "model", "1")
+    assert key == AnalysisCache.result_key("abc", "pdf", " what is mitosis? ", "model", "1")
+    assert key != AnalysisCache.result_key("abc", "pptx", "What is Mitosis?", "model", "1")
+    assert key != AnalysisCache.result_key("abc", "pdf", "What is Mitosis?", "model", "2")
+    assert AnalysisCache.result_key("abc", "pdf", None, "m", "1") == AnalysisCache.result_key("abc", "pdf", "", "m", "1")
+
+
+def test_results_and_texts_round_trip_and_count_hits(pool):
+    cache = AnalysisCache(pool)
+
+    async def scenario():
+        assert await cache.get_text("abc") is None
+        assert await cache.get_result("key") is None and not await cache.has_result("key")
+        await cache.put_text("abc", "pdf", "Extracted text")
+        await cache.put_result("key", "abc", "The analysis")
+        return await cache.get_text("abc"), await cache.get_result("key"), await cache.has_result("key")
+
+    assert asyncio.run(scenario()) == ("Extracted text", "The analysis", True)
+    assert (cache.text_hits, cache.result_hits, cache.misses) == (1, 1, 1)
+
+
+def test_texts_are_evicted_by_row_count(pool):
+    cache = AnalysisCache(pool, max_documents=2)
+
+    async def scenario():
+        await cache.put_text("a", "pdf", "first")
+        await cache.put_text("b", "pdf", "second")
+        await cache.get_text("a")  # b is now the least recently used
+        await cache.put_text("c", "pdf", "third")
+
+    asyncio.run(scenario())
+    assert stored(pool, "document_texts", "sha256") == {"a", "c"}
+    assert cache.evictions == 1
+
+
+def test_texts_are_evicted_by_total_size(pool):
+    cache = AnalysisCache(pool, max_text_bytes=1000)
+
+    async def scenario():
+        await cache.put_text("a", "pdf", "x" * 600)
+        await cache.put_text("b", "pdf", "é" * 300)  # 600 bytes of UTF-8
+        after_b = stored(pool, "document_texts", "sha256")
+        await cache.put_text("big", "pdf", "y" * 5000)  # alone over the cap, still kept
+        return after_b
+
+    assert asyncio.run(scenario()) == {"b"}
+    assert stored(pool, "document_texts", "sha256") == {"big"}
+    assert cache.evictions == 2
+
+
+def test_results_are_evicted_least_recently_used_first(pool):
+    cache = AnalysisCache(pool, max_results=2)
+
+    async def scenario():
+        await cache.put_result("k1", "a", "one")
+        await cache.put_result("k2", "a", "two")
+        await cache.get_result("k1")
+        await cache.put_result("k3", "b", "three")
+
+    asyncio.run(scenario())
+    assert stored(pool, "analysis_results", "key") == {"k1", "k3"}
@@ -0,0 +1,73 @@
+"""Tests for backend.batch_jobs"""
+
+import asyncio
+
+from backend.batch_jobs import BatchFile, BatchJobRunner
+
+
+def test_running_jobs_are_not_evicted_and_count_as_pending_uploads():
+    runner = BatchJobRunner(concurrency=4, max_jobs=1)
+    release = None
+    saved = []
+
+    async def analyze(index, rows):
+        await release.wait()
+        rows.append(("row", index))
+        return {"status": "success", "cached": index == 1}
+
+    async def save_rows(rows):
+        saved.extend(rows)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        files = [BatchFile("a.pdf"), BatchFile("b.pdf"), BatchFile("c.txt", status="error", message="Unsupported")]
+        first = runner.start("u1", files, analyze, save_rows)
+        second = runner.start("u1", [BatchFile("d.pdf")], analyze, save_rows)
+        other = runner.start("u2", [BatchFile("e.pdf")], analyze, save_rows)
+        await asyncio.sleep(0)
+
+        # max_jobs=1, yet every running job stays pollable
+        assert all(runner.get(job.user_id, job.job_id) is job for job in (first, second, other))
+        assert runner.get("u2", first.job_id) is None
+        assert runner.pending_uploads("u1") == 3
+        assert runner.stats()["running"] == 3
+
+        release.set()
+        while runner.running:
+            await asyncio.sleep(0)
+        return first
+
+    first = asyncio.run(scenario())
+    assert first.status == "completed"
+    assert runner.pending_uploads("u1") == 0
+    assert len(saved) == 4
+    # Finished jobs move to the bounded cache
+    assert len(runner.running) == 0 and runner.jobs.stats()["size"] == 1
+
+
+def test_pending_uploads_can_leave_out_cache_hits():
+    runner = BatchJobRunner()
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def analyze(index, rows):
+            if index == 0:
+                return {"status": "success", "cached": True}
+            await gate.wait()
+            return {"status": "success", "cached": False}
+
+        async def save_rows(rows):
+            pass
+
+        runner.start("u1", [BatchFile("cached.pdf"), BatchFile("new.pdf")], analyze, save_rows)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        counts = runner.pending_uploads("u1"), runner.pending_uploads("u1", count_cache_hits=False)
+        gate.set()
+        while runner.running:
+            await asyncio.sleep(0)
+        return counts
+
+    assert asyncio.run(scenario()) == (2, 1)
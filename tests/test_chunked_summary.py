@@ -0,0 +1,122 @@
+"""Tests for backend.chunked_summary"""
+
+import asyncio
+
+from backend.chunked_summary import ChunkedSummarizer, _split_oversized, chunk_document, split_sections
+from backend.extraction_pool import PAGE_BREAK
+from backend.llm_cache import ResponseCache
+
+
+def pdf_text(pages):
+    # Same layout as extraction_pool.extract_pdf_pages
+    return "".join(page + "\n" + PAGE_BREAK for page in pages)
+
+
+class FakeLLM:
+    """Answers chunk and merge prompts with summaries of a fixed length"""
+
+    def __init__(self, length=40):
+        self.length = length
+        self.prompts = []
+
+    async def generate(self, prompt):
+        self.prompts.append(prompt)
+        kind = "merged" if prompt.startswith("Merge") else "summary"
+        return f"{kind} {len(self.prompts)} ".ljust(self.length, ".")
+
+    def count(self, kind):
+        return sum(1 for prompt in self.prompts if prompt.startswith(kind))
+
+
+def summarizer(pool, llm, **options):
+    return ChunkedSummarizer(llm.generate, ResponseCache(pool, namespace="summaries"), **options)
+
+
+def test_small_sections_are_packed_into_chunks():
+    text = "\n\n".join(f"Paragraph {n} " + "x" * 20 for n in range(1, 8))  # 33 characters each
+    unit, chunks = chunk_document(text, chunk_tokens=20)  # 80 characters
+    assert unit == "Part"
+    assert [(first, last) for first, last, _ in chunks] == [(1, 2), (3, 4), (5, 6), (7, 7)]
+    assert all(len(body) <= 80 for _, _, body in chunks)
+    assert chunks[0][2] == "Paragraph 1 " + "x" * 20 + "\n\nParagraph 2 " + "x" * 20
+
+
+def test_oversized_sections_are_split_at_line_breaks():
+    body = "short line\n" + "y" * 25 + "\nanother short line\n"
+    pieces = _split_oversized(body, 20)
+    assert "".join(pieces) == body
+    assert all(len(piece) <= 20 for piece in pieces)
+    assert pieces[0] == "short line\n"
+    assert pieces[-1] == "another short line\n"
+
+    unit, chunks = chunk_document(pdf_text(["a" * 10, body.strip()]), chunk_tokens=5)
+    assert unit == "Page"
+    assert [(first, last) for first, last, _ in chunks] == [(1, 1)] + [(2, 2)] * (len(chunks) - 1)
+
+
+def test_chunks_follow_page_and_slide_boundaries():
+    pages = [f"Page {n} text " * 3 for n in range(1, 6)]
+    pages[1] = ""
+    unit, chunks = chunk_document(pdf_text(pages), chunk_tokens=25)
+    assert unit == "Page"
+    assert [(first, last) for first, last, _ in chunks] == [(1, 3), (4, 5)]
+    assert all(page.strip() in body for page, (_, _, body) in zip([pages[0], pages[3]], chunks))
+
+    slides = "".join(f"\n--- Slide {n} ---\nSlide {n} title\nBullet {n}\n" for n in (2, 3, 7))
+    unit, chunks = chunk_document(slides, chunk_tokens=15)
+    assert unit == "Slide"
+    assert [(first, last) for first, last, _ in chunks] == [(2, 3), (7, 7)]
+    assert split_sections(slides)[1][0] == (2, "Slide 2 title\nBullet 2")
+
+
+def test_documents_that_fit_after_the_map_step_are_not_merged(pool):
+    llm = FakeLLM()
+    condensed = asyncio.run(summarizer(pool, llm, chunk_tokens=50, direct_tokens=500).condense(
+        pdf_text([f"Page {n} " * 20 for n in range(1, 5)])))
+    assert llm.count("Summarize") == 4 and llm.count("Merge") == 0
+    assert condensed.startswith("[Page 1] summary")
+
+
+def test_summaries_are_merged_level_by_level_until_they_fit(pool):
+    text = pdf_text([f"Page {n} " * 20 for n in range(1, 17)])
+    llm = FakeLLM()
+    chunked = summarizer(pool, llm, chunk_tokens=50, direct_tokens=50)
+    condensed = asyncio.run(chunked.condense(text))
+    assert llm.count("Summarize") == 16
+    # 16 summaries -> 5 merged groups of 3 and page 16 alone -> 2 merges of 3
+    assert chunked.merges == llm.count("Merge") == 7
+    assert condensed.count("[Pages ") == 2
+    assert len(condensed) / 4 <= 50
+
+
+def test_reduce_stops_at_max_levels(pool):
+    text = pdf_text([f"Page {n} " * 20 for n in range(1, 17)])
+    llm = FakeLLM()
+    condensed = asyncio.run(summarizer(pool, llm, chunk_tokens=50, direct_tokens=50, max_levels=1).condense(text))
+    assert llm.count("Merge") == 5
+    sections = condensed.split("\n\n")
+    assert len(sections) == 6 and sections[-1].startswith("[Page 16] summary")
+    assert len(condensed) / 4 > 50
+
+
+def test_reduce_stops_when_no_neighbours_fit_one_merge(pool):
+    llm = FakeLLM(length=150)  # two rendered summaries exceed one 200-character merge prompt
+    chunked = summarizer(pool, llm, chunk_tokens=50, direct_tokens=50)
+    condensed = asyncio.run(chunked.condense(pdf_text([f"Page {n} " * 20 for n in range(1, 5)])))
+    assert llm.count("Merge") == 0 and chunked.merges == 0
+    assert condensed.count("[Page ") == 4
+
+
+def test_condensing_the_same_text_again_makes_no_llm_calls(pool):
+    text = pdf_text([f"Page {n} " * 20 for n in range(1, 17)])
+    llm = FakeLLM()
+    chunked = summarizer(pool, llm, chunk_tokens=50, direct_tokens=50)
+
+    async def twice():
+        first = await chunked.condense(text)
+        calls = len(llm.prompts)
+        return first, calls, await chunked.condense(text)
+
+    first, calls, second = asyncio.run(twice())
+    assert second == first
+    assert len(llm.prompts) == calls
@@ -0,0 +1,22 @@
+"""Tests for backend.extraction_pool"""
+
+import asyncio
+import os
+
+from backend.extraction_pool import ExtractionPool
+
+
+def test_workers_are_not_forked_from_the_server_process():
+    pool = ExtractionPool(workers=1)
+    try:
+        worker_pid = asyncio.run(pool._submit(os.getpid))
+        assert worker_pid != os.getpid()
+        assert pool._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        pool.shutdown()
+
+
+def test_thread_mode_runs_in_process():
+    pool = ExtractionPool(workers=0)
+    assert asyncio.run(pool._submit(os.getpid)) == os.getpid()
+    assert pool.stats()["mode"] == "thread"
@@ -0,0 +1,134 @@
+"""Tests for simple_agents.FileAnalysisAgent.analyze_file: cached repeats and shared analyses"""
+
+import asyncio
+import hashlib
+import importlib
+import io
+
+import pytest
+
+from backend.llm_client import AsyncLLMClient
+from backend.upload_ingest import SpooledUpload
+
+PDF_BYTES = b"%PDF-1.4 lecture notes"
+SHA256 = hashlib.sha256(PDF_BYTES).hexdigest()
+
+
+class FakeExtractor:
+    """Extraction pool stand-in; extract() waits for ``gate`` when one is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = None
+
+    def available(self, file_ext):
+        return True
+
+    async def extract(self, file_ext, stream):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return "Enzymes speed up reactions by lowering the activation energy."
+
+
+class FakeBackend:
+    name = "fake:test"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        return f"Analysis {self.calls}"
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    # Importing simple_agents builds the app's coordinator, which opens study_planner.db in the cwd
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_BACKEND", "fake")
+    simple_agents = importlib.import_module("backend.simple_agents")
+    agent = simple_agents.FileAnalysisAgent(simple_agents.DatabaseManager(str(tmp_path / "agent.db")))
+    agent.llm = AsyncLLMClient(FakeBackend())
+    agent.extractor = FakeExtractor()
+    return agent
+
+
+def spooled():
+    return SpooledUpload("notes.pdf", io.BytesIO(PDF_BYTES), len(PDF_BYTES), SHA256)
+
+
+def analyze(agent, upload, user_id="u1", query=None):
+    return agent.analyze_file(file_content=upload.stream(), filename=upload.filename, user_query=query,
+                              user_id=user_id, content_sha256=upload.sha256, release=upload.close)
+
+
+def test_repeat_upload_skips_extraction_and_the_llm(agent):
+    first, again, other = spooled(), spooled(), spooled()
+
+    async def scenario():
+        return (await analyze(agent, first), await analyze(agent, again),
+                await analyze(agent, other, query="What do enzymes do?"))
+
+    results = asyncio.run(scenario())
+    assert [result["cached"] for result in results] == [False, True, False]
+    assert results[1]["analysis"] == results[0]["analysis"]
+    # The new question reuses the extracted text but needs its own answer
+    assert agent.extractor.calls == 1
+    assert agent.llm.backend.calls == 2
+    assert first.file.closed and again.file.closed and other.file.closed
+
+
+def test_followers_share_the_analysis_and_close_their_own_copy(agent):
+    leader, followers = spooled(), [spooled(), spooled()]
+
+    async def scenario():
+        agent.extractor.gate = asyncio.Event()
+        leading = asyncio.ensure_future(analyze(agent, leader))
+        await asyncio.sleep(0.05)
+        following = [asyncio.ensure_future(analyze(agent, upload)) for upload in followers]
+        await asyncio.sleep(0.05)
+        # Followers are done with their copies while the shared analysis still reads the leader's
+        assert [upload.file.closed for upload in followers] == [False, False]
+        assert not leader.file.closed
+        agent.extractor.gate.set()
+        return await asyncio.gather(leading, *following)
+
+    results = asyncio.run(scenario())
+    assert [result["cached"] for result in results] == [False, True, True]
+    assert len({result["analysis"] for result in results}) == 1
+    assert agent.extractor.calls == 1 and agent.llm.backend.calls == 1
+    assert leader.file.closed and all(upload.file.closed for upload in followers)
+
+
+def test_leader_copy_is_closed_when_the_shared_analysis_ends(agent):
+    leader, follower = spooled(), spooled()
+
+    async def scenario():
+        agent.extractor.gate = asyncio.Event()
+        leading = asyncio.ensure_future(analyze(agent, leader))
+        await asyncio.sleep(0.05)
+        following = asyncio.ensure_future(analyze(agent, follower))
+        await asyncio.sleep(0.05)
+        leading.cancel()  # the leader's client went away
+        await asyncio.sleep(0.05)
+        assert not leader.file.closed  # still being analyzed for the follower
+        agent.extractor.gate.set()
+        return await following
+
+    result = asyncio.run(scenario())
+    assert result["status"] == "success" and result["cached"]
+    assert leader.file.closed and follower.file.closed
+
+
+def test_cache_hits_can_be_left_out_of_the_daily_limit(agent):
+    async def scenario():
+        for _ in range(3):
+            await analyze(agent, spooled())
+
+    asyncio.run(scenario())
+    assert agent.check_daily_upload_limit("u1")["count"] == 3
+    agent.analysis_cache.hits_count_toward_limit = False
+    assert agent.check_daily_upload_limit("u1")["count"] == 1
+    assert asyncio.run(agent.is_uncounted_cache_hit(SHA256, "notes.pdf", None))
+    assert not asyncio.run(agent.is_uncounted_cache_hit(SHA256, "notes.pdf", "A new question"))
@@ -0,0 +1,85 @@
+"""Tests for backend.llm_cache"""
+
+import asyncio
+
+from backend.llm_cache import ResponseCache
+
+
+def stored_keys(pool, namespace):
+    with pool.connection() as conn:
+        return {row[0] for row in conn.execute(
+            'SELECT key FROM llm_response_cache WHERE namespace = ?', (namespace,))}
+
+
+def test_eviction_stays_within_namespace(pool):
+    busy = ResponseCache(pool, namespace="busy", max_entries=3)
+    quiet = ResponseCache(pool, namespace="quiet", max_entries=3)
+
+    async def fill():
+        await quiet.get_or_compute("quiet:1", lambda: asyncio.sleep(0, "kept"))
+        for number in range(10):
+            await busy.get_or_compute(f"busy:{number}", lambda: asyncio.sleep(0, "value"))
+
+    asyncio.run(fill())
+    assert stored_keys(pool, "quiet") == {"quiet:1"}
+    assert stored_keys(pool, "busy") == {"busy:7", "busy:8", "busy:9"}
+    assert busy.evictions == 7
+    assert quiet.evictions == 0
+
+
+def test_stale_entry_is_served_and_refreshed_in_background(pool):
+    cache = ResponseCache(pool, namespace="stale", ttl=0, stale_ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(len(calls))
+        return len(calls)
+
+    async def scenario():
+        first = await cache.get_or_compute("stale:key", compute)
+        second = await cache.get_or_compute("stale:key", compute)
+        assert len(cache._tasks) == 1
+        await asyncio.gather(*cache._tasks)
+        return first, second
+
+    assert asyncio.run(scenario()) == (1, 1)
+    assert cache.refreshes == 1
+    assert not cache._tasks
+
+
+def last_access(pool, key):
+    with pool.connection() as conn:
+        return conn.execute('SELECT last_access FROM llm_response_cache WHERE key = ?', (key,)).fetchone()[0]
+
+
+def test_memory_hits_keep_hot_keys_from_eviction(pool):
+    cache = ResponseCache(pool, namespace="hot", max_entries=2, touch_interval=0)
+
+    async def scenario():
+        await cache.get_or_compute("hot", lambda: asyncio.sleep(0, "hot"))
+        await cache.get_or_compute("cold", lambda: asyncio.sleep(0, "cold"))
+        assert await cache.get_or_compute("hot", lambda: asyncio.sleep(0, "recomputed")) == "hot"
+        await cache.get_or_compute("new", lambda: asyncio.sleep(0, "new"))
+
+    asyncio.run(scenario())
+    assert stored_keys(pool, "hot") == {"hot", "new"}
+
+
+def test_memory_hits_touch_the_row_once_per_interval(pool):
+    cache = ResponseCache(pool, namespace="throttled", touch_interval=60)
+    touches = []
+    touch = cache._touch
+    cache._touch = lambda key: (touches.append(key), touch(key))
+
+    async def hits():
+        for _ in range(5):
+            await cache.get_or_compute("key", lambda: asyncio.sleep(0, "value"))
+
+    asyncio.run(hits())
+    assert touches == []  # storing the row just set last_access
+    stored = last_access(pool, "key")
+    cache.touched.clear()  # as if the interval had passed
+    asyncio.run(hits())
+    assert touches == ["key"]
+    assert last_access(pool, "key") > stored
+    assert cache.disk_hits == 0 and cache.misses == 1
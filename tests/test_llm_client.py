@@ -0,0 +1,33 @@
+"""Tests for backend.llm_client"""
+
+import asyncio
+
+import pytest
+
+from backend.llm_client import AsyncLLMClient, FakeLLMBackend, LLMError, LLMTimeoutError, _LoopLocalSemaphore
+
+
+def test_timeout_covers_waiting_for_a_slot():
+    client = AsyncLLMClient(FakeLLMBackend("test", latency=0.2), limit=_LoopLocalSemaphore(1))
+
+    async def scenario():
+        return await asyncio.gather(client.generate("first", timeout=1),
+                                    client.generate("second", timeout=0.1), return_exceptions=True)
+
+    first, second = asyncio.run(scenario())
+    assert first.startswith("Summary")
+    assert isinstance(second, LLMTimeoutError)
+    assert client.timeouts == 1 and client.calls == 1 and client.in_flight == 0
+
+
+def test_backend_errors_are_wrapped():
+    class Failing:
+        name = "failing"
+
+        async def generate(self, prompt):
+            raise ValueError("quota exceeded")
+
+    client = AsyncLLMClient(Failing(), limit=_LoopLocalSemaphore(1))
+    with pytest.raises(LLMError, match="failing failed: quota exceeded"):
+        asyncio.run(client.generate("prompt"))
+    assert client.failures == 1 and client.in_flight == 0
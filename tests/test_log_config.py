@@ -0,0 +1,43 @@
+"""Tests for backend.log_config"""
+
+import logging
+import queue
+import sys
+
+from backend.log_config import StructuredFormatter, _DeferredQueueHandler
+
+
+def make_record(msg, args=(), exc_info=None, **extra):
+    record = logging.LogRecord("study_planner.tests", logging.ERROR, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def raised():
+    try:
+        raise ValueError("bad input")
+    except ValueError:
+        return sys.exc_info()
+
+
+def test_traceback_follows_on_separate_lines():
+    text = StructuredFormatter().format(make_record("Upload %s failed", ("a.pdf",), raised(), user="u1"))
+    first, *rest = text.split("\n")
+    assert 'msg="Upload a.pdf failed"' in first
+    assert "user=u1" in first
+    assert rest[0] == "Traceback (most recent call last):"
+    assert rest[-1] == "ValueError: bad input"
+
+
+def test_queue_handler_defers_traceback_formatting():
+    log_queue = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+    items = ["first"]
+    handler.handle(make_record("Items: %s", (items,), raised()))
+    items.append("added later")
+
+    record = log_queue.get_nowait()
+    assert record.msg == "Items: ['first']"
+    assert record.args is None
+    assert record.exc_info is not None and record.exc_text is None
+    assert StructuredFormatter().format(record).endswith("ValueError: bad input")
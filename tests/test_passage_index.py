@@ -0,0 +1,104 @@
+"""Tests for backend.passage_index"""
+
+import asyncio
+
+import pytest
+
+from backend.chunked_summary import split_sections
+from backend.extraction_pool import PAGE_BREAK
+from backend.passage_index import PassageIndex, match_expression, rebuild_document
+
+
+def pdf_text(pages):
+    # Same layout as extraction_pool.extract_pdf_pages
+    return "".join(page + "\n" + PAGE_BREAK for page in pages)
+
+
+def stored_text(pool, text, passage_tokens):
+    index = PassageIndex(pool, passage_tokens=passage_tokens)
+    if not index.available:
+        pytest.skip("SQLite built without FTS5")
+
+    async def scenario():
+        await index.add_document("doc", text)
+        return await index.document_text("doc")
+
+    return asyncio.run(scenario())
+
+
+def test_pdf_pages_keep_their_numbers(pool):
+    pages = [f"Page {n} covers photosynthesis step {n}. " * 20 for n in range(1, 6)]
+    pages[2] = ""  # an empty page still counts
+    text = pdf_text(pages)
+    rebuilt = stored_text(pool, text, passage_tokens=200)
+    assert PAGE_BREAK in rebuilt
+    assert split_sections(rebuilt) == split_sections(text)
+
+
+def test_slides_keep_their_markers(pool):
+    text = "".join(f"\n--- Slide {n} ---\nSlide {n} title\nBullet about cells {n}\n" for n in (1, 2, 4))
+    rebuilt = stored_text(pool, text, passage_tokens=5)
+    assert split_sections(rebuilt) == split_sections(text)
+
+
+def test_oversized_page_pieces_stay_on_one_page():
+    passages = [("Page 1", "first half\n"), ("Page 1", "second half"), ("Pages 2-3", "two pages"),
+                ("Page 5", "last")]
+    unit, sections = split_sections(rebuild_document(passages))
+    assert unit == "Page"
+    assert sections == [(1, "first half\nsecond half"), (2, "two pages"), (5, "last")]
+
+
+def test_plain_text_is_joined_by_paragraphs():
+    assert rebuild_document([("Part 1", "one"), ("Parts 2-3", "two\n\nthree")]) == "one\n\ntwo\n\nthree"
+
+
+def make_index(pool, **options):
+    index = PassageIndex(pool, **options)
+    if not index.available:
+        pytest.skip("SQLite built without FTS5")
+    return index
+
+
+def test_match_expression_quotes_every_word():
+    assert match_expression('mitosis AND NOT "meiosis" OR body:* (cells) -x') == \
+        'body : ("mitosis" OR "and" OR "not" OR "meiosis" OR "or" OR "body" OR "cells")'
+    assert match_expression("? * ( ) a") is None
+
+
+def test_search_ranks_by_bm25_within_one_document(pool):
+    index = make_index(pool, passage_tokens=20)
+    cells = pdf_text(["Plants make sugar by photosynthesis in the chloroplast.",
+                      "Mitosis splits one cell into two identical cells. Mitosis has four phases.",
+                      "Meiosis halves the chromosomes; unlike mitosis it makes gametes."])
+    other = pdf_text(["Mitosis mitosis mitosis, from a document the question is not about."])
+
+    async def scenario():
+        await index.add_document("cells", cells)
+        await index.add_document("other", other)
+        return (await index.search("Which phases does mitosis have?", sha256="cells"),
+                await index.search('mitosis" OR sha256 : "other', sha256="cells"),
+                await index.search("mitosis", sha256="missing"),
+                await index.search("!!", sha256="cells"))
+
+    ranked, injected, missing, empty = asyncio.run(scenario())
+    assert [passage["label"] for passage in ranked] == ["Page 2", "Page 3"]
+    assert ranked[0]["score"] > ranked[1]["score"]
+    assert {passage["sha256"] for passage in ranked + injected} == {"cells"}
+    assert missing == [] and empty == []
+    assert index.searches == 3
+
+
+def test_least_recently_used_documents_are_evicted(pool):
+    index = make_index(pool, max_documents=2)
+
+    async def scenario():
+        await index.add_document("a", "alpha notes about enzymes")
+        await index.add_document("b", "beta notes about enzymes")
+        await index.search("enzymes", sha256="a")  # a is now used more recently than b
+        await index.add_document("c", "gamma notes about enzymes")
+        return [await index.document_text(sha256) for sha256 in ("a", "b", "c")]
+
+    a, b, c = asyncio.run(scenario())
+    assert "alpha" in a and b is None and "gamma" in c
+    assert index.evictions == 1
@@ -0,0 +1,94 @@
+"""Tests for backend.plan_model.CompactPlan"""
+
+import json
+
+import pytest
+
+from backend.plan_model import PLAN_FORMAT, CompactPlan
+
+
+def make_plan(**overrides):
+    values = dict(subject="Physics", topics=[f"Topic {i + 1}" for i in range(8)], total_hours=20,
+                  daily_hours=2, total_days=12, knowledge_level="intermediate", start_date="2026-01-05")
+    values.update(overrides)
+    return CompactPlan(**values)
+
+
+def test_float_hours_are_coerced_to_whole_hours():
+    plan = make_plan(total_hours=20.0, daily_hours=2.0)
+    days = plan.days(1, 3)
+    assert [day["hours"] for day in days] == [2, 2, 2]
+    assert all(isinstance(topic["hours"], int) for day in days for topic in day["topics"])
+    replanned = plan.replan(3, daily_hours=1.0)
+    assert replanned.days(3, 1)[0]["hours"] == 1
+
+
+@pytest.mark.parametrize("topics, total_hours", [(8, 20), (7, 60), (3, 2), (5, 101)])
+def test_topic_hours_add_up_to_total_hours(topics, total_hours):
+    plan = make_plan(topics=[f"Topic {i + 1}" for i in range(topics)], total_hours=total_hours,
+                     total_days=total_hours)
+    assert sum(plan.topic_hours) == total_hours
+    assert max(plan.topic_hours) - min(plan.topic_hours) <= 1
+    assert sum(plan.window().hours) == total_hours
+
+
+def test_plans_stored_without_topic_hours_keep_their_layout():
+    values = json.loads(make_plan().to_json())
+    del values["topic_hours"]
+    restored = CompactPlan.from_json(json.dumps(values))
+    assert restored.topic_hours == [2] * 8
+
+
+def topics_from(plan, start):
+    return [topic["topic"] for day in plan.days(start) for topic in day["topics"]]
+
+
+def scheduled_hours(plan, start):
+    return sum(topic["hours"] for day in plan.days(start) for topic in day["topics"])
+
+
+def test_replan_carries_missed_hours_forward():
+    plan = make_plan()
+    replanned = plan.replan(4, missed_days=[2])
+    earlier = replanned.days(1, 3)
+    assert [day["topics"] for day in earlier] == [day["topics"] for day in plan.days(1, 3)]
+    assert [day.get("missed", False) for day in earlier] == [False, True, False]
+    assert replanned.revisions[-1]["topic_hours"] == [1, 1, 3, 3, 2, 2, 2, 2]
+    assert topics_from(replanned, 4)[:2] == ["Topic 1", "Topic 2"]
+    assert scheduled_hours(replanned, 4) == 16
+    assert replanned.missed_days == [2]
+
+
+def test_replan_is_idempotent():
+    once = make_plan().replan(4, missed_days=[2], daily_hours=3)
+    twice = once.replan(4, missed_days=[2], daily_hours=3)
+    assert twice.revisions == once.revisions
+    assert twice.days() == once.days()
+
+
+def test_chained_replans_count_missed_days_once():
+    plan = make_plan().replan(4, missed_days=[2]).replan(6, missed_days=[5])
+    # Days 1, 3 and 4 were studied (6 of 20 hours); day 5's topics are owed again
+    assert scheduled_hours(plan, 6) == 14
+    assert plan.missed_days == [2, 5]
+
+
+def test_replan_drops_completed_topics():
+    plan = make_plan()
+    replanned = plan.replan(3, completed_topics=["Topic 5", "Topic 6"])
+    remaining = topics_from(replanned, 3)
+    assert "Topic 5" not in remaining and "Topic 6" not in remaining
+    assert scheduled_hours(replanned, 3) == scheduled_hours(plan, 3) - 4
+    with pytest.raises(ValueError):
+        plan.replan(3, completed_topics=["Not a topic"])
+
+
+def test_compact_json_round_trip():
+    plan = make_plan(total_hours=30.4).replan(5, missed_days=[1, 3], completed_topics=["Topic 8"], daily_hours=4)
+    text = plan.to_json()
+    assert json.loads(text)["format"] == PLAN_FORMAT
+    restored = CompactPlan.from_json(text)
+    assert restored == plan
+    assert restored.days() == plan.days()
+    with pytest.raises(ValueError):
+        CompactPlan.from_json(json.dumps({"subject": "Physics"}))
@@ -0,0 +1,90 @@
+"""Tests for backend.resource_index, against the linear scan it replaced"""
+
+import json
+import random
+from pathlib import Path
+
+from backend.resource_index import ResourceIndex
+
+DATASETS = Path(__file__).resolve().parent.parent / "datasets"
+STYLES = ("mixed", "visual", "auditory", "reading", "kinesthetic")
+STYLE_TYPES = {
+    "visual": ['video_course', 'video_series', 'interactive_tutorial'],
+    "auditory": ['video_course', 'podcast'],
+    "reading": ['book', 'guide', 'tutorial', 'academic_paper'],
+    "kinesthetic": ['interactive_course', 'interactive_tutorial', 'mobile_app'],
+}
+
+
+def linear_search(resources, subject, difficulty="beginner", resource_type=None, limit=3, learning_style="mixed"):
+    best_resources = []
+    subject_lower = subject.lower()
+    for resource in resources:
+        score = 0
+        if subject_lower == resource.get('subject', '').lower():
+            score = 1.0
+        elif subject_lower in resource.get('subject', '').lower():
+            score = 0.9
+        elif subject_lower in resource.get('title', '').lower():
+            score = 0.8
+        elif any(subject_lower in keyword.lower() for keyword in resource.get('keywords', [])):
+            score = 0.85
+        elif any(subject_lower in tag.lower() for tag in resource.get('tags', [])):
+            score = 0.75
+        elif subject_lower in resource.get('category', '').lower():
+            score = 0.7
+        if score > 0 and (resource_type is None or resource.get('resource_type') == resource_type) \
+                and (difficulty == "beginner" or resource.get('difficulty') == difficulty):
+            resource_copy = resource.copy()
+            if resource.get('resource_type', '').lower() in STYLE_TYPES.get(learning_style, ()):
+                score += 0.15
+            resource_copy['similarity_score'] = min(score, 1.0)
+            best_resources.append(resource_copy)
+    best_resources.sort(key=lambda x: x.get('similarity_score', 0), reverse=True)
+    return best_resources[:limit]
+
+
+def synthetic_catalog(size=150):
+    rng = random.Random(11)
+    words = ["python", "data", "mining", "calculus", "algebra", "web", "design", "ml", "art", "history"]
+    types = ["book", "video_course", "podcast", "guide", "interactive_course", "mobile_app", "tutorial"]
+
+    def phrase():
+        return " ".join(rng.sample(words, rng.randint(1, 3)))
+
+    return [{
+        "id": i,
+        "title": phrase().title(),
+        "subject": phrase().title(),
+        "category": rng.choice(["Programming", "Mathematics", "Arts", ""]),
+        "resource_type": rng.choice(types),
+        "difficulty": rng.choice(["beginner", "intermediate", "advanced"]),
+        "keywords": [phrase() for _ in range(rng.randint(0, 3))],
+        "tags": [phrase() for _ in range(rng.randint(0, 3))],
+    } for i in range(size)]
+
+
+def assert_equivalent(resources, subjects):
+    index = ResourceIndex(resources)
+    types = sorted({resource.get("resource_type") for resource in resources}) + [None, "missing"]
+    for subject in subjects:
+        for difficulty in ("beginner", "intermediate", "advanced"):
+            for style in STYLES:
+                for resource_type in types:
+                    for limit in (0, 2, len(resources)):
+                        args = (subject, difficulty, resource_type, limit, style)
+                        assert index.search(*args) == linear_search(resources, *args), args
+
+
+def test_bundled_catalog_matches_linear_scan():
+    with open(DATASETS / "educational_resources.json") as f:
+        resources = json.load(f)
+    subjects = {word for resource in resources
+                for value in (resource["subject"], resource["title"], resource.get("category", ""))
+                for word in [value, value.lower(), *value.lower().split()]}
+    assert_equivalent(resources, sorted(subjects | {"", "zzz", "data mining"}))
+
+
+def test_synthetic_catalog_matches_linear_scan():
+    resources = synthetic_catalog()
+    assert_equivalent(resources, ["python", "Data Mining", "ml", "a", "Art", "history web", "", "nothing"])
@@ -0,0 +1,118 @@
+"""Tests for backend.scheduler_engine"""
+
+import random
+
+import pytest
+
+from backend.scheduler_engine import (ScheduleConstraints, ScheduleError, SubjectSpec, TopicSpec, apportion,
+                                      build_schedule)
+
+
+def test_apportion_sums_exactly():
+    rng = random.Random(7)
+    for _ in range(500):
+        weights = [rng.choice([0, 0.5, 1, 2, 3.7]) for _ in range(rng.randint(1, 12))]
+        total = rng.randint(0, 400)
+        shares = apportion(total, weights, minimum=rng.choice([0, 1]))
+        assert sum(shares) == total
+        assert all(share >= 0 for share in shares)
+
+
+def test_apportion_float_total_sums_to_whole_hours():
+    shares = apportion(20.0, [1, 1, 1])
+    assert shares == [7, 7, 6]
+    assert all(isinstance(share, int) for share in shares)
+
+
+def test_subject_spec_coerces_float_hours_and_rejects_negative_weight():
+    assert SubjectSpec("Maths", [TopicSpec("Algebra")], hours=12.6).hours == 13
+    with pytest.raises(ScheduleError):
+        SubjectSpec("Maths", [TopicSpec("Algebra")], weight=-1)
+
+
+def test_float_inputs_schedule_whole_hours():
+    subjects = [SubjectSpec("Maths", [TopicSpec("Algebra"), TopicSpec("Geometry")], hours=9.5),
+                SubjectSpec("Physics", [TopicSpec("Optics")], hours=4.2)]
+    schedule = build_schedule(subjects, ScheduleConstraints(daily_hours=3.0, total_days=7, start_date="2026-01-05"))
+    summary = schedule.summary()
+    assert summary["scheduled_hours"] == 10 + 4
+    assert summary["unscheduled_hours"] == 0
+
+
+def _random_subjects(rng):
+    subjects = []
+    for s in range(rng.randint(1, 4)):
+        topics = [TopicSpec(f"S{s}T{t}", weight=rng.choice([1, 2, 3])) for t in range(rng.randint(1, 6))]
+        subjects.append(SubjectSpec(f"S{s}", topics, weight=rng.choice([1, 2]),
+                                    hours=rng.choice([None, rng.randint(1, 40)]),
+                                    sequential=rng.random() < 0.5))
+    return subjects
+
+
+def test_placement_respects_budgets_caps_and_prerequisites():
+    rng = random.Random(11)
+    for _ in range(200):
+        subjects = _random_subjects(rng)
+        constraints = ScheduleConstraints(daily_hours=rng.randint(1, 6), total_days=rng.randint(1, 30),
+                                          start_date="2026-01-05", rest_weekdays=rng.choice([(), (6,), (5, 6)]),
+                                          max_topic_hours_per_day=rng.choice([None, 1, 2]))
+        schedule = build_schedule(subjects, constraints)
+        cap = constraints.max_topic_hours_per_day
+        finished_on = {}
+        for day in range(1, len(schedule) + 1):
+            first, last = schedule.offsets[day - 1], schedule.offsets[day]
+            assert sum(schedule.hours[first:last]) <= schedule.budgets[day - 1]
+            for i in range(first, last):
+                if cap is not None:
+                    assert schedule.hours[i] <= cap
+                finished_on[schedule.topic_ids[i]] = day
+        # Sequential subjects: a topic never starts before the previous one is done
+        offset = 0
+        for subject in subjects:
+            if subject.sequential:
+                for t in range(offset + 1, offset + len(subject.topics)):
+                    started = [d for d in range(1, len(schedule) + 1)
+                               if t in schedule.topic_ids[schedule.offsets[d - 1]:schedule.offsets[d]]]
+                    if started:
+                        assert finished_on.get(t - 1, 0) <= started[0]
+            offset += len(subject.topics)
+        assert sum(schedule.placed) + schedule.unscheduled_hours == sum(schedule.allocated)
+
+
+def test_all_hours_placed_when_capacity_suffices():
+    subjects = [SubjectSpec("A", [TopicSpec("a1"), TopicSpec("a2")], hours=10, sequential=False),
+                SubjectSpec("B", [TopicSpec("b1")], hours=6, sequential=False)]
+    schedule = build_schedule(subjects, ScheduleConstraints(daily_hours=4, total_days=4, start_date="2026-01-05",
+                                                            max_topic_hours_per_day=2))
+    assert schedule.summary()["scheduled_hours"] == 16
+
+
+def test_subject_never_gets_more_than_its_demand():
+    subjects = [SubjectSpec("Fixed", [TopicSpec("f")], hours=40),
+                SubjectSpec("Open", [TopicSpec("o")], hours=None)]
+    schedule = build_schedule(subjects, ScheduleConstraints(daily_hours=6, total_days=20, start_date="2026-01-05"))
+    hours = schedule.summary()["subject_hours"]
+    assert hours["Fixed"]["allocated_hours"] == 40
+    assert hours["Open"]["allocated_hours"] == 120 - 40
+
+
+def test_zero_weight_subject_only_gets_spare_hours():
+    subjects = [SubjectSpec("Main", [TopicSpec("m")], hours=50, weight=1),
+                SubjectSpec("Extra", [TopicSpec("e")], hours=50, weight=0)]
+    schedule = build_schedule(subjects, ScheduleConstraints(daily_hours=4, total_days=15, start_date="2026-01-05"))
+    hours = schedule.summary()["subject_hours"]
+    assert hours["Main"]["allocated_hours"] == 50
+    assert hours["Extra"]["allocated_hours"] == 10
+
+
+def test_zero_hour_prerequisite_does_not_duplicate_ready_topics():
+    subjects = [SubjectSpec("S", [TopicSpec("a"), TopicSpec("b"), TopicSpec("c")], hours=1)]
+    schedule = build_schedule(subjects, ScheduleConstraints(daily_hours=6, total_days=5, start_date="2026-01-05"))
+    assert list(schedule.placed) == list(schedule.allocated)
+
+
+def test_long_chain_of_zero_hour_topics_does_not_recurse():
+    topics = [TopicSpec("weighted")] + [TopicSpec(f"free {i}", weight=0) for i in range(3000)]
+    subjects = [SubjectSpec("S", topics, hours=20)]
+    schedule = build_schedule(subjects, ScheduleConstraints(daily_hours=2, total_days=10, start_date="2026-01-05"))
+    assert schedule.summary()["scheduled_hours"] == 20
@@ -0,0 +1,80 @@
+"""Tests for backend.singleflight"""
+
+import asyncio
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"plan": len(calls)}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"name": "test", "in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0)
+        return value
+
+    async def scenario():
+        first = await asyncio.gather(flight.do("a", lambda: compute("a")), flight.do("b", lambda: compute("b")))
+        again = await flight.do("a", lambda: compute("a again"))
+        return first, again
+
+    assert asyncio.run(scenario()) == (["a", "b"], "a again")
+    assert calls == ["a", "b", "a again"]
+
+
+def test_error_reaches_every_caller_and_is_not_kept():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("generation failed")
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        retry = await flight.do("key", lambda: asyncio.sleep(0, "recovered"))
+        return results, retry
+
+    results, retry = asyncio.run(scenario())
+    assert [type(result) for result in results] == [RuntimeError] * 3
+    assert retry == "recovered"
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
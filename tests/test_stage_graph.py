@@ -0,0 +1,100 @@
+"""Tests for backend.stage_graph"""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.stage_graph import Stage, StageGraph
+
+
+def run(graph: StageGraph):
+    return asyncio.run(graph.run())
+
+
+def test_dependent_stage_receives_results():
+    async def first(_):
+        return 2
+
+    async def second(inputs):
+        return inputs["first"] * 10
+
+    outcome = run(StageGraph([Stage("first", first), Stage("second", second, deps=("first",))]))
+    assert outcome.results == {"first": 2, "second": 20}
+    assert outcome.degraded == []
+
+
+def test_timeout_uses_fallback_and_marks_stage_degraded():
+    async def slow(_):
+        await asyncio.sleep(5)
+        return "late"
+
+    seen = []
+
+    def fallback(inputs, error):
+        seen.append(type(error))
+        return "fallback"
+
+    started = time.perf_counter()
+    outcome = run(StageGraph([Stage("slow", slow, timeout=0.05, fallback=fallback)]))
+    assert time.perf_counter() - started < 1
+    assert outcome.results["slow"] == "fallback"
+    assert outcome.degraded == ["slow"]
+    assert seen == [asyncio.TimeoutError]
+
+
+def test_blocking_stage_in_thread_times_out():
+    async def blocking(_):
+        return await asyncio.to_thread(time.sleep, 0.5)
+
+    async def timed():
+        started = time.perf_counter()
+        outcome = await StageGraph([Stage("blocking", blocking, timeout=0.05,
+                                          fallback=lambda inputs, error: [])]).run()
+        return outcome, time.perf_counter() - started
+
+    # asyncio.run itself waits for the abandoned thread, so time inside the loop
+    outcome, elapsed = asyncio.run(timed())
+    assert elapsed < 0.4
+    assert outcome.results["blocking"] == []
+    assert outcome.degraded == ["blocking"]
+
+
+def test_error_uses_awaitable_fallback_with_dependency_inputs():
+    async def base(_):
+        return "maths"
+
+    async def broken(_):
+        raise RuntimeError("boom")
+
+    async def fallback(inputs, error):
+        return f"{inputs['base']}: {error}"
+
+    outcome = run(StageGraph([Stage("base", base), Stage("broken", broken, deps=("base",), fallback=fallback)]))
+    assert outcome.results["broken"] == "maths: boom"
+    assert outcome.degraded == ["broken"]
+
+
+def test_error_without_fallback_propagates():
+    async def broken(_):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run(StageGraph([Stage("broken", broken)]))
+
+
+def test_independent_stages_overlap():
+    async def blocking(_):
+        return await asyncio.to_thread(time.sleep, 0.2)
+
+    started = time.perf_counter()
+    run(StageGraph([Stage(name, blocking) for name in ("a", "b", "c")]))
+    assert time.perf_counter() - started < 0.5
+
+
+def test_cycle_is_rejected():
+    async def noop(_):
+        return None
+
+    with pytest.raises(ValueError):
+        StageGraph([Stage("a", noop, deps=("b",)), Stage("b", noop, deps=("a",))])
@@ -0,0 +1,102 @@
+"""Tests for backend.subject_index, against the linear scans it replaced"""
+
+import json
+import random
+import string
+from pathlib import Path
+
+import pytest
+
+from backend.subject_index import NGramIndex, SubjectIndex
+
+DATASETS = Path(__file__).resolve().parent.parent / "datasets"
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    with open(DATASETS / "subjects_database.json") as f:
+        subjects_db = {subject["name"]: subject for subject in json.load(f)["subjects"]}
+    # Same keyword/category index as ScheduleCreatorAgent.load_subjects_database
+    subjects_by_keywords = {}
+    for name, subject in subjects_db.items():
+        for keyword in subject.get("keywords", []):
+            subjects_by_keywords.setdefault(keyword, []).append(name)
+        if subject.get("category"):
+            subjects_by_keywords.setdefault(subject["category"], []).append(name)
+    return subjects_db, subjects_by_keywords
+
+
+def linear_match_name(subjects_db, cleaned_subject):
+    for subject_name in subjects_db:
+        if cleaned_subject in subject_name.lower() or subject_name.lower() in cleaned_subject:
+            return subject_name
+    return None
+
+
+def linear_best_match(subjects_db, subjects_by_keywords, subject):
+    subject_lower = subject.lower()
+    best_match, best_score = None, 0
+    for keyword, subject_names in subjects_by_keywords.items():
+        if subject_lower in keyword.lower() or keyword.lower() in subject_lower:
+            for subject_name in subject_names:
+                score = len(keyword) / len(subject_lower)
+                if score > best_score:
+                    best_score, best_match = score, (subject_name, f"keyword: {keyword}")
+    for subject_name in subjects_db:
+        if subject_lower in subject_name.lower() or any(word in subject_name.lower()
+                                                        for word in subject_lower.split()):
+            if 0.8 > best_score:
+                best_score, best_match = 0.8, (subject_name, f"name similarity: {subject_name}")
+    return (best_match, best_score) if best_score > 0.3 else (None, best_score)
+
+
+def queries(subjects_db, subjects_by_keywords):
+    rng = random.Random(9)
+    terms = [*subjects_db, *subjects_by_keywords]
+    found = set()
+    for term in terms:
+        lower = term.lower()
+        found.update({term, lower, lower.upper(), f"intro to {lower}", f"advanced {lower} course"})
+        found.update(lower.split())
+        for _ in range(3):
+            start = rng.randrange(len(lower))
+            found.add(lower[start:start + rng.randint(1, 6)])
+    found.update({"", "x", "zzzz", "quantum basket weaving", "learn python and data", "ml"})
+    return sorted(found)
+
+
+def test_match_name_equals_linear_scan(catalog):
+    subjects_db, subjects_by_keywords = catalog
+    index = SubjectIndex(subjects_db, subjects_by_keywords)
+    for query in queries(subjects_db, subjects_by_keywords):
+        cleaned = query.lower().strip()
+        assert index.match_name(cleaned) == linear_match_name(subjects_db, cleaned), query
+
+
+def test_best_search_match_equals_linear_scan(catalog):
+    subjects_db, subjects_by_keywords = catalog
+    index = SubjectIndex(subjects_db, subjects_by_keywords)
+    for query in queries(subjects_db, subjects_by_keywords):
+        if not query.strip():
+            continue
+        expected, expected_score = linear_best_match(subjects_db, subjects_by_keywords, query)
+        matches = index.search(query, limit=1)
+        best = matches[0] if matches and matches[0].score > 0.3 else None
+        if expected is None:
+            assert best is None, query
+        else:
+            assert (best.name, best.matched_via) == expected, query
+            assert best.score == pytest.approx(expected_score)
+
+
+def test_ngram_index_substring_lookups_match_brute_force():
+    rng = random.Random(3)
+    alphabet = "abc d"
+    texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 9))) for _ in range(200)]
+    index = NGramIndex()
+    for text in texts:
+        index.add(text)
+    for _ in range(300):
+        query = "".join(rng.choice(alphabet + string.digits[:1]) for _ in range(rng.randint(0, 7)))
+        assert index.containing(query) == {i for i, text in enumerate(texts) if query in text}
+        assert index.contained_in(query) == {i for i, text in enumerate(texts) if text in query}